@@ -1,52 +1,105 @@
-import bcrypt
 from datetime import datetime, timedelta, timezone
 from typing import Optional
-import jwt
+from uuid import uuid4
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from .db import db
+from .db import async_db, db, normalize_email, sync_shared_state
+from .hashing import hasher, HasherSaturated
 from .models import User
+from .token_cache import TokenCache
+from . import config, metrics
 
 # Configuration
 SECRET_KEY = "supersecretkey" # TODO: Move to environment variable
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+token_seconds = metrics.histogram(
+    "auth_token_seconds", "Time spent signing or verifying access tokens",
+    buckets=metrics.FAST_BUCKETS, labels=("operation",),
+)
+_encode_seconds = token_seconds.labels("encode")
+_decode_seconds = token_seconds.labels("decode")
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
-def verify_password(plain_password, hashed_password):
-    if not isinstance(hashed_password, bytes):
-        hashed_password = hashed_password.encode('utf-8')
-    return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password)
+token_cache = TokenCache(max_size=config.TOKEN_CACHE_SIZE)
+db.add_user_listener(token_cache.invalidate_user)
+db.add_revocation_listener(token_cache.revoke)
+
+def _hasher_saturated_exception():
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many authentication requests, try again shortly",
+        headers={"Retry-After": "1"},
+    )
+
+async def hash_password(password: str) -> str:
+    try:
+        return await hasher.hash(password)
+    except HasherSaturated:
+        raise _hasher_saturated_exception()
 
-def get_password_hash(password):
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+async def check_password(plain_password: str, hashed_password: str) -> bool:
+    try:
+        return await hasher.verify(plain_password, hashed_password)
+    except HasherSaturated:
+        raise _hasher_saturated_exception()
 
+# PyJWT is imported by the first token signed or checked, not at startup
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
+    import jwt
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.now(timezone.utc) + expires_delta
     else:
         expire = datetime.now(timezone.utc) + timedelta(minutes=15)
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    # jti keeps tokens issued within the same second distinct, so revoking one doesn't revoke the other
+    to_encode.update({"exp": expire, "jti": uuid4().hex})
+    with _encode_seconds.time():
+        encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme)):
+async def get_current_user(token: str = Depends(oauth2_scheme), _synced: None = Depends(sync_shared_state)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    if token_cache.is_revoked(token):
+        raise credentials_exception
+    # A cached token was already verified and hasn't reached its exp yet
+    user = token_cache.get(token)
+    if user is not None:
+        return user
+
+    import jwt
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        with _decode_seconds.time():
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
         if username is None:
             raise credentials_exception
     except jwt.PyJWTError:
         raise credentials_exception
     
-    user = db.get_user_by_username(username)
+    user = await async_db.get_user_by_username(username)
     if user is None:
         raise credentials_exception
+    token_cache.put(token, user, payload["exp"])
     return user
+
+async def get_admin_user(current_user: User = Depends(get_current_user)):
+    if normalize_email(current_user.email) not in config.ADMIN_EMAILS:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return current_user
+
+async def revoke_token(token: str):
+    import jwt
+    try:
+        with _decode_seconds.time():
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except jwt.PyJWTError:
+        return
+    token_cache.revoke(token, payload["exp"])
+    await async_db.revoke_token(token, payload["exp"])
@@ -0,0 +1,154 @@
+"""Streaming NDJSON export and bulk import of scores and sessions.
+
+Exports read the store in batches through its ``iter_*`` generators and
+write one JSON object per line, optionally gzipped, without building the
+whole list in memory. Imports parse lines lazily and hand them to the
+store's ``import_*`` method, which indexes the whole load at once.
+
+    SNAKE_STORAGE=sqlite uv run python -m app.bulk export scores -o scores.ndjson.gz
+    SNAKE_STORAGE=sqlite uv run python -m app.bulk import scores scores.ndjson.gz
+
+The command line needs the SQLite backend: the in-memory store lives in the
+server's process, so a new one here would only hold seed data.
+"""
+import argparse
+import gc
+import gzip
+import sys
+import time
+import zlib
+from itertools import islice
+from typing import BinaryIO, Iterable, Iterator, List
+
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, TypeAdapter
+
+from .models import GameSessionDetails, LeaderboardEntry
+from .storage import Storage
+
+KINDS = {
+    "scores": (LeaderboardEntry, "iter_scores", "import_scores"),
+    "sessions": (GameSessionDetails, "iter_sessions", "import_sessions"),
+}
+GZIP_MAGIC = b"\x1f\x8b"
+_adapters = {kind: TypeAdapter(List[model]) for kind, (model, _, _) in KINDS.items()}
+
+
+def export_chunks(storage: Storage, kind: str, batch_size: int = 1000) -> Iterator[bytes]:
+    """NDJSON for every record of ``kind``, one chunk per ``batch_size`` records."""
+    _, iter_name, _ = KINDS[kind]
+    # Ranks are positions, not data; the importing store derives its own
+    exclude = {"rank"} if kind == "scores" else None
+    lines = []
+    for record in getattr(storage, iter_name)(batch_size):
+        lines.append(record.model_dump_json(exclude=exclude))
+        if len(lines) == batch_size:
+            yield ("\n".join(lines) + "\n").encode()
+            lines = []
+    if lines:
+        yield ("\n".join(lines) + "\n").encode()
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Compress a chunk stream into one gzip member as it goes."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_response(storage: Storage, kind: str, compress: bool = False) -> StreamingResponse:
+    chunks = export_chunks(storage, kind)
+    filename = f"{kind}.ndjson"
+    if compress:
+        chunks, filename = gzip_chunks(chunks), f"{filename}.gz"
+    # Starlette runs a plain iterator in its thread pool, so every batch read
+    # and its encoding stay off the event loop; writes land between batches
+    return StreamingResponse(
+        chunks,
+        media_type="application/gzip" if compress else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+def parse_lines(kind: str, lines: Iterable[bytes], batch_size: int = 1000) -> Iterator[BaseModel]:
+    adapter = _adapters[kind]
+    lines = iter(lines)
+    # One validator call per batch, as a JSON array, instead of one per line
+    while batch := [line for line in islice(lines, batch_size) if line.strip()]:
+        yield from adapter.validate_json(b"[" + b",".join(batch) + b"]")
+
+
+def open_export(path: str) -> BinaryIO:
+    """Open an NDJSON file for reading, gzipped or not ("-" is stdin)."""
+    stream = sys.stdin.buffer if path == "-" else open(path, "rb")
+    if stream.peek(2)[:2] == GZIP_MAGIC:
+        return gzip.GzipFile(fileobj=stream)
+    return stream
+
+
+def import_stream(storage: Storage, kind: str, stream: BinaryIO) -> int:
+    _, _, import_name = KINDS[kind]
+    # Every parsed record stays alive, so the collector's passes over the
+    # growing heap would find nothing to free; pause it for the load
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return getattr(storage, import_name)(parse_lines(kind, stream))
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export", help="write every record as NDJSON")
+    export.add_argument("kind", choices=KINDS)
+    export.add_argument("-o", "--output", default="-", help="file to write; gzipped if it ends in .gz")
+    export.add_argument("--gzip", action="store_true", help="gzip the output regardless of its name")
+    export.add_argument("--batch-size", type=int, default=1000)
+    load = commands.add_parser("import", help="bulk-load an NDJSON export (plain or gzipped)")
+    load.add_argument("kind", choices=KINDS)
+    load.add_argument("input", nargs="?", default="-")
+    args = parser.parse_args()
+
+    from . import config
+    if config.STORAGE_BACKEND != "sqlite":
+        parser.error(
+            f"SNAKE_STORAGE is {config.STORAGE_BACKEND!r}; the in-memory store belongs to the server's process, "
+            "so set SNAKE_STORAGE=sqlite or use GET /leaderboard/export and GET /sessions/export"
+        )
+
+    from .db import db
+
+    start = time.perf_counter()
+    if args.command == "export":
+        rows = 0
+
+        def counted(chunks):
+            nonlocal rows
+            for chunk in chunks:
+                rows += chunk.count(b"\n")  # JSON escapes newlines inside values
+                yield chunk
+
+        chunks = counted(export_chunks(db, args.kind, args.batch_size))
+        if args.gzip or args.output.endswith(".gz"):
+            chunks = gzip_chunks(chunks)
+        out = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+        with out:
+            for chunk in chunks:
+                out.write(chunk)
+        verb = "exported"
+    else:
+        with open_export(args.input) as stream:
+            rows = import_stream(db, args.kind, stream)
+        verb = "imported"
+    elapsed = time.perf_counter() - start
+    print(f"{verb} {rows} {args.kind} in {elapsed:.2f}s ({rows / max(elapsed, 1e-9):.0f} rows/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import os
+
+# Storage backend: "memory" (MockDB, per-process) or "sqlite" (persistent, shared between workers)
+STORAGE_BACKEND = os.getenv("SNAKE_STORAGE", "memory")
+SQLITE_PATH = os.getenv("SNAKE_SQLITE_PATH", "neon_snake.db")
+SQLITE_POOL_SIZE = int(os.getenv("SNAKE_SQLITE_POOL_SIZE", "8"))
+# Demo users, scores and a session written when the store is first created empty
+SEED_DATA = os.getenv("SNAKE_SEED_DATA", "1") == "1"
+
+# Password hashing pool: "thread" or "process" executor; 0 workers hashes inline on the event loop
+HASH_EXECUTOR = os.getenv("SNAKE_HASH_EXECUTOR", "thread")
+HASH_WORKERS = int(os.getenv("SNAKE_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Hash jobs allowed to wait or run at once before signup/login answer 429
+HASH_MAX_PENDING = int(os.getenv("SNAKE_HASH_MAX_PENDING", "64"))
+
+# Emails of the users allowed to download the HTTP exports of every score and session;
+# empty (the default) refuses them to everyone and leaves exports to ``python -m app.bulk``
+ADMIN_EMAILS = frozenset(
+    email.strip().casefold() for email in os.getenv("SNAKE_ADMIN_EMAILS", "").split(",") if email.strip()
+)
+
+# Verified bearer tokens kept in memory by get_current_user; 0 disables the cache
+TOKEN_CACHE_SIZE = int(os.getenv("SNAKE_TOKEN_CACHE_SIZE", "10000"))
+
+# Rendered GET /leaderboard pages kept in memory until the next score; 0 disables the cache
+LEADERBOARD_CACHE_SIZE = int(os.getenv("SNAKE_LEADERBOARD_CACHE_SIZE", "256"))
+
+# Top-k leaderboard snapshots rebuilt in the background: entries kept per mode (0 disables them),
+# seconds without new scores before a rebuild, and the most seconds a served snapshot may lag
+# behind the newest score (0 serves snapshots only while nothing has changed since they were built)
+LEADERBOARD_SNAPSHOT_SIZE = int(os.getenv("SNAKE_LEADERBOARD_SNAPSHOT_SIZE", "100"))
+LEADERBOARD_SNAPSHOT_DEBOUNCE = float(os.getenv("SNAKE_LEADERBOARD_SNAPSHOT_DEBOUNCE", "0.05"))
+LEADERBOARD_SNAPSHOT_MAX_STALENESS = float(os.getenv("SNAKE_LEADERBOARD_SNAPSHOT_MAX_STALENESS", "1.0"))
+
+# Token-bucket limits per user and route: requests per second on average (0 disables the limit)
+# and the burst allowed on top. Session updates cover PATCH /update and /delta.
+RATE_LIMIT_SESSION_UPDATES = float(os.getenv("SNAKE_RATE_LIMIT_SESSION_UPDATES", "30"))
+RATE_LIMIT_SESSION_UPDATES_BURST = float(os.getenv("SNAKE_RATE_LIMIT_SESSION_UPDATES_BURST", "60"))
+RATE_LIMIT_SUBMITS = float(os.getenv("SNAKE_RATE_LIMIT_SUBMITS", "1"))
+RATE_LIMIT_SUBMITS_BURST = float(os.getenv("SNAKE_RATE_LIMIT_SUBMITS_BURST", "10"))
+# Where the buckets live: "memory" (per worker) or "sqlite" (shared through SNAKE_SQLITE_PATH)
+RATE_LIMIT_BACKEND = os.getenv("SNAKE_RATE_LIMIT_BACKEND", "memory")
+
+# Frames buffered per live-spectate subscriber before the oldest ones are dropped
+SPECTATE_BUFFER_SIZE = int(os.getenv("SNAKE_SPECTATE_BUFFER_SIZE", "8"))
+
+# Ended sessions the in-memory backend keeps for GET /sessions/{id}; 0 keeps all of them
+SESSION_ARCHIVE_SIZE = int(os.getenv("SNAKE_SESSION_ARCHIVE_SIZE", "10000"))
+
+# Server-authoritative games: seconds between engine steps and the initial number of engine slots
+SIMULATION_INTERVAL = float(os.getenv("SNAKE_SIMULATION_INTERVAL", "0.01"))
+SIMULATION_CAPACITY = int(os.getenv("SNAKE_SIMULATION_CAPACITY", "1024"))
+# Seconds a server-authoritative game may go without input before the server ends it; 0 never ends it
+SIMULATION_IDLE_TIMEOUT = float(os.getenv("SNAKE_SIMULATION_IDLE_TIMEOUT", "60"))
+# A game lives in the worker that started it; other workers answer its requests with 409. With
+# several workers (WEB_CONCURRENCY) they are refused unless set to 1, for deployments that route
+# each session's requests to one worker
+AUTHORITATIVE_SESSIONS = os.getenv(
+    "SNAKE_AUTHORITATIVE_SESSIONS", "1" if int(os.getenv("WEB_CONCURRENCY", "1")) <= 1 else "0"
+) == "1"
+
+# Replay verification of session-backed scores: worker processes (0 replays
+# inline on the event loop) and the most logs replayed together in one batch
+VERIFY_WORKERS = int(os.getenv("SNAKE_VERIFY_WORKERS", str(min(4, os.cpu_count() or 1))))
+VERIFY_BATCH_SIZE = int(os.getenv("SNAKE_VERIFY_BATCH_SIZE", "256"))
+# Reject POST /leaderboard/submit without a sessionId
+REQUIRE_REPLAY = os.getenv("SNAKE_REQUIRE_REPLAY", "0") == "1"
+
+# Seconds between flushes of buffered session updates; 0 (the default) writes every update through.
+# The buffer is per worker: only enable it when each session's requests reach a single worker,
+# or a flush from one worker can write a stale copy over a session another one has ended.
+SESSION_FLUSH_INTERVAL = float(os.getenv("SNAKE_SESSION_FLUSH_INTERVAL", "0"))
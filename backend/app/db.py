@@ -1,133 +1,295 @@
-from typing import Dict, List, Optional
+import functools
+import threading
+from collections import OrderedDict
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Set
 from datetime import datetime, timezone
 from .models import User, LeaderboardEntry, GameSessionDetails
+from .ranking import LeaderboardStore
+from .storage import AsyncStorage, LazyStorage, Storage, DuplicateUserError, normalize_email
+from . import config
 
-class MockDB:
-    def __init__(self):
+def _locked(collection: str):
+    """Run the method holding the lock of one collection."""
+    def decorate(method):
+        @functools.wraps(method)
+        def locked(self, *args, **kwargs):
+            with self._locks[collection]:
+                return method(self, *args, **kwargs)
+        return locked
+    return decorate
+
+class MockDB(Storage):
+    """In-memory backend for a single process.
+
+    Users, scores and sessions (with their replays) each have their own
+    lock, so the store can be shared with threads: writers to one
+    collection never wait on another. Lookups by key are single dict reads
+    and take no lock; anything that iterates or reorders a collection
+    (leaderboard pages, the active feed) holds that collection's lock.
+    """
+
+    def __init__(self, seed: bool = True):
+        self._locks = {name: threading.RLock() for name in ("users", "scores", "sessions")}
         self.users: Dict[str, User] = {}
         self.leaderboard: List[LeaderboardEntry] = []
         self.sessions: Dict[str, GameSessionDetails] = {}
-        self._seed_data()
-
-    def _seed_data(self):
-        # Fake data
-        from uuid import uuid4
-        from datetime import datetime, timezone, timedelta
-        
-        # Common hash for 'password123'
-        pwd_hash = "$2b$12$tRNTpmIt9Qq5wghU0uyN0OIe3DcWnrom2JeCjMkYo735LK54RLgMe"
-        
-        # 1. Users
-        users_data = [
-            ("SnakeMaster", "snakemaster@example.com"),
-            ("NeonSlayer", "neon@example.com"),
-            ("ProGamer", "hacker@example.com")
-        ]
-        
-        created_users = []
-        for username, email in users_data:
-            u_id = uuid4()
-            user = User(
-                id=u_id,
-                username=username,
-                email=email,
-                createdAt=datetime.now(timezone.utc),
-                hashed_password=pwd_hash
-            )
-            self.users[str(u_id)] = user
-            created_users.append(user)
-            
-        # 2. Leaderboard
-        # SnakeMaster is good at walls
-        self.add_score(LeaderboardEntry(
-            id=uuid4(), userId=created_users[0].id, username=created_users[0].username,
-            score=5000, mode="walls", duration=300, timestamp=datetime.now(timezone.utc) - timedelta(days=1)
-        ))
-        
-        # NeonSlayer is good at passthrough
-        self.add_score(LeaderboardEntry(
-            id=uuid4(), userId=created_users[1].id, username=created_users[1].username,
-            score=4500, mode="passthrough", duration=250, timestamp=datetime.now(timezone.utc) - timedelta(hours=2)
-        ))
-        
-        # ProGamer is okay
-        self.add_score(LeaderboardEntry(
-            id=uuid4(), userId=created_users[2].id, username=created_users[2].username,
-            score=3000, mode="walls", duration=180, timestamp=datetime.now(timezone.utc) - timedelta(days=2)
-        ))
-        
-        # 3. Active Session for NeonSlayer
-        s_id = uuid4()
-        session = GameSessionDetails(
-            id=s_id,
-            userId=created_users[1].id,
-            username=created_users[1].username,
-            score=1200,
-            isActive=True,
-            mode="walls",
-            startedAt=datetime.now(timezone.utc) - timedelta(minutes=5),
-            currentScore=1200,
-            gameState={"direction": "UP", "snake": [{"x": 10, "y": 10}], "food": {"x": 5, "y": 5}}
-        )
-        self.create_session(session)
+        if seed:
+            self._seed_data()
+
+    def reset(self):
+        self.users = {}
+        self.leaderboard = []
+        self.sessions = {}
+
+    @property
+    def users(self) -> Dict[str, User]:
+        return self._users
+
+    @users.setter
+    @_locked("users")
+    def users(self, users: Dict[str, User]):
+        # Assigning a dict (e.g. to reset the DB) rebuilds the secondary indexes
+        self._users: Dict[str, User] = {}
+        self._users_by_email: Dict[str, User] = {}
+        self._users_by_username: Dict[str, User] = {}
+        for user in users.values():
+            self.create_user(user)
+        self._user_changed(None)
+
+    @property
+    def leaderboard(self) -> LeaderboardStore:
+        return self._leaderboard
+
+    @leaderboard.setter
+    @_locked("scores")
+    def leaderboard(self, entries: Iterable[LeaderboardEntry]):
+        # Assigning a plain list (e.g. to reset the DB) rebuilds the index
+        self._leaderboard = LeaderboardStore(entries)
+        self._scores_changed(None)
+
+    @property
+    @_locked("sessions")
+    def sessions(self) -> Dict[str, GameSessionDetails]:
+        # Active sessions, then the archive, each least to most recently updated
+        return {**self._active_sessions, **self.archived_sessions}
+
+    @sessions.setter
+    @_locked("sessions")
+    def sessions(self, sessions: Dict[str, GameSessionDetails]):
+        # Assigning a dict (e.g. to reset the DB) rebuilds the active index and archive
+        self._active_sessions: "OrderedDict[str, GameSessionDetails]" = OrderedDict()
+        self.archived_sessions: "OrderedDict[str, GameSessionDetails]" = OrderedDict()
+        self.replays: Dict[str, bytearray] = {}
+        self._claimed_replays: Set[str] = set()
+        for session in sorted(sessions.values(), key=lambda x: x.lastUpdatedAt or x.startedAt):
+            self.create_session(session)
 
     def get_user_by_email(self, email: str) -> Optional[User]:
-        for user in self.users.values():
-            if user.email == email:
-                return user
-        return None
+        return self._users_by_email.get(normalize_email(email))
 
     def get_user_by_username(self, username: str) -> Optional[User]:
-        for user in self.users.values():
-            if user.username == username:
-                return user
-        return None
+        return self._users_by_username.get(username)
+
+    def get_user(self, user_id: str) -> Optional[User]:
+        return self._users.get(user_id)
+
+    def _check_unique(self, user: User, ignore: Optional[User] = None):
+        existing = self._users_by_email.get(normalize_email(user.email))
+        if existing is not None and existing is not ignore:
+            raise DuplicateUserError("email")
+        existing = self._users_by_username.get(user.username)
+        if existing is not None and existing is not ignore:
+            raise DuplicateUserError("username")
+
+    def _index_user(self, user: User):
+        self._users[str(user.id)] = user
+        self._users_by_email[normalize_email(user.email)] = user
+        self._users_by_username[user.username] = user
+
+    def _unindex_user(self, user: User):
+        del self._users[str(user.id)]
+        del self._users_by_email[normalize_email(user.email)]
+        del self._users_by_username[user.username]
 
+    @_locked("users")
     def create_user(self, user: User) -> User:
-        self.users[str(user.id)] = user
+        # Uniqueness is enforced here, so a signup that raced past the
+        # router's pre-checks still can't create a duplicate
+        self._check_unique(user)
+        self._index_user(user)
         return user
 
+    @_locked("users")
+    def update_user(self, user_id: str, updates: dict) -> Optional[User]:
+        user = self._users.get(user_id)
+        if user is None:
+            return None
+        updated = user.model_copy(update=updates)
+        self._check_unique(updated, ignore=user)
+        # Index the new version before dropping stale keys, so lock-free
+        # lookups always find the user under one version or the other
+        self._index_user(updated)
+        if normalize_email(user.email) != normalize_email(updated.email):
+            del self._users_by_email[normalize_email(user.email)]
+        if user.username != updated.username:
+            del self._users_by_username[user.username]
+        self._user_changed(user)
+        return updated
+
+    @_locked("users")
+    def delete_user(self, user_id: str) -> Optional[User]:
+        user = self._users.get(user_id)
+        if user is not None:
+            self._unindex_user(user)
+            self._user_changed(user)
+        return user
+
+    @_locked("scores")
     def add_score(self, entry: LeaderboardEntry) -> LeaderboardEntry:
-        self.leaderboard.append(entry)
-        # Sort leaderboard by score descending
-        self.leaderboard.sort(key=lambda x: x.score, reverse=True)
-        # Update ranks
-        for i, item in enumerate(self.leaderboard):
-            item.rank = i + 1
-        return entry
-
-    def get_leaderboard(self, mode: Optional[str] = None, limit: int = 100, offset: int = 0) -> List[LeaderboardEntry]:
-        filtered = self.leaderboard
-        if mode:
-            filtered = [entry for entry in filtered if entry.mode == mode]
-        return filtered[offset : offset + limit]
+        # Returns a copy of the entry with its rank at insertion time
+        ranked = self.leaderboard.add(entry)
+        self._scores_changed(ranked)
+        return ranked
+
+    @_locked("scores")
+    def get_leaderboard(
+        self, mode: Optional[str] = None, limit: int = 100, offset: int = 0, window: Optional[str] = None
+    ) -> List[LeaderboardEntry]:
+        return self.leaderboard.page(mode=mode, limit=limit, offset=offset, window=window)
     
-    def get_total_scores(self, mode: Optional[str] = None) -> int:
-        if mode:
-            return len([entry for entry in self.leaderboard if entry.mode == mode])
-        return len(self.leaderboard)
+    @_locked("scores")
+    def get_total_scores(self, mode: Optional[str] = None, window: Optional[str] = None) -> int:
+        return self.leaderboard.count(mode=mode, window=window)
 
+    @_locked("scores")
+    def get_best_scores(self, mode: Optional[str] = None, limit: int = 100, offset: int = 0) -> List[LeaderboardEntry]:
+        return self.leaderboard.best_page(mode=mode, limit=limit, offset=offset)
+
+    @_locked("scores")
+    def get_total_players(self, mode: Optional[str] = None) -> int:
+        return self.leaderboard.player_count(mode=mode)
+
+    @_locked("scores")
+    def get_personal_best(self, user_id: str, mode: Optional[str] = None) -> Optional[LeaderboardEntry]:
+        return self.leaderboard.personal_best(user_id, mode=mode)
+
+    def iter_scores(self, batch_size: int = 1000) -> Iterator[LeaderboardEntry]:
+        batches = self.leaderboard.scan(batch_size)
+        while True:
+            # Locked per batch, so writers get in between batches
+            with self._locks["scores"]:
+                batch = next(batches, None)
+            if batch is None:
+                return
+            yield from batch
+
+    @_locked("scores")
+    def import_scores(self, entries: Iterable[LeaderboardEntry]) -> int:
+        added = self.leaderboard.extend(entries)
+        if added:
+            self._scores_changed(None)
+        return added
+
+    def _track_session(self, session_id: str, session: GameSessionDetails):
+        # Active sessions live in an OrderedDict kept in recency order: creates
+        # and updates stamp "now", so moving the session to the end keeps the
+        # order without sorting. Ended sessions move to a bounded archive.
+        # A session moving between the two is added before it is removed, so
+        # get_session (which takes no lock) always finds it in one of them
+        if session.isActive:
+            self._active_sessions[session_id] = session
+            self._active_sessions.move_to_end(session_id)
+            self.archived_sessions.pop(session_id, None)
+            return
+        self.archived_sessions[session_id] = session
+        self.archived_sessions.move_to_end(session_id)
+        self._active_sessions.pop(session_id, None)
+        while len(self.archived_sessions) > config.SESSION_ARCHIVE_SIZE > 0:
+            evicted, _ = self.archived_sessions.popitem(last=False)
+            self.replays.pop(evicted, None)
+            self._claimed_replays.discard(evicted)
+
+    @_locked("sessions")
     def create_session(self, session: GameSessionDetails) -> GameSessionDetails:
-        self.sessions[str(session.id)] = session
+        self._track_session(str(session.id), session)
         return session
 
     def get_session(self, session_id: str) -> Optional[GameSessionDetails]:
-        return self.sessions.get(session_id)
+        session = self._active_sessions.get(session_id)
+        if session is None:
+            session = self.archived_sessions.get(session_id)
+        return session
 
+    @_locked("sessions")
     def get_active_sessions(self, limit: int = 10) -> List[GameSessionDetails]:
-        active = [s for s in self.sessions.values() if s.isActive]
-        # Sort by most recently updated or created
-        active.sort(key=lambda x: x.lastUpdatedAt or x.startedAt, reverse=True)
-        return active[:limit]
+        # Most recently updated or created first, without touching the archive
+        return list(islice(reversed(self._active_sessions.values()), limit))
 
+    @_locked("sessions")
     def update_session(self, session_id: str, updates: dict) -> Optional[GameSessionDetails]:
-        if session_id in self.sessions:
-            session = self.sessions[session_id]
-            for key, value in updates.items():
-                if hasattr(session, key):
-                    setattr(session, key, value)
-            session.lastUpdatedAt = datetime.now(timezone.utc)
-            return session
-        return None
-
-db = MockDB()
+        session = self.get_session(session_id)
+        if session is None:
+            return None
+        for key, value in updates.items():
+            if hasattr(session, key):
+                setattr(session, key, value)
+        session.lastUpdatedAt = datetime.now(timezone.utc)
+        self._track_session(session_id, session)
+        return session
+
+    def iter_sessions(self, batch_size: int = 1000) -> Iterator[GameSessionDetails]:
+        # Only the ids are copied up front (the archive is bounded), so the
+        # dicts can change while the sessions stream out
+        with self._locks["sessions"]:
+            session_ids = [*self._active_sessions, *self.archived_sessions]
+        for session_id in session_ids:
+            session = self.get_session(session_id)
+            if session is not None:
+                yield session
+
+    @_locked("sessions")
+    def import_sessions(self, sessions: Iterable[GameSessionDetails]) -> int:
+        imported = 0
+        for session in sessions:
+            self._track_session(str(session.id), session)
+            imported += 1
+        return imported
+
+    @_locked("sessions")
+    def append_replay(self, session_id: str, data: bytes):
+        self.replays.setdefault(session_id, bytearray()).extend(data)
+
+    @_locked("sessions")
+    def get_replay(self, session_id: str, unclaimed: bool = False) -> Optional[bytes]:
+        replay = self.replays.get(session_id)
+        if replay is None or (unclaimed and session_id in self._claimed_replays):
+            return None
+        return bytes(replay)
+
+    @_locked("sessions")
+    def claim_replay(self, session_id: str) -> Optional[bytes]:
+        if session_id in self._claimed_replays or session_id not in self.replays:
+            return None
+        self._claimed_replays.add(session_id)
+        return bytes(self.replays[session_id])
+
+def create_storage() -> Storage:
+    if config.STORAGE_BACKEND == "sqlite":
+        from .sqlite_db import SQLiteDB
+        return SQLiteDB(config.SQLITE_PATH, pool_size=config.SQLITE_POOL_SIZE, seed=config.SEED_DATA)
+    if config.STORAGE_BACKEND != "memory":
+        raise ValueError(f"Unknown storage backend: {config.STORAGE_BACKEND!r}")
+    return MockDB(seed=config.SEED_DATA)
+
+# Created by the app's lifespan, or by whatever uses it first
+db = LazyStorage(create_storage)
+async_db = AsyncStorage(db, workers=config.SQLITE_POOL_SIZE)
+
+async def sync_shared_state():
+    """Route dependency: catch up on user changes, scores and logouts made by other workers.
+
+    Only routes that read what those invalidate depend on it: every
+    authenticated route (through the token cache) and the leaderboard.
+    """
+    await async_db.sync()
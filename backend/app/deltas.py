@@ -0,0 +1,50 @@
+from typing import Optional
+
+from .models import GameState, SessionDelta
+
+
+class SnapshotRequired(Exception):
+    """The delta can't be applied; the client must resend a full game state."""
+
+    def __init__(self, expected_seq: int, reason: str):
+        super().__init__(reason)
+        self.expected_seq = expected_seq
+        self.reason = reason
+
+
+def check_sequence(current_seq: int, delta: SessionDelta) -> bool:
+    """Return False for a duplicate or stale delta, raise on a gap."""
+    if delta.seq <= current_seq:
+        return False
+    if delta.seq != current_seq + 1:
+        raise SnapshotRequired(current_seq + 1, f"Sequence gap: expected {current_seq + 1}, got {delta.seq}")
+    return True
+
+
+def apply_delta(state: Optional[GameState], delta: SessionDelta, current_seq: int) -> GameState:
+    """Return ``state`` advanced by one tick described by ``delta``.
+
+    ``state`` is left untouched, since it may be the stored session's. The
+    copy is one slice of the packed body; moving the snake is then a head
+    push plus, unless it grew, a tail pop.
+    """
+    if delta.head is not None and (state is None or not state.snake):
+        raise SnapshotRequired(current_seq + 1, "No snake to move, send a full snapshot")
+
+    if state is None:
+        new_state = GameState()
+    else:
+        # The other fields are only ever replaced, never changed in place
+        snake = state.snake.copy() if state.snake is not None else None
+        new_state = state.model_copy(update={"snake": snake})
+    if delta.head is not None:
+        new_state.snake.push_head(delta.head.x, delta.head.y)
+        if not delta.grew:
+            new_state.snake.pop_tail()
+    if delta.food is not None:
+        new_state.food = delta.food.model_dump()
+    if delta.direction is not None:
+        new_state.direction = delta.direction
+    if delta.gameOver is not None:
+        new_state.gameOver = delta.gameOver
+    return new_state
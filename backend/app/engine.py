@@ -0,0 +1,223 @@
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# The rules live in a NumPy-free module; they are re-exported for the engine's users
+from .rules import CELLS, DIRECTION_CODES, DIRECTIONS, FOOD_SCORE, GRID_SIZE, INITIAL_SPEED, MIN_SPEED, MODES
+
+_DX = np.array([0, 0, -1, 1], dtype=np.int16)
+_DY = np.array([-1, 1, 0, 0], dtype=np.int16)
+_OPPOSITE = np.array([1, 0, 3, 2], dtype=np.int8)
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_MIX1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX2 = np.uint64(0x94D049BB133111EB)
+
+
+def food_cells(seeds: np.ndarray, draws: np.ndarray) -> np.ndarray:
+    """The ``draws``-th random cell of each game: splitmix64 over its seed.
+
+    Food depends only on the game's seed and how many cells it has drawn,
+    so a replay of the same inputs places the same food.
+    """
+    z = seeds.astype(np.uint64) + (draws.astype(np.uint64) + np.uint64(1)) * _GOLDEN
+    z = (z ^ (z >> np.uint64(30))) * _MIX1
+    z = (z ^ (z >> np.uint64(27))) * _MIX2
+    z = z ^ (z >> np.uint64(31))
+    return (z % np.uint64(CELLS)).astype(np.int16)
+
+
+class SnakeEngine:
+    """Server-side Snake for many games at once.
+
+    Every game is a slot in a set of NumPy arrays: bodies are ring buffers
+    of cell indexes (``y * GRID_SIZE + x``) with an occupancy grid next to
+    them, so one ``tick`` moves every due game, checks walls, self
+    collision and food, and grows or shrinks the snakes with a handful of
+    vectorized operations instead of a Python loop per game.
+
+    A game advances when its own interval has elapsed, which speeds up with
+    the score exactly like the frontend's ``setInterval``. Inputs are only
+    directions; like ``nextDirectionRef`` in the frontend, the last one sticks
+    and a reversal is ignored. Food comes from the game's own seed (see
+    ``food_cells``), so a game is fully determined by its mode, seed and the
+    move count at which each input arrived.
+    """
+
+    def __init__(self, capacity: int = 1024, seed: Optional[int] = None):
+        self._rng = np.random.default_rng(seed)
+        self._free: List[int] = []
+        self._size = 0
+        self._allocate(capacity)
+
+    def _allocate(self, capacity: int):
+        def grow(name, shape, dtype):
+            array = np.zeros(shape, dtype=dtype)
+            old = getattr(self, name, None)
+            if old is not None:
+                array[: len(old)] = old
+            setattr(self, name, array)
+
+        grow("_live", capacity, np.bool_)
+        grow("_walls", capacity, np.bool_)
+        grow("_over", capacity, np.bool_)
+        grow("_direction", capacity, np.int8)
+        grow("_next_direction", capacity, np.int8)
+        grow("_body", (capacity, CELLS), np.int16)
+        grow("_occupied", (capacity, CELLS), np.bool_)
+        grow("_head", capacity, np.int16)
+        grow("_length", capacity, np.int16)
+        grow("_food", capacity, np.int16)
+        grow("_score", capacity, np.int32)
+        grow("_due", capacity, np.float64)
+        grow("_seed", capacity, np.uint64)
+        grow("_draws", capacity, np.uint32)
+        grow("_moves", capacity, np.uint32)
+        self.capacity = capacity
+
+    def __len__(self) -> int:
+        return self._size - len(self._free)
+
+    def spawn(self, mode: str = "walls", now: float = 0.0, seed: Optional[int] = None) -> int:
+        """Start a game in createInitialState's position; returns its slot.
+
+        ``seed`` (0 to 2**32 - 1) fixes the food sequence; without it one is
+        drawn from the engine's generator.
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown game mode: {mode!r}")
+        if self._free:
+            slot = self._free.pop()
+        else:
+            if self._size == self.capacity:
+                self._allocate(self.capacity * 2)
+            slot = self._size
+            self._size += 1
+
+        center = GRID_SIZE // 2
+        cells = [center * GRID_SIZE + center - i for i in (2, 1, 0)]  # tail first
+        self._body[slot, :3] = cells
+        self._occupied[slot] = False
+        self._occupied[slot, cells] = True
+        self._head[slot] = 2
+        self._length[slot] = 3
+        self._live[slot] = True
+        self._walls[slot] = mode == "walls"
+        self._over[slot] = False
+        self._direction[slot] = self._next_direction[slot] = DIRECTION_CODES["RIGHT"]
+        self._score[slot] = 0
+        self._due[slot] = now + INITIAL_SPEED
+        self._moves[slot] = 0
+        self._seed[slot] = self._rng.integers(0, 2**32) if seed is None else seed
+        self._draws[slot] = 0
+        # The frontend only keeps food off the initial head cell
+        slots = np.array([slot])
+        while True:
+            self._food[slot] = food_cells(self._seed[slots], self._draws[slots])[0]
+            self._draws[slot] += 1
+            if self._food[slot] != cells[-1]:
+                return slot
+
+    def remove(self, slot: int):
+        if self._live[slot]:
+            self._live[slot] = False
+            self._free.append(slot)
+
+    def steer(self, slot: int, direction: str):
+        self._next_direction[slot] = DIRECTION_CODES[direction]
+
+    def steer_many(self, slots: np.ndarray, codes: np.ndarray):
+        """``steer`` for many slots at once; for a repeated slot the last code wins."""
+        last = len(slots) - 1 - np.unique(slots[::-1], return_index=True)[1]
+        self._next_direction[slots[last]] = codes[last]
+
+    def tick(self, now: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Advance every game whose interval has elapsed by ``now`` (in ms).
+
+        Returns the slots that moved and the slots whose game just ended.
+        """
+        n = self._size
+        due = np.flatnonzero(self._live[:n] & ~self._over[:n] & (self._due[:n] <= now))
+        if not len(due):
+            return due, due
+
+        current = self._direction[due]
+        wanted = self._next_direction[due]
+        direction = np.where(wanted == _OPPOSITE[current], current, wanted)
+
+        head = self._body[due, self._head[due]]
+        x = head % GRID_SIZE + _DX[direction]
+        y = head // GRID_SIZE + _DY[direction]
+        outside = (x < 0) | (x >= GRID_SIZE) | (y < 0) | (y >= GRID_SIZE)
+        # Passthrough wraps around; in walls mode leaving the grid ends the game
+        cell = (y % GRID_SIZE) * GRID_SIZE + x % GRID_SIZE
+        # The body check includes the current tail cell, as checkSelfCollision does
+        crashed = (outside & self._walls[due]) | self._occupied[due, cell]
+
+        ended = due[crashed]
+        self._over[ended] = True
+        moved = due[~crashed]
+        cell = cell[~crashed]
+        self._direction[moved] = direction[~crashed]
+        self._moves[moved] += 1
+
+        head = (self._head[moved] + 1) % CELLS
+        self._head[moved] = head
+        self._body[moved, head] = cell
+        self._occupied[moved, cell] = True
+
+        ate = cell == self._food[moved]
+        starving = moved[~ate]
+        tail = (self._head[starving] - self._length[starving]) % CELLS
+        self._occupied[starving, self._body[starving, tail]] = False
+
+        eaters = moved[ate]
+        if len(eaters):
+            self._length[eaters] += 1
+            self._score[eaters] += FOOD_SCORE
+            self._place_food(eaters)
+
+        speed = np.maximum(MIN_SPEED, INITIAL_SPEED - (self._score[moved] // 50) * 10)
+        self._due[moved] = now + speed
+        return moved, ended
+
+    def _place_food(self, slots: np.ndarray):
+        # Retry random cells until each lands off its snake (generateFood);
+        # a snake that fills the whole grid keeps its old food.
+        pending = slots[self._length[slots] < CELLS]
+        while len(pending):
+            food = food_cells(self._seed[pending], self._draws[pending])
+            self._draws[pending] += 1
+            taken = self._occupied[pending, food]
+            self._food[pending[~taken]] = food[~taken]
+            pending = pending[taken]
+
+    def score(self, slot: int) -> int:
+        return int(self._score[slot])
+
+    def moves(self, slot: int) -> int:
+        """Moves the game has made; inputs are recorded against this count."""
+        return int(self._moves[slot])
+
+    def seed(self, slot: int) -> int:
+        return int(self._seed[slot])
+
+    def game_over(self, slot: int) -> bool:
+        return bool(self._over[slot])
+
+    def running(self) -> int:
+        """Games that are neither removed nor over."""
+        n = self._size
+        return int(np.count_nonzero(self._live[:n] & ~self._over[:n]))
+
+    def state(self, slot: int) -> Dict:
+        """The game as the frontend's GameState, snake head first."""
+        length = int(self._length[slot])
+        positions = (self._head[slot] - np.arange(length)) % CELLS
+        cells = self._body[slot, positions].tolist()
+        food = int(self._food[slot])
+        return {
+            "direction": DIRECTIONS[self._direction[slot]],
+            "snake": [{"x": cell % GRID_SIZE, "y": cell // GRID_SIZE} for cell in cells],
+            "food": {"x": food % GRID_SIZE, "y": food // GRID_SIZE},
+            "gameOver": bool(self._over[slot]),
+        }
@@ -0,0 +1,95 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Optional
+
+from . import config, metrics
+
+queue_depth = metrics.gauge("password_hash_queue_depth", "Password hash jobs waiting or running")
+hash_latency = metrics.histogram("password_hash_seconds", "Time spent in bcrypt per hash or verify")
+rejected = metrics.counter("password_hash_rejected_total", "Hash jobs rejected because the pool was saturated")
+
+
+# bcrypt is imported by the first hash, in whichever worker runs it
+def verify_password(plain_password, hashed_password):
+    import bcrypt
+    if not isinstance(hashed_password, bytes):
+        hashed_password = hashed_password.encode('utf-8')
+    return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password)
+
+def get_password_hash(password):
+    import bcrypt
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+
+
+def _timed(fn, *args):
+    # Runs in the worker, so waiting for a free one isn't counted as bcrypt time
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+class HasherSaturated(Exception):
+    """Raised when the hash queue is full and the job was not accepted."""
+
+
+class PasswordHasher:
+    """Runs bcrypt off the event loop on a bounded worker pool.
+
+    bcrypt releases the GIL, so a thread pool is enough to keep the loop
+    responsive; a process pool can be selected instead. At most
+    ``max_pending`` jobs are queued or running at once and further jobs are
+    rejected immediately instead of piling up. ``workers=0`` runs bcrypt
+    inline on the event loop. The pool is started by the first job.
+    """
+
+    def __init__(self, workers: int, max_pending: int, kind: str = "thread"):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.kind = kind
+        self.pending = 0
+        self._executor: Optional[Executor] = None
+
+    def _pool(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                from concurrent.futures import ProcessPoolExecutor
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    async def _run(self, fn, *args):
+        if self.pending >= self.max_pending:
+            rejected.inc()
+            raise HasherSaturated()
+        self.pending += 1
+        queue_depth.set(self.pending)
+        try:
+            if self.workers <= 0:
+                result, seconds = _timed(fn, *args)
+            else:
+                loop = asyncio.get_running_loop()
+                result, seconds = await loop.run_in_executor(self._pool(), _timed, fn, *args)
+            hash_latency.observe(seconds)
+            return result
+        finally:
+            self.pending -= 1
+            queue_depth.set(self.pending)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    def shutdown(self):
+        # The next job starts a new pool
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+hasher = PasswordHasher(
+    workers=config.HASH_WORKERS, max_pending=config.HASH_MAX_PENDING, kind=config.HASH_EXECUTOR
+)
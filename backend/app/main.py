@@ -1,12 +1,90 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from time import perf_counter
+from fastapi import FastAPI, Response
+from .db import async_db, db
+from . import config, metrics
+from .hashing import hasher
+from .rate_limit import limiter
 from .routers import auth, leaderboard, sessions
+from .verification import verifier
+from .write_buffer import session_buffer
+
+in_flight = metrics.gauge("http_requests_in_flight", "HTTP requests being handled")
+request_seconds = metrics.histogram(
+    "http_request_duration_seconds", "Time to handle an HTTP request, by route template", labels=("method", "route")
+)
+responses = metrics.counter(
+    "http_responses_total", "HTTP responses sent, by route template and status code", labels=("method", "route", "status")
+)
+
+class RequestMetrics:
+    """ASGI middleware recording latency, in-flight count and status per route.
+
+    Requests are labelled by route template ("/sessions/{session_id}"), not
+    path, so the number of series stays bounded; requests no route matched
+    share the "unmatched" label.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        status = 500
+
+        async def send_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_flight.inc()
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            elapsed = perf_counter() - start
+            in_flight.dec()
+            # The router stores the matched route in the shared scope
+            route = scope.get("route")
+            path = route.path if route is not None else "unmatched"
+            request_seconds.labels(scope["method"], path).observe(elapsed)
+            responses.labels(scope["method"], path, str(status)).inc()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Storage is created (and seeded) here rather than at import, so spawning a worker stays cheap
+    db.open()
+    flusher = asyncio.create_task(session_buffer.run()) if session_buffer.enabled else None
+    simulator = asyncio.create_task(sessions.run_simulation(config.SIMULATION_INTERVAL))
+    verification = asyncio.create_task(verifier.run())
+    snapshots = asyncio.create_task(leaderboard.top_snapshots.run()) if leaderboard.top_snapshots.enabled else None
+    yield
+    simulator.cancel()
+    await sessions.end_simulated_sessions()
+    verification.cancel()
+    verifier.shutdown()
+    if snapshots is not None:
+        snapshots.cancel()
+    if flusher is not None:
+        flusher.cancel()
+    # Don't lose buffered session updates on shutdown
+    await session_buffer.flush()
+    async_db.shutdown()
+    limiter.shutdown()
+    hasher.shutdown()
 
 app = FastAPI(
     title="Neon Snake API",
     description="Backend API for the Neon Snake arcade game application",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
+app.add_middleware(RequestMetrics)
+
 app.include_router(auth.router)
 app.include_router(leaderboard.router)
 app.include_router(sessions.router)
@@ -14,3 +92,7 @@ app.include_router(sessions.router)
 @app.get("/")
 def read_root():
     return {"message": "Welcome to Neon Snake API"}
+
+@app.get("/metrics", include_in_schema=False)
+def read_metrics():
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
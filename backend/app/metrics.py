@@ -0,0 +1,179 @@
+import threading
+from bisect import bisect_left
+from time import perf_counter
+from typing import Dict, Iterator, Sequence, Tuple, Union
+
+# Latency buckets in seconds
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+# For in-process work that usually takes microseconds
+FAST_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.01, 0.05, 0.25, 1.0)
+
+# Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self.value = 0
+
+    def inc(self, amount: int = 1):
+        self.value += amount
+
+    def samples(self, labels: str) -> Iterator[str]:
+        yield f"{self.name}{labels} {self.value}"
+
+
+class Gauge:
+    kind = "gauge"
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self.value = 0
+        self._function = None
+
+    def inc(self, amount: int = 1):
+        self.value += amount
+
+    def dec(self, amount: int = 1):
+        self.value -= amount
+
+    def set(self, value):
+        self.value = value
+
+    def set_function(self, function):
+        """Report ``function()`` at scrape time instead of the stored value."""
+        self._function = function
+
+    def samples(self, labels: str) -> Iterator[str]:
+        value = self._function() if self._function is not None else self.value
+        yield f"{self.name}{labels} {value}"
+
+
+class _Timer:
+    __slots__ = ("observe", "start")
+
+    def __init__(self, observe):
+        self.observe = observe
+
+    def __enter__(self):
+        self.start = perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.observe(perf_counter() - self.start)
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        # Observations can come from executor threads
+        with self._lock:
+            self.counts[bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.sum += value
+
+    def time(self) -> _Timer:
+        """Context manager observing the seconds spent inside it."""
+        return _Timer(self.observe)
+
+    def samples(self, labels: str) -> Iterator[str]:
+        with self._lock:
+            counts, count, total = list(self.counts), self.count, self.sum
+        # Buckets are exposed cumulatively, with "le" after any other labels
+        prefix = labels[:-1] + "," if labels else "{"
+        cumulative = 0
+        for bound, bucket in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            yield f'{self.name}_bucket{prefix}le="{le}"}} {cumulative}'
+        yield f"{self.name}_sum{labels} {total}"
+        yield f"{self.name}_count{labels} {count}"
+
+
+Metric = Union[Counter, Gauge, Histogram]
+
+
+class Family:
+    """A metric split by label values, one child per combination.
+
+    ``labels(*values)`` returns the child for those values, created on first
+    use; callers on a hot path can keep the child instead of looking it up.
+    """
+
+    def __init__(self, metric_class, name: str, description: str, labelnames: Sequence[str], **options):
+        self.kind = metric_class.kind
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self.children: Dict[Tuple[str, ...], Metric] = {}
+        self._make = lambda: metric_class(name, description, **options)
+
+    def labels(self, *values) -> Metric:
+        child = self.children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} takes labels {self.labelnames}")
+            child = self.children.setdefault(values, self._make())
+        return child
+
+    def samples(self, labels: str) -> Iterator[str]:
+        for values, child in list(self.children.items()):
+            pairs = ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(self.labelnames, values))
+            yield from child.samples("{" + pairs + "}")
+
+
+REGISTRY: Dict[str, Union[Metric, Family]] = {}
+
+
+def _register(metric):
+    REGISTRY[metric.name] = metric
+    return metric
+
+
+def counter(name: str, description: str, labels: Sequence[str] = ()) -> Union[Counter, Family]:
+    if labels:
+        return _register(Family(Counter, name, description, labels))
+    return _register(Counter(name, description))
+
+
+def gauge(name: str, description: str, labels: Sequence[str] = ()) -> Union[Gauge, Family]:
+    if labels:
+        return _register(Family(Gauge, name, description, labels))
+    return _register(Gauge(name, description))
+
+
+def histogram(
+    name: str, description: str, buckets: Sequence[float] = DEFAULT_BUCKETS, labels: Sequence[str] = ()
+) -> Union[Histogram, Family]:
+    if labels:
+        return _register(Family(Histogram, name, description, labels, buckets=buckets))
+    return _register(Histogram(name, description, buckets))
+
+
+def _escape(value: str, quote: bool = True) -> str:
+    value = value.replace("\\", "\\\\").replace("\n", "\\n")
+    return value.replace('"', '\\"') if quote else value
+
+
+def render() -> str:
+    """Every registered metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in list(REGISTRY.values()):
+        lines.append(f"# HELP {metric.name} {_escape(metric.description, quote=False)}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.samples(""))
+    return "\n".join(lines) + "\n"
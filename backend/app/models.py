@@ -1,7 +1,12 @@
 from pydantic import BaseModel, EmailStr, Field, ConfigDict
-from typing import List, Optional
+from typing import List, Literal, Optional
 from datetime import datetime
 from uuid import UUID
+from .snake import SnakeBody
+
+# Range of SQLite's INTEGER, so both storage backends accept the same values
+INT64_MIN = -2**63
+INT64_MAX = 2**63 - 1
 
 # User Models
 class UserBase(BaseModel):
@@ -40,15 +45,38 @@ class LeaderboardEntry(BaseModel):
 
     model_config = ConfigDict(from_attributes=True)
 
+class LeaderboardPage(BaseModel):
+    data: List[LeaderboardEntry]
+    total: int
+
+class PersonalBest(BaseModel):
+    # entry.rank is the position among every player's best run
+    entry: LeaderboardEntry
+    players: int
+
 class ScoreSubmit(BaseModel):
-    score: int = Field(..., ge=0)
+    score: int = Field(..., ge=0, le=INT64_MAX)
     mode: str
-    duration: Optional[int] = None
+    duration: Optional[int] = Field(None, ge=INT64_MIN, le=INT64_MAX)
+    # Ended session whose input log backs the score; it is replayed before ranking
+    sessionId: Optional[UUID] = None
+
+class ScoreVerification(BaseModel):
+    sessionId: UUID
+    score: int
+    mode: str
+    status: Literal["pending", "verified", "rejected"]
 
 # Game Session Models
+class Position(BaseModel):
+    # Same range as the packed snake body coordinates
+    x: int = Field(..., ge=-32768, le=32767)
+    y: int = Field(..., ge=-32768, le=32767)
+
 class GameState(BaseModel):
     direction: Optional[str] = None
-    snake: Optional[List[dict]] = None
+    # Packed coordinates internally, a list of {"x", "y"} objects over the API
+    snake: Optional[SnakeBody] = None
     food: Optional[dict] = None
     gameOver: Optional[bool] = None
 
@@ -67,13 +95,48 @@ class GameSessionDetails(GameSession):
     currentScore: int = 0
     gameState: Optional[GameState] = None
     lastUpdatedAt: Optional[datetime] = None
+    # Sequence number of the last applied update, for delta ordering
+    seq: int = 0
+    # Simulated by the server; the client only sends direction inputs
+    authoritative: bool = False
+    # Food seed of the recorded game (see app/engine.food_cells)
+    seed: Optional[int] = None
+
+class ActiveSessionsPage(BaseModel):
+    data: List[GameSessionDetails]
+    total: int
 
 class SessionStart(BaseModel):
     mode: str
+    authoritative: bool = False
+
+class SessionInput(BaseModel):
+    direction: Literal["UP", "DOWN", "LEFT", "RIGHT"]
+    # Moves the client's game had made when the input arrived; the server
+    # counts them itself for authoritative sessions. Logged as 32 bits
+    tick: Optional[int] = Field(None, ge=0, le=2**32 - 1)
 
 class SessionUpdate(BaseModel):
-    currentScore: Optional[int] = None
+    currentScore: Optional[int] = Field(None, ge=INT64_MIN, le=INT64_MAX)
     gameState: Optional[GameState] = None
-    
+    # Optional with a full snapshot: resets the delta sequence to this value
+    seq: Optional[int] = Field(None, ge=0, le=INT64_MAX)
+
+class SessionDelta(BaseModel):
+    """One tick of movement relative to the session's current game state."""
+    seq: int = Field(..., ge=1, le=INT64_MAX)
+    head: Optional[Position] = None
+    # True when the snake ate this tick, i.e. the tail was not popped
+    grew: bool = False
+    food: Optional[Position] = None
+    direction: Optional[str] = None
+    currentScore: Optional[int] = Field(None, ge=INT64_MIN, le=INT64_MAX)
+    gameOver: Optional[bool] = None
+
+class SessionDeltaAck(BaseModel):
+    seq: int
+
 class SessionEnd(BaseModel):
-    finalScore: int
+    finalScore: int = Field(..., ge=INT64_MIN, le=INT64_MAX)
+    # Total moves of a client-run game, closing its input log. Logged as 32 bits
+    ticks: Optional[int] = Field(None, ge=0, le=2**32 - 1)
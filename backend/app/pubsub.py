@@ -0,0 +1,123 @@
+import asyncio
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set
+
+from . import config, metrics
+
+published = metrics.counter("pubsub_frames_published_total", "Frames published to live-spectate topics")
+dropped = metrics.counter("pubsub_frames_dropped_total", "Frames dropped because a subscriber fell behind")
+subscribers = metrics.gauge("pubsub_subscribers", "Open live-spectate subscriptions")
+
+
+class Subscription:
+    """Bounded per-subscriber frame buffer.
+
+    When the buffer is full the oldest frame is dropped, so a slow spectator
+    skips intermediate boards instead of slowing down the publisher or
+    falling further and further behind.
+    """
+
+    def __init__(self, broker: "Broker", topic: str, maxsize: int):
+        self._broker = broker
+        self.topic = topic
+        self._frames: Deque[str] = deque(maxlen=maxsize)
+        self._ready = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        self.closed = False
+        self.dropped = 0
+
+    def _wake(self):
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._ready.set()
+        else:
+            self._loop.call_soon_threadsafe(self._ready.set)
+
+    def push(self, frame: str):
+        if len(self._frames) == self._frames.maxlen:
+            self.dropped += 1
+            dropped.inc()
+        self._frames.append(frame)
+        self._wake()
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self._broker._unsubscribe(self)
+            self._wake()
+
+    def __enter__(self) -> "Subscription":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> str:
+        while not self._frames:
+            if self.closed:
+                raise StopAsyncIteration
+            self._ready.clear()
+            await self._ready.wait()
+        return self._frames.popleft()
+
+
+class Broker:
+    """In-process topic fan-out for live-spectate frames.
+
+    Publishers hand over an already serialized frame, so the cost of a
+    publish is one JSON encode plus one deque append per subscriber.
+    """
+
+    def __init__(self, buffer_size: int):
+        self.buffer_size = buffer_size
+        self._topics: Dict[str, Set[Subscription]] = {}
+
+    def subscribe(self, topic: str, buffer_size: Optional[int] = None) -> Subscription:
+        subscription = Subscription(self, topic, buffer_size or self.buffer_size)
+        self._topics.setdefault(topic, set()).add(subscription)
+        subscribers.inc()
+        return subscription
+
+    def _unsubscribe(self, subscription: Subscription):
+        topic = self._topics.get(subscription.topic)
+        if topic is not None and subscription in topic:
+            topic.discard(subscription)
+            subscribers.dec()
+            if not topic:
+                del self._topics[subscription.topic]
+
+    def topics(self) -> List[str]:
+        return list(self._topics)
+
+    def subscriber_count(self, topic: str) -> int:
+        return len(self._topics.get(topic, ()))
+
+    def publish(self, topic: str, frame: str):
+        published.inc()
+        for subscription in tuple(self._topics.get(topic, ())):
+            subscription.push(frame)
+
+    def close_topic(self, topic: str):
+        """Let subscribers drain what they have and then end their iteration."""
+        for subscription in tuple(self._topics.get(topic, ())):
+            subscription.close()
+
+
+broker = Broker(buffer_size=config.SPECTATE_BUFFER_SIZE)
+
+ACTIVE_TOPIC = "sessions:active"
+
+
+def session_topic(session_id: str) -> str:
+    return f"session:{session_id}"
+
+
+def topic_session_id(topic: str) -> Optional[str]:
+    prefix, _, session_id = topic.partition(":")
+    return session_id if prefix == "session" else None
@@ -0,0 +1,432 @@
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timedelta, timezone
+from heapq import merge
+from itertools import chain, count, groupby, islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .models import LeaderboardEntry
+
+# Maximum bucket size before a bucket is split in two. Inserts cost a bisect
+# over the bucket maxes plus a memmove inside a single bucket, so keeping the
+# buckets small keeps every add O(log n) in practice.
+BUCKET_SIZE = 512
+
+
+class SortedList:
+    """Bucketed sorted list with positional lookups.
+
+    Values are kept in a list of sorted buckets. A Fenwick tree over the
+    bucket lengths turns "position of value" and "value at position" into
+    O(log n) operations instead of a walk over every bucket.
+    """
+
+    def __init__(self, values: Iterable = ()):
+        self._load(sorted(values))
+
+    def _load(self, values: List):
+        self._buckets: List[List] = [
+            values[i : i + BUCKET_SIZE] for i in range(0, len(values), BUCKET_SIZE)
+        ]
+        self._maxes: List = [bucket[-1] for bucket in self._buckets]
+        self._len = len(values)
+        self._rebuild_tree()
+
+    def _rebuild_tree(self):
+        tree = [0] * (len(self._buckets) + 1)
+        for i, bucket in enumerate(self._buckets, start=1):
+            tree[i] += len(bucket)
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def _tree_add(self, bucket_index: int, delta: int):
+        i = bucket_index + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def _prefix(self, bucket_index: int) -> int:
+        # Number of values stored in the buckets before bucket_index
+        total = 0
+        i = bucket_index
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def _locate(self, position: int) -> Tuple[int, int]:
+        # Map a global position to (bucket index, offset inside bucket)
+        bucket_index = 0
+        step = 1 << (len(self._tree).bit_length())
+        while step:
+            nxt = bucket_index + step
+            if nxt < len(self._tree) and self._tree[nxt] <= position:
+                bucket_index = nxt
+                position -= self._tree[nxt]
+            step >>= 1
+        return bucket_index, position
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator:
+        for bucket in self._buckets:
+            yield from bucket
+
+    def update(self, values: Iterable):
+        """Add many values with one sort instead of one insert each."""
+        values = list(values)
+        if values:
+            # Timsort finds the existing run, so this is a merge rather than a full sort
+            self._load(sorted(chain(self, values)))
+
+    def add(self, value):
+        if not self._buckets:
+            self._buckets.append([value])
+            self._maxes.append(value)
+            self._len = 1
+            self._rebuild_tree()
+            return
+
+        bucket_index = bisect_left(self._maxes, value)
+        if bucket_index == len(self._maxes):
+            bucket_index -= 1
+            self._buckets[bucket_index].append(value)
+            self._maxes[bucket_index] = value
+        else:
+            insort(self._buckets[bucket_index], value)
+        self._len += 1
+
+        bucket = self._buckets[bucket_index]
+        if len(bucket) > BUCKET_SIZE * 2:
+            half = len(bucket) // 2
+            self._buckets[bucket_index : bucket_index + 1] = [bucket[:half], bucket[half:]]
+            self._maxes[bucket_index : bucket_index + 1] = [bucket[half - 1], bucket[-1]]
+            self._rebuild_tree()
+        else:
+            self._tree_add(bucket_index, 1)
+
+    def remove(self, value):
+        bucket_index = bisect_left(self._maxes, value)
+        if bucket_index == len(self._maxes):
+            raise ValueError(f"{value!r} not in list")
+        bucket = self._buckets[bucket_index]
+        i = bisect_left(bucket, value)
+        if i == len(bucket) or bucket[i] != value:
+            raise ValueError(f"{value!r} not in list")
+        del bucket[i]
+        self._len -= 1
+        if not bucket:
+            del self._buckets[bucket_index]
+            del self._maxes[bucket_index]
+            self._rebuild_tree()
+            return
+        self._maxes[bucket_index] = bucket[-1]
+        self._tree_add(bucket_index, -1)
+
+    def bisect_left(self, value) -> int:
+        bucket_index = bisect_left(self._maxes, value)
+        if bucket_index == len(self._maxes):
+            return self._len
+        return self._prefix(bucket_index) + bisect_left(self._buckets[bucket_index], value)
+
+    def bisect_right(self, value) -> int:
+        bucket_index = bisect_right(self._maxes, value)
+        if bucket_index == len(self._maxes):
+            return self._len
+        return self._prefix(bucket_index) + bisect_right(self._buckets[bucket_index], value)
+
+    def index(self, value) -> int:
+        position = self.bisect_left(value)
+        if position == self._len or self[position] != value:
+            raise ValueError(f"{value!r} not in list")
+        return position
+
+    def islice(self, start: int = 0, stop: Optional[int] = None) -> Iterator:
+        if stop is None or stop > self._len:
+            stop = self._len
+        if start >= stop:
+            return
+        bucket_index, offset = self._locate(start)
+        remaining = stop - start
+        for bucket in islice(self._buckets, bucket_index, None):
+            chunk = bucket[offset : offset + remaining]
+            yield from chunk
+            remaining -= len(chunk)
+            if not remaining:
+                return
+            offset = 0
+
+    def __getitem__(self, position: int):
+        if position < 0:
+            position += self._len
+        if not 0 <= position < self._len:
+            raise IndexError("SortedList index out of range")
+        bucket_index, offset = self._locate(position)
+        return self._buckets[bucket_index][offset]
+
+
+# Rolling windows as (bucket width, number of buckets). A window holds the
+# current, partially filled bucket plus the previous ones, so "day" covers
+# between 23 and 24 hours of submissions depending on the time of the read.
+WINDOWS: Dict[str, Tuple[timedelta, int]] = {
+    "hour": (timedelta(minutes=5), 12),
+    "day": (timedelta(hours=1), 24),
+    "week": (timedelta(days=1), 7),
+}
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _aware(moment: datetime) -> datetime:
+    return moment if moment.tzinfo is not None else moment.replace(tzinfo=timezone.utc)
+
+
+def _bucket(moment: datetime, width: timedelta) -> int:
+    return int(_aware(moment).timestamp() // width.total_seconds())
+
+
+def window_start(window: str, now: Optional[datetime] = None) -> datetime:
+    """Oldest timestamp still inside ``window``, i.e. the start of its first bucket."""
+    width, buckets = WINDOWS[window]
+    first = _bucket(now or _utcnow(), width) - buckets + 1
+    return datetime.fromtimestamp(first * width.total_seconds(), tz=timezone.utc)
+
+
+class WindowedLeaderboard:
+    """Time-bucketed leaderboard partitions for the rolling windows.
+
+    Every entry is added to one bucket per window, both under its mode and
+    under the global scope ``None``. Buckets are sorted lists of the same
+    keys the all-time board uses, so a window page is a lazy merge of a few
+    bucket heads rather than a scan of history. Buckets that fall out of a
+    window are dropped the next time that window is touched.
+    """
+
+    def __init__(self, clock: Callable[[], datetime] = _utcnow):
+        self._clock = clock
+        self._buckets: Dict[str, Dict[Optional[str], Dict[int, SortedList]]] = {name: {} for name in WINDOWS}
+        self._first: Dict[str, Optional[int]] = dict.fromkeys(WINDOWS)
+
+    def _expire(self, window: str) -> int:
+        width, buckets = WINDOWS[window]
+        first = _bucket(self._clock(), width) - buckets + 1
+        if self._first[window] != first:
+            self._first[window] = first
+            for scoped in self._buckets[window].values():
+                for stale in [bucket for bucket in scoped if bucket < first]:
+                    del scoped[stale]
+        return first
+
+    def add(self, key: Tuple[int, int, object]):
+        timestamp = key[2].timestamp
+        for window, (width, _) in WINDOWS.items():
+            bucket = _bucket(timestamp, width)
+            if bucket < self._expire(window):
+                continue
+            for scope in (key[2].mode, None):
+                scoped = self._buckets[window].setdefault(scope, {})
+                ranked = scoped.get(bucket)
+                if ranked is None:
+                    ranked = scoped[bucket] = SortedList()
+                ranked.add(key)
+
+    def extend(self, keys: List[Tuple[int, int, object]]):
+        """Bulk ``add``: keys older than every window are skipped with one
+        comparison, and each touched bucket is sorted once.
+        """
+        oldest = min(window_start(window, self._clock()) for window in WINDOWS)
+        recent = [key for key in keys if _aware(key[2].timestamp) >= oldest]
+        for window, (width, _) in WINDOWS.items():
+            first = self._expire(window)
+            grouped: Dict[Tuple[Optional[str], int], List] = {}
+            for key in recent:
+                bucket = _bucket(key[2].timestamp, width)
+                if bucket >= first:
+                    grouped.setdefault((key[2].mode, bucket), []).append(key)
+                    grouped.setdefault((None, bucket), []).append(key)
+            for (scope, bucket), bucket_keys in grouped.items():
+                self._buckets[window].setdefault(scope, {}).setdefault(bucket, SortedList()).update(bucket_keys)
+
+    def _live(self, window: str, mode: Optional[str]) -> List[SortedList]:
+        self._expire(window)
+        return list(self._buckets[window].get(mode or None, {}).values())
+
+    def page(self, window: str, mode: Optional[str] = None, limit: int = 100, offset: int = 0) -> List[Tuple[tuple, int]]:
+        """``(key, rank)`` pairs; ranks are global within the window, as on the all-time board."""
+        keys = list(islice(merge(*self._live(window, mode)), offset, offset + limit))
+        if not mode:
+            return [(key, offset + i + 1) for i, key in enumerate(keys)]
+        everything = self._live(window, None)
+        return [(key, sum(ranked.bisect_left(key) for ranked in everything) + 1) for key in keys]
+
+    def count(self, window: str, mode: Optional[str] = None) -> int:
+        return sum(len(ranked) for ranked in self._live(window, mode))
+
+
+class LeaderboardStore:
+    """Score-ordered leaderboard partitioned by game mode.
+
+    Entries are ordered by score descending; ties keep submission order, the
+    same as the stable sort the old list-based leaderboard used. Every entry
+    is indexed twice: in the global ranking and in its mode's partition, so
+    per-mode pages and counts never filter the whole board. Ranks are always
+    global and are derived from position when entries are read instead of
+    being rewritten on every insert.
+
+    Alongside every run, the store maintains each user's best entry per mode
+    and overall (scope ``None``), ranked in their own sorted lists. That
+    backs the best-per-user board and O(log n) personal rank lookups.
+    Recent entries are also bucketed by time for the rolling windows.
+    """
+
+    def __init__(self, entries: Iterable[LeaderboardEntry] = (), clock: Callable[[], datetime] = _utcnow):
+        self._seq = count()
+        self._ranked = SortedList()
+        self._by_mode: Dict[str, SortedList] = {}
+        self._best: Dict[Tuple[str, Optional[str]], Tuple[int, int, LeaderboardEntry]] = {}
+        self._best_ranked: Dict[Optional[str], SortedList] = {}
+        self.windows = WindowedLeaderboard(clock)
+        self.extend(entries)
+
+    def _key(self, entry: LeaderboardEntry) -> Tuple[int, int, LeaderboardEntry]:
+        # The sequence number is unique, so tuple comparison never reaches the entry
+        return (-entry.score, next(self._seq), entry)
+
+    @staticmethod
+    def _ranked_copy(entry: LeaderboardEntry, rank: int) -> LeaderboardEntry:
+        return entry.model_copy(update={"rank": rank})
+
+    def __len__(self) -> int:
+        return len(self._ranked)
+
+    def __iter__(self) -> Iterator[LeaderboardEntry]:
+        for _, _, entry in self._ranked:
+            yield entry
+
+    @property
+    def modes(self) -> List[str]:
+        return list(self._by_mode)
+
+    def add(self, entry: LeaderboardEntry) -> LeaderboardEntry:
+        key = self._key(entry)
+        self._ranked.add(key)
+        partition = self._by_mode.get(entry.mode)
+        if partition is None:
+            partition = self._by_mode[entry.mode] = SortedList()
+        partition.add(key)
+        self._track_best(key)
+        self.windows.add(key)
+        return self._ranked_copy(entry, self._ranked.index(key) + 1)
+
+    def extend(self, entries: Iterable[LeaderboardEntry]) -> int:
+        """Bulk ``add``: each index is rebuilt with one sort instead of an
+        insert per entry. Entries rank after existing ties, in the given order.
+        """
+        keys = [self._key(entry) for entry in entries]
+        if not keys:
+            return 0
+        self._ranked.update(keys)
+        for mode, mode_keys in groupby(sorted(keys, key=lambda key: key[2].mode), key=lambda key: key[2].mode):
+            self._by_mode.setdefault(mode, SortedList()).update(mode_keys)
+
+        changed = set()
+        for key in keys:
+            entry = key[2]
+            for scope in (entry.mode, None):
+                best_key = (str(entry.userId), scope)
+                current = self._best.get(best_key)
+                if current is None or key < current:
+                    self._best[best_key] = key
+                    changed.add(scope)
+        for scope in changed:
+            self._best_ranked[scope] = SortedList(
+                key for (_, best_scope), key in self._best.items() if best_scope == scope
+            )
+
+        self.windows.extend(keys)
+        return len(keys)
+
+    def scan(self, batch_size: int = 1000) -> Iterator[List[LeaderboardEntry]]:
+        """Every entry in rank order, one batch at a time.
+
+        Each batch resumes after the last key of the one before, like keyset
+        pagination, so entries added between batches never shift the scan.
+        """
+        last = None
+        while True:
+            start = 0 if last is None else self._ranked.bisect_right(last)
+            keys = list(self._ranked.islice(start, start + batch_size))
+            if not keys:
+                return
+            yield [entry for _, _, entry in keys]
+            last = keys[-1]
+
+    def _track_best(self, key: Tuple[int, int, LeaderboardEntry]):
+        entry = key[2]
+        for scope in (entry.mode, None):
+            best_key = (str(entry.userId), scope)
+            current = self._best.get(best_key)
+            # Keys sort best-first, so a smaller key is a strictly better run
+            if current is not None and current <= key:
+                continue
+            ranked = self._best_ranked.get(scope)
+            if ranked is None:
+                ranked = self._best_ranked[scope] = SortedList()
+            if current is not None:
+                ranked.remove(current)
+            ranked.add(key)
+            self._best[best_key] = key
+
+    def best_page(self, mode: Optional[str] = None, limit: int = 100, offset: int = 0) -> List[LeaderboardEntry]:
+        """One entry per user, their best run; ranks are positions on this board."""
+        ranked = self._best_ranked.get(mode or None)
+        if ranked is None:
+            return []
+        return [
+            self._ranked_copy(entry, offset + i + 1)
+            for i, (_, _, entry) in enumerate(ranked.islice(offset, offset + limit))
+        ]
+
+    def player_count(self, mode: Optional[str] = None) -> int:
+        ranked = self._best_ranked.get(mode or None)
+        return len(ranked) if ranked is not None else 0
+
+    def personal_best(self, user_id: str, mode: Optional[str] = None) -> Optional[LeaderboardEntry]:
+        """The user's best run, ranked among every player's best, or None."""
+        key = self._best.get((user_id, mode or None))
+        if key is None:
+            return None
+        return self._ranked_copy(key[2], self._best_ranked[mode or None].index(key) + 1)
+
+    def page(
+        self, mode: Optional[str] = None, limit: int = 100, offset: int = 0, window: Optional[str] = None
+    ) -> List[LeaderboardEntry]:
+        if window:
+            return [
+                self._ranked_copy(key[2], rank)
+                for key, rank in self.windows.page(window, mode=mode, limit=limit, offset=offset)
+            ]
+        if not mode:
+            return [
+                self._ranked_copy(entry, offset + i + 1)
+                for i, (_, _, entry) in enumerate(self._ranked.islice(offset, offset + limit))
+            ]
+        partition = self._by_mode.get(mode)
+        if partition is None:
+            return []
+        return [
+            self._ranked_copy(key[2], self._ranked.index(key) + 1)
+            for key in partition.islice(offset, offset + limit)
+        ]
+
+    def count(self, mode: Optional[str] = None, window: Optional[str] = None) -> int:
+        if window:
+            return self.windows.count(window, mode=mode)
+        if mode:
+            partition = self._by_mode.get(mode)
+            return len(partition) if partition is not None else 0
+        return len(self._ranked)
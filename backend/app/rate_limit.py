@@ -0,0 +1,206 @@
+import asyncio
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, NamedTuple, Optional, Sequence, Tuple
+
+from fastapi import Depends, HTTPException, Request, status
+
+from . import config, metrics
+from .auth import get_current_user
+from .models import User
+
+limited = metrics.counter(
+    "rate_limited_total", "Requests answered 429 by the rate limiter, by route template", labels=("route",)
+)
+tracked = metrics.gauge("rate_limit_buckets", "Rate-limit buckets kept in this process's memory")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rate_limits (
+    key TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL,
+    full_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_rate_limits_full_at ON rate_limits (full_at);
+"""
+UPSERT_BUCKET = (
+    "INSERT INTO rate_limits (key, tokens, updated, full_at) VALUES (?, ?, ?, ?) "
+    "ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated, full_at = excluded.full_at"
+)
+
+
+class Rule(NamedTuple):
+    """Bursts of up to ``burst`` requests, refilled at ``rate`` per second."""
+
+    rate: float
+    burst: float
+
+
+def take_token(bucket: Optional[Sequence[float]], now: float, rule: Rule) -> Tuple[float, float, float]:
+    """Take one token from ``bucket``, stored as ``(tokens, updated, ...)``, or from a new full one.
+
+    Returns the tokens left at ``now``, the time the bucket is full again,
+    and how long to wait for a token: 0 when one was taken.
+    """
+    if bucket is None:
+        tokens = rule.burst
+    else:
+        tokens = min(rule.burst, bucket[0] + max(0.0, now - bucket[1]) * rule.rate)
+    wait = 0.0
+    if tokens >= 1:
+        tokens -= 1
+    else:
+        wait = (1 - tokens) / rule.rate
+    return tokens, now + (rule.burst - tokens) / rule.rate, wait
+
+
+class Buckets(ABC):
+    """Where bucket levels are kept: in one process, or shared by workers."""
+
+    # Backends doing I/O set this, and RateLimiter moves their calls off the loop
+    blocking = False
+
+    @abstractmethod
+    def take(self, key: str, rule: Rule) -> float:
+        """Take a token from ``key``'s bucket; returns the seconds to wait for one, 0 if taken."""
+
+
+class MemoryBuckets(Buckets):
+    """Buckets of one process, least recently used first within each rule.
+
+    A bucket left alone until it has refilled is the same as no bucket, so
+    every take drops the full ones at the front of each rule's order. Each
+    rule keeps its own order, so an idle key on a slow-refilling rule can't
+    hold back keys of a faster one. Memory follows the keys used within the
+    last ``burst / rate`` seconds of their rule, one tuple each.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._buckets: "Dict[Rule, OrderedDict[str, Tuple[float, float, float]]]" = {}
+
+    def __len__(self) -> int:
+        return sum(len(buckets) for buckets in self._buckets.values())
+
+    def take(self, key: str, rule: Rule) -> float:
+        now = self._clock()
+        buckets = self._buckets.setdefault(rule, OrderedDict())
+        tokens, full_at, wait = take_token(buckets.pop(key, None), now, rule)
+        for order in self._buckets.values():
+            while order:
+                if next(iter(order.values()))[2] > now:
+                    break
+                order.popitem(last=False)
+        buckets[key] = (tokens, now, full_at)
+        return wait
+
+
+class SQLiteBuckets(Buckets):
+    """Buckets in a table of a SQLite database that several workers share.
+
+    Each take is one short write transaction, timed by the wall clock every
+    worker agrees on. Every ``evict_every`` takes, buckets that are full
+    again are deleted. The connections are opened by the first take.
+    """
+
+    blocking = True
+
+    def __init__(self, path: str, pool_size: int = 2, evict_every: int = 1000, clock: Callable[[], float] = time.time):
+        self.path = path
+        self.pool_size = pool_size
+        self.evict_every = evict_every
+        self._clock = clock
+        self._pool = None
+        self._lock = threading.Lock()
+        self._takes = 0
+
+    def _connections(self):
+        with self._lock:
+            if self._pool is None:
+                from .sqlite_db import ConnectionPool
+                pool = ConnectionPool(self.path, size=self.pool_size)
+                with pool.connection() as conn:
+                    conn.executescript(SCHEMA)
+                self._pool = pool
+            self._takes += 1
+            return self._pool, self._takes % self.evict_every == 0
+
+    def take(self, key: str, rule: Rule) -> float:
+        pool, evict = self._connections()
+        with pool.connection() as conn, conn:
+            # Take the write lock before reading, so concurrent takes can't both spend the same token
+            conn.execute("BEGIN IMMEDIATE")
+            now = self._clock()
+            row = conn.execute("SELECT tokens, updated FROM rate_limits WHERE key = ?", (key,)).fetchone()
+            tokens, full_at, wait = take_token(row, now, rule)
+            conn.execute(UPSERT_BUCKET, (key, tokens, now, full_at))
+            if evict:
+                conn.execute("DELETE FROM rate_limits WHERE full_at <= ?", (now,))
+        return wait
+
+
+class RateLimiter:
+    """Token buckets per user and route.
+
+    ``dependency(name)`` returns a route dependency that takes a token from
+    the current user's bucket for that route, under the rule called
+    ``name``, and answers 429 with ``Retry-After`` when the bucket is empty.
+    Names without a rule, or whose rule has a rate of 0, are not limited.
+    Calls to a ``blocking`` backend run on a pool of ``workers`` threads.
+    """
+
+    def __init__(self, buckets: Buckets, rules: Dict[str, Rule], workers: int = 2):
+        self.buckets = buckets
+        self.rules = rules
+        self.workers = workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    async def acquire(self, name: str, key: str) -> float:
+        """Take a token for ``key`` under rule ``name``; returns the seconds to wait, 0 if admitted."""
+        rule = self.rules.get(name)
+        if rule is None or rule.rate <= 0:
+            return 0.0
+        if not self.buckets.blocking:
+            return self.buckets.take(key, rule)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="rate-limit")
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self.buckets.take, key, rule)
+
+    def dependency(self, name: str) -> Callable:
+        async def check_rate_limit(request: Request, current_user: User = Depends(get_current_user)):
+            route = request.scope["route"].path
+            wait = await self.acquire(name, f"{current_user.id}:{route}")
+            if wait > 0:
+                limited.labels(route).inc()
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Too many requests, try again shortly",
+                    headers={"Retry-After": str(math.ceil(wait))},
+                )
+
+        return check_rate_limit
+
+    def shutdown(self):
+        # The next blocking acquire starts a new pool
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+def create_buckets() -> Buckets:
+    if config.RATE_LIMIT_BACKEND == "sqlite":
+        return SQLiteBuckets(config.SQLITE_PATH)
+    if config.RATE_LIMIT_BACKEND != "memory":
+        raise ValueError(f"Unknown rate limit backend: {config.RATE_LIMIT_BACKEND!r}")
+    return MemoryBuckets()
+
+
+limiter = RateLimiter(create_buckets(), {
+    "session_update": Rule(config.RATE_LIMIT_SESSION_UPDATES, config.RATE_LIMIT_SESSION_UPDATES_BURST),
+    "score_submit": Rule(config.RATE_LIMIT_SUBMITS, config.RATE_LIMIT_SUBMITS_BURST),
+})
+tracked.set_function(lambda: len(limiter.buckets) if isinstance(limiter.buckets, MemoryBuckets) else 0)
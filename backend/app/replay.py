@@ -0,0 +1,113 @@
+import struct
+from typing import TYPE_CHECKING, List, NamedTuple, Optional, Sequence
+
+from .rules import DIRECTION_CODES, MODES
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Append-only session log: a header, then one fixed-size record per input.
+#   header: magic, format version, mode index, food seed
+#   record: move count when the input arrived, direction code (END closes the log)
+MAGIC = b"SNKR"
+VERSION = 1
+HEADER = struct.Struct("<4sBBI")
+RECORD = struct.Struct("<IB")
+END = 0xFF
+# NumPy dtype of a record; NumPy and the engine are imported on the first
+# replay, so writing logs from the routes doesn't load them
+_RECORD_FIELDS = [("move", "<u4"), ("code", "u1")]
+
+
+class InvalidReplay(ValueError):
+    """Raised for a log that cannot be replayed."""
+
+
+class Replay(NamedTuple):
+    mode: str
+    seed: int
+    moves: "np.ndarray"  # move count each input applies at
+    codes: "np.ndarray"  # direction codes
+    end: int  # total moves the game made
+
+
+def header(mode: str, seed: int) -> bytes:
+    return HEADER.pack(MAGIC, VERSION, MODES.index(mode), seed)
+
+
+def record(move: int, direction: str) -> bytes:
+    return RECORD.pack(move, DIRECTION_CODES[direction])
+
+
+def end_record(moves: int) -> bytes:
+    return RECORD.pack(moves, END)
+
+
+def parse(data: bytes) -> Replay:
+    import numpy as np
+
+    if len(data) < HEADER.size or (len(data) - HEADER.size) % RECORD.size:
+        raise InvalidReplay("Truncated replay")
+    magic, version, mode, seed = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION or mode >= len(MODES):
+        raise InvalidReplay("Not a replay log")
+    records = np.frombuffer(data, dtype=_RECORD_FIELDS, offset=HEADER.size)
+    ends = np.flatnonzero(records["code"] == END)
+    if len(ends) != 1 or ends[0] != len(records) - 1:
+        raise InvalidReplay("Replay must end with exactly one end record")
+    moves, codes = records["move"][:-1], records["code"][:-1]
+    if np.any(codes >= len(DIRECTION_CODES)) or np.any(np.diff(records["move"].astype(np.int64)) < 0):
+        raise InvalidReplay("Replay inputs out of order")
+    return Replay(MODES[mode], seed, moves, codes, int(records["move"][-1]))
+
+
+def replay_scores(logs: Sequence[bytes]) -> List[Optional[int]]:
+    """Final score of each logged game, or None for a log that is invalid or
+    describes a game that crashed before its recorded end.
+
+    All games are replayed together in one engine, one move per step, so
+    the cost per step is shared by the whole batch. The replay stops once
+    every game has crashed or reached its end, however far a log claims
+    to go.
+    """
+    import numpy as np
+
+    from .engine import SnakeEngine
+
+    replays: List[Optional[Replay]] = []
+    for data in logs:
+        try:
+            replays.append(parse(data))
+        except InvalidReplay:
+            replays.append(None)
+    valid = [i for i, replay in enumerate(replays) if replay is not None]
+    scores: List[Optional[int]] = [None] * len(logs)
+    if not valid:
+        return scores
+
+    engine = SnakeEngine(capacity=len(valid))
+    slots = np.array([engine.spawn(replays[i].mode, now=0, seed=replays[i].seed) for i in valid])
+    ends = np.array([replays[i].end for i in valid])
+    # Every input as (move, slot, code), stably sorted by move so later inputs still win
+    input_slots = np.concatenate([np.full(len(replays[i].moves), slot) for i, slot in zip(valid, slots)])
+    input_moves = np.concatenate([replays[i].moves for i in valid]).astype(np.int64)
+    input_codes = np.concatenate([replays[i].codes for i in valid])
+    order = np.argsort(input_moves, kind="stable")
+    input_slots, input_moves, input_codes = input_slots[order], input_moves[order], input_codes[order]
+
+    # Each step is one move for every unfinished game: now advances past any game speed
+    for move in range(int(ends.max()) + 1):
+        for slot in slots[ends == move]:
+            engine.remove(slot)
+        if not engine.running():
+            break
+        lo, hi = np.searchsorted(input_moves, [move, move + 1])
+        if hi > lo:
+            engine.steer_many(input_slots[lo:hi], input_codes[lo:hi])
+        if move < ends.max():
+            engine.tick((move + 1) * 1000.0)
+
+    for i, slot in zip(valid, slots):
+        if engine.moves(slot) == replays[i].end:
+            scores[i] = engine.score(slot)
+    return scores
@@ -0,0 +1,65 @@
+import hashlib
+from collections import OrderedDict
+from typing import Hashable, NamedTuple, Optional
+
+from . import metrics
+
+hits = metrics.counter("leaderboard_cache_hits_total", "GET /leaderboard responses served from the response cache")
+misses = metrics.counter("leaderboard_cache_misses_total", "GET /leaderboard responses rendered from storage")
+not_modified = metrics.counter("leaderboard_cache_not_modified_total", "GET /leaderboard requests answered with 304")
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    etag: str
+
+
+def cached_response(body: bytes) -> CachedResponse:
+    return CachedResponse(body, f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"')
+
+
+class ResponseCache:
+    """LRU cache of rendered JSON bodies, invalidated as a whole on writes.
+
+    ``version`` counts invalidations. Callers read it before querying
+    storage and pass it back to ``put``, so a body rendered from data that
+    changed mid-request is never stored.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.version = 0
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        cached = self._entries.get(key)
+        if cached is None:
+            misses.inc()
+            return None
+        self._entries.move_to_end(key)
+        hits.inc()
+        return cached
+
+    def put(self, key: Hashable, body: bytes, version: int) -> CachedResponse:
+        cached = cached_response(body)
+        if self.max_size > 0 and version == self.version:
+            self._entries[key] = cached
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return cached
+
+    def invalidate(self, *_):
+        self.version += 1
+        self._entries.clear()
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # If-None-Match uses weak comparison
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
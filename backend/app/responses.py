@@ -0,0 +1,21 @@
+from typing import Any
+
+from fastapi import Response
+from pydantic_core import to_json
+
+
+class ModelResponse(Response):
+    """JSON response rendered from Pydantic models straight to bytes.
+
+    Returning this from a route skips FastAPI's response_model handling,
+    which re-validates the return value and walks it again to encode UUIDs
+    and datetimes. ``to_json`` serializes models with their own compiled
+    serializers, so excluded fields such as ``User.hashed_password`` stay
+    out. The route's ``response_model`` is still used for the OpenAPI docs
+    and has to describe what is returned.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return to_json(content)
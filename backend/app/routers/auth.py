@@ -5,13 +5,16 @@ from uuid import uuid4
 
 from ..models import User, UserCreate, UserLogin, AuthResponse
 from ..auth import (
-    get_password_hash,
-    verify_password,
+    hash_password,
+    check_password,
     create_access_token,
     get_current_user,
+    revoke_token,
+    oauth2_scheme,
     ACCESS_TOKEN_EXPIRE_MINUTES
 )
-from ..db import db
+from ..db import async_db, DuplicateUserError
+from ..responses import ModelResponse
 
 router = APIRouter(
     prefix="/auth",
@@ -21,21 +24,21 @@ router = APIRouter(
 @router.post("/signup", response_model=AuthResponse, status_code=status.HTTP_201_CREATED)
 async def signup(user_data: UserCreate):
     # Check if email exists
-    if db.get_user_by_email(user_data.email):
+    if await async_db.get_user_by_email(user_data.email):
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="User with this email already exists"
         )
     
     # Check if username exists
-    if db.get_user_by_username(user_data.username):
+    if await async_db.get_user_by_username(user_data.username):
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="User with this username already exists"
         )
     
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await hash_password(user_data.password)
     new_user = User(
         id=uuid4(),
         username=user_data.username,
@@ -44,18 +47,24 @@ async def signup(user_data: UserCreate):
         hashed_password=hashed_password
     )
     
-    db.create_user(new_user)
+    try:
+        await async_db.create_user(new_user)
+    except DuplicateUserError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(exc)
+        )
     
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         data={"sub": new_user.username}, expires_delta=access_token_expires
     )
     
-    return AuthResponse(user=new_user, token=access_token)
+    return ModelResponse(AuthResponse(user=new_user, token=access_token), status_code=status.HTTP_201_CREATED)
 
 @router.post("/login", response_model=AuthResponse)
 async def login(login_data: UserLogin):
-    user = db.get_user_by_email(login_data.email)
+    user = await async_db.get_user_by_email(login_data.email)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -64,7 +73,7 @@ async def login(login_data: UserLogin):
         )
     
     # Verify password
-    if not user.hashed_password or not verify_password(login_data.password, user.hashed_password):
+    if not user.hashed_password or not await check_password(login_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -76,12 +85,16 @@ async def login(login_data: UserLogin):
         data={"sub": user.username}, expires_delta=access_token_expires
     )
     
-    return AuthResponse(user=user, token=access_token)
+    return ModelResponse(AuthResponse(user=user, token=access_token))
 
 @router.post("/logout")
-async def logout(current_user: Annotated[User, Depends(get_current_user)]):
+async def logout(
+    current_user: Annotated[User, Depends(get_current_user)],
+    token: Annotated[str, Depends(oauth2_scheme)]
+):
+    await revoke_token(token)
     return {"message": "Logged out successfully"}
 
 @router.get("/me", response_model=User)
 async def read_users_me(current_user: Annotated[User, Depends(get_current_user)]):
-    return current_user
+    return ModelResponse(current_user)
@@ -1,32 +1,125 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from typing import List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from typing import Literal, Optional
 from uuid import uuid4
 from datetime import datetime, timezone
 
-from ..models import LeaderboardEntry, ScoreSubmit, User, LeaderboardEntry
-from ..db import db
-from ..auth import get_current_user
+from .. import config
+from ..bulk import export_response
+from ..models import LeaderboardEntry, LeaderboardPage, PersonalBest, ScoreSubmit, ScoreVerification, User, LeaderboardEntry
+from ..db import async_db, db, sync_shared_state
+from ..auth import get_admin_user, get_current_user
+from ..rate_limit import limiter
+from ..ranking import window_start
+from ..response_cache import ResponseCache, etag_matches, not_modified
+from ..responses import ModelResponse
+from ..snapshots import TopSnapshots
+from ..verification import verifier
 
 router = APIRouter(
     prefix="/leaderboard",
     tags=["Leaderboard"],
+    # The response cache and snapshots drop what other workers' scores made stale
+    dependencies=[Depends(sync_shared_state)],
 )
 
-@router.get("", response_model=dict)
+leaderboard_cache = ResponseCache(config.LEADERBOARD_CACHE_SIZE)
+db.add_score_listener(leaderboard_cache.invalidate)
+top_snapshots = TopSnapshots(
+    async_db,
+    size=config.LEADERBOARD_SNAPSHOT_SIZE,
+    debounce=config.LEADERBOARD_SNAPSHOT_DEBOUNCE,
+    max_staleness=config.LEADERBOARD_SNAPSHOT_MAX_STALENESS,
+)
+db.add_score_listener(top_snapshots.invalidate)
+
+@router.get("", response_model=LeaderboardPage)
 async def get_leaderboard(
     mode: Optional[str] = None,
     limit: int = Query(100, ge=1, le=1000),
-    offset: int = Query(0, ge=0)
+    offset: int = Query(0, ge=0),
+    view: Literal["all", "best"] = "all",
+    window: Literal["all", "hour", "day", "week"] = "all",
+    if_none_match: Optional[str] = Header(None)
 ):
-    entries = db.get_leaderboard(mode=mode, limit=limit, offset=offset)
-    total = db.get_total_scores(mode=mode)
-    return {"data": entries, "total": total}
+    if window != "all" and view == "best":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="view=best is only available for window=all"
+        )
+    cached = None
+    if view == "all" and window == "all":
+        # Top pages come prebuilt from the background snapshot, deeper ones from the index
+        cached = top_snapshots.page(mode, limit, offset)
+    if cached is None:
+        # Windowed pages also change when a bucket rolls over, so its start is part of the key
+        since = window_start(window) if window != "all" else None
+        key = (mode, limit, offset, view, window, since)
+        cached = leaderboard_cache.get(key)
+    if cached is None:
+        version = leaderboard_cache.version
+        if window != "all":
+            entries = await async_db.get_leaderboard(mode=mode, limit=limit, offset=offset, window=window)
+            total = await async_db.get_total_scores(mode=mode, window=window)
+        elif view == "best":
+            entries = await async_db.get_best_scores(mode=mode, limit=limit, offset=offset)
+            total = await async_db.get_total_players(mode=mode)
+        else:
+            entries = await async_db.get_leaderboard(mode=mode, limit=limit, offset=offset)
+            total = await async_db.get_total_scores(mode=mode)
+        body = ModelResponse(LeaderboardPage(data=entries, total=total)).body
+        cached = leaderboard_cache.put(key, body, version)
+
+    headers = {"ETag": cached.etag, "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, cached.etag):
+        not_modified.inc()
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
 
-@router.post("/submit", response_model=LeaderboardEntry, status_code=status.HTTP_201_CREATED)
+@router.get("/export", response_class=StreamingResponse, dependencies=[Depends(get_admin_user)])
+async def export_scores(compress: Literal["none", "gzip"] = "none"):
+    """Every score as NDJSON, streamed in batches; see ``app.bulk``."""
+    return export_response(db, "scores", compress == "gzip")
+
+@router.get("/me", response_model=PersonalBest)
+async def get_my_best(
+    mode: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    entry = await async_db.get_personal_best(str(current_user.id), mode=mode)
+    if entry is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No scores submitted yet"
+        )
+    return ModelResponse(PersonalBest(entry=entry, players=await async_db.get_total_players(mode=mode)))
+
+@router.get("/verifications/{session_id}", response_model=ScoreVerification)
+async def get_verification(session_id: str):
+    result = verifier.status(session_id)
+    if result is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No submission for this session"
+        )
+    return ModelResponse(result)
+
+@router.post(
+    "/submit",
+    response_model=LeaderboardEntry,
+    status_code=status.HTTP_201_CREATED,
+    responses={202: {"model": ScoreVerification, "description": "Queued until the session's replay is verified"}},
+    dependencies=[Depends(limiter.dependency("score_submit"))]
+)
 async def submit_score(
     score_data: ScoreSubmit,
     current_user: User = Depends(get_current_user)
 ):
+    if score_data.sessionId is None and config.REQUIRE_REPLAY:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="sessionId is required"
+        )
     entry = LeaderboardEntry(
         id=uuid4(),
         userId=current_user.id,
@@ -36,4 +129,25 @@ async def submit_score(
         duration=score_data.duration,
         timestamp=datetime.now(timezone.utc)
     )
-    return db.add_score(entry)
+    if score_data.sessionId is None:
+        return ModelResponse(await async_db.add_score(entry), status_code=status.HTTP_201_CREATED)
+
+    session_id = str(score_data.sessionId)
+    session = await async_db.get_session(session_id)
+    if session is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
+    if str(session.userId) != str(current_user.id):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authorized to submit this session")
+    if session.isActive:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Session has not ended")
+    if session.mode != score_data.mode:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Mode does not match the session")
+    # Claimed when the replay reaches the same score, and the entry is ranked
+    pending = verifier.status(session_id)
+    log = await async_db.get_replay(session_id, unclaimed=True)
+    if log is None or (pending is not None and pending.status == "pending"):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Session has no replay or was already submitted"
+        )
+    return ModelResponse(verifier.submit(entry, session_id, log), status_code=status.HTTP_202_ACCEPTED)
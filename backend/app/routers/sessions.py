@@ -1,37 +1,226 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from typing import List
+import asyncio
+import json
+import logging
+import secrets
+from collections import OrderedDict
+from contextlib import asynccontextmanager, nullcontext
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from starlette.websockets import WebSocketState
+from typing import Dict, List, Literal
 from uuid import uuid4
 from datetime import datetime, timezone
 
+from .. import config
 from ..models import (
-    GameSession, GameSessionDetails, SessionStart, SessionEnd, SessionUpdate, User
+    ActiveSessionsPage, GameSession, GameSessionDetails, SessionStart, SessionEnd, SessionUpdate, SessionDelta,
+    SessionDeltaAck, SessionInput, User
 )
-from ..db import db
-from ..auth import get_current_user
+from ..bulk import export_response
+from ..rules import MODES, max_moves
+from ..replay import end_record, header, record
+from ..deltas import SnapshotRequired, apply_delta, check_sequence
+from ..db import async_db, db
+from ..auth import get_admin_user, get_current_user
+from ..rate_limit import limiter
+from ..write_buffer import session_buffer
+from ..pubsub import broker, ACTIVE_TOPIC, session_topic, topic_session_id, Subscription
+from ..simulation import idle_ended, simulation
+from ..responses import ModelResponse
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(
     prefix="/sessions",
     tags=["Game Sessions"],
 )
 
-@router.get("/active", response_model=dict)
+def publish_session(session: GameSessionDetails, event: str):
+    # Serialize once per publish and only when someone is watching
+    topic = session_topic(str(session.id))
+    if broker.subscriber_count(topic):
+        broker.publish(topic, session.model_dump_json())
+    if broker.subscriber_count(ACTIVE_TOPIC):
+        summary = session.model_dump(mode="json", exclude={"gameState"})
+        broker.publish(ACTIVE_TOPIC, json.dumps({"type": event, "session": summary}))
+    if event == "end":
+        broker.close_topic(topic)
+
+# Sessions with an input log append, a delta or a resync in flight, with the number of
+# callers using each lock, and the sessions whose log recently got its end record
+_session_locks: Dict[str, list] = {}
+_closed_replays: "OrderedDict[str, None]" = OrderedDict()
+MAX_CLOSED_REPLAYS = 10000
+
+@asynccontextmanager
+async def session_lock(session_id: str):
+    """Serialize work on one session across awaits; the lock is dropped when unused."""
+    entry = _session_locks.setdefault(session_id, [asyncio.Lock(), 0])
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            yield
+    finally:
+        entry[1] -= 1
+        if not entry[1]:
+            del _session_locks[session_id]
+
+async def append_replay(session_id: str, data: bytes, close: bool = False):
+    """Append ``data`` to the session's input log through ``async_db``.
+
+    The storage pool may run appends on several threads, so each waits for
+    the previous one of its session: they land in the order the loop saw
+    them. Once the end record is queued (``close``), later appends are
+    dropped, so an input racing the end can't land after it.
+    """
+    if session_id in _closed_replays:
+        return
+    if close:
+        _closed_replays[session_id] = None
+        while len(_closed_replays) > MAX_CLOSED_REPLAYS:
+            _closed_replays.popitem(last=False)
+    async with session_lock(session_id):
+        await async_db.append_replay(session_id, data)
+
+async def end_simulated_session(session_id: str) -> GameSessionDetails:
+    score = simulation.score(session_id)
+    moves = simulation.moves(session_id)
+    game_state = simulation.game_state(session_id)
+    # Taken out of the simulation before awaiting, so no input is recorded after the end
+    simulation.finish(session_id)
+    await append_replay(session_id, end_record(moves), close=True)
+    updated_session = await session_buffer.end(session_id, {
+        "isActive": False,
+        "score": score,
+        "currentScore": score,
+        "gameState": game_state,
+    })
+    publish_session(updated_session, "end")
+    return updated_session
+
+async def step_simulation():
+    moved, ended = simulation.step()
+    # Only spectated games are serialized per tick; the active feed gets start/end events
+    watched = [topic_session_id(topic) for topic in broker.topics()]
+    for session_id in simulation.moved_among([s for s in watched if s], moved):
+        session = simulation.overlay(await session_buffer.get(session_id))
+        if session is not None:
+            broker.publish(session_topic(session_id), session.model_dump_json())
+    for session_id in ended:
+        # Unless its player ended it while the loop was awaiting
+        if session_id in simulation:
+            await end_simulated_session(session_id)
+    # Abandoned games would otherwise keep their slot (passthrough never crashes)
+    for session_id in simulation.idle():
+        if session_id in simulation:
+            idle_ended.inc()
+            await end_simulated_session(session_id)
+
+async def end_simulated_sessions():
+    # Nothing can reach a game once its worker stops, so it ends with the score it has
+    for session_id in list(simulation):
+        try:
+            await end_simulated_session(session_id)
+        except Exception:
+            logger.exception("Ending simulated session %s failed", session_id)
+
+async def run_simulation(interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await step_simulation()
+        except Exception:
+            logger.exception("Stepping simulated games failed")
+
+async def pump(websocket: WebSocket, subscription: Subscription):
+    # Watch for the client going away while we wait for frames
+    async def watch_disconnect():
+        try:
+            while True:
+                await websocket.receive_text()
+        except WebSocketDisconnect:
+            subscription.close()
+
+    watcher = asyncio.create_task(watch_disconnect())
+    try:
+        async for frame in subscription:
+            await websocket.send_text(frame)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        watcher.cancel()
+        subscription.close()
+
+@router.websocket("/active/stream")
+async def stream_active_sessions(websocket: WebSocket, limit: int = 10):
+    await websocket.accept()
+    with broker.subscribe(ACTIVE_TOPIC) as subscription:
+        sessions = session_buffer.overlay(await async_db.get_active_sessions(limit=min(max(limit, 1), 100)))
+        sessions = [simulation.overlay(s) for s in sessions]
+        await websocket.send_text(json.dumps({
+            "type": "snapshot",
+            "data": [s.model_dump(mode="json", exclude={"gameState"}) for s in sessions],
+        }))
+        await pump(websocket, subscription)
+
+@router.websocket("/{session_id}/stream")
+async def stream_session(websocket: WebSocket, session_id: str):
+    session = simulation.overlay(await session_buffer.get(session_id))
+    if not session:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Session not found")
+        return
+    await websocket.accept()
+    with broker.subscribe(session_topic(session_id)) as subscription:
+        await websocket.send_text(session.model_dump_json())
+        if session.isActive:
+            await pump(websocket, subscription)
+    if websocket.client_state == WebSocketState.CONNECTED:
+        await websocket.close()
+
+@router.get("/active", response_model=ActiveSessionsPage)
 async def get_active_sessions(limit: int = Query(10, ge=1, le=100)):
-    sessions = db.get_active_sessions(limit=limit)
-    return {"data": sessions, "total": len(sessions)} # Total might be inaccurate in real DB pagination but fine for mock
+    sessions = session_buffer.overlay(await async_db.get_active_sessions(limit=limit))
+    sessions = [simulation.overlay(s) for s in sessions]
+    return ModelResponse(ActiveSessionsPage(data=sessions, total=len(sessions))) # Total might be inaccurate in real DB pagination but fine for mock
+
+@router.get("/export", response_class=StreamingResponse, dependencies=[Depends(get_admin_user)])
+async def export_sessions(compress: Literal["none", "gzip"] = "none"):
+    """Every stored session as NDJSON, streamed in batches; see ``app.bulk``."""
+    return export_response(db, "sessions", compress == "gzip")
 
 @router.get("/{session_id}", response_model=GameSessionDetails)
 async def get_session(session_id: str):
-    session = db.get_session(session_id)
+    session = simulation.overlay(await session_buffer.get(session_id))
     if not session:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
-    return session
+    return ModelResponse(session)
+
+@router.get(
+    "/{session_id}/replay",
+    response_class=Response,
+    responses={200: {"content": {"application/octet-stream": {}}, "description": "Binary input log (app/replay.py)"}}
+)
+async def get_session_replay(session_id: str):
+    data = await async_db.get_replay(session_id)
+    if data is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Replay not found")
+    return Response(content=data, media_type="application/octet-stream")
 
 @router.post("/start", response_model=GameSessionDetails, status_code=status.HTTP_201_CREATED)
 async def start_session(
     session_data: SessionStart,
     current_user: User = Depends(get_current_user)
 ):
+    if session_data.authoritative and not config.AUTHORITATIVE_SESSIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Server-authoritative sessions are disabled on this server"
+        )
+    if session_data.authoritative and session_data.mode not in MODES:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown game mode: {session_data.mode}")
     session_id = uuid4()
+    # Games in a known mode are recorded so their score can be verified by replay
+    seed = secrets.randbits(32) if session_data.mode in MODES else None
     new_session = GameSessionDetails(
         id=session_id,
         userId=current_user.id,
@@ -40,9 +229,88 @@ async def start_session(
         isActive=True,
         mode=session_data.mode,
         startedAt=datetime.now(timezone.utc),
-        currentScore=0
+        currentScore=0,
+        authoritative=session_data.authoritative,
+        seed=seed
     )
-    return db.create_session(new_session)
+    session = await async_db.create_session(new_session)
+    if seed is not None:
+        await async_db.append_replay(str(session_id), header(session.mode, seed))
+    if session.authoritative:
+        simulation.start(str(session_id), session.mode, seed)
+        session = simulation.overlay(session)
+    publish_session(session, "start")
+    return ModelResponse(session, status_code=status.HTTP_201_CREATED)
+
+async def get_owned_session(session_id: str, current_user: User, action: str) -> GameSessionDetails:
+    session = await session_buffer.get(session_id)
+    if not session:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
+    
+    # Verify user owns the session
+    if str(session.userId) != str(current_user.id):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=f"Not authorized to {action} this session")
+    return session
+
+def simulated_here(session: GameSessionDetails) -> bool:
+    """Whether this worker runs the session's game.
+
+    An authoritative game only lives in the worker that started it, until it
+    ends. Anywhere else it answers 409 rather than falling back to the
+    client-run paths, which would take the client's score or log its inputs.
+    """
+    if str(session.id) in simulation:
+        return True
+    if session.authoritative:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Session is simulated by another worker, or has ended"
+        )
+    return False
+
+def reject_simulated(session: GameSessionDetails):
+    if simulated_here(session):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Session is simulated by the server; send direction inputs to /input"
+        )
+
+def check_moves(session: GameSessionDetails, moves: int):
+    """Reject a client-reported move count the session's age can't account for.
+
+    The count ends up in the input log, and replaying it costs one engine
+    step per move, so it is held to what the fastest game speed allows.
+    """
+    started = session.startedAt
+    if started.tzinfo is None:
+        started = started.replace(tzinfo=timezone.utc)
+    elapsed = (datetime.now(timezone.utc) - started).total_seconds() * 1000
+    if moves > max_moves(elapsed):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="More moves than the session has had time for"
+        )
+
+@router.post("/{session_id}/input", status_code=status.HTTP_204_NO_CONTENT)
+async def send_session_input(
+    session_id: str,
+    session_input: SessionInput,
+    current_user: User = Depends(get_current_user)
+):
+    session = await get_owned_session(session_id, current_user, "steer")
+    if simulated_here(session):
+        # Recorded at the move count it is applied at, before anything awaits
+        data = record(simulation.moves(session_id), session_input.direction)
+        simulation.steer(session_id, session_input.direction)
+        await append_replay(session_id, data)
+        return
+    # Client-run games only record the input, at the move count the client reports
+    if not session.isActive or session.seed is None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Session is not recording inputs")
+    if session_input.tick is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="tick is required for client-run sessions")
+    check_moves(session, session_input.tick)
+    await append_replay(session_id, record(session_input.tick, session_input.direction))
 
 @router.post("/{session_id}/end", response_model=GameSessionDetails)
 async def end_session(
@@ -50,13 +318,13 @@ async def end_session(
     end_data: SessionEnd,
     current_user: User = Depends(get_current_user)
 ):
-    session = db.get_session(session_id)
-    if not session:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
-    
-    # Verify user owns the session
-    if str(session.userId) != str(current_user.id):
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authorized to end this session")
+    session = await get_owned_session(session_id, current_user, "end")
+    if simulated_here(session):
+        # The server's score stands; the client's finalScore is ignored
+        return ModelResponse(await end_simulated_session(session_id))
+    if session.isActive and session.seed is not None and end_data.ticks is not None:
+        check_moves(session, end_data.ticks)
+        await append_replay(session_id, end_record(end_data.ticks), close=True)
         
     updates = {
         "isActive": False,
@@ -64,29 +332,66 @@ async def end_session(
         "currentScore": end_data.finalScore
     }
     
-    updated_session = db.update_session(session_id, updates)
-    return updated_session
+    updated_session = await session_buffer.end(session_id, updates)
+    publish_session(updated_session, "end")
+    return ModelResponse(updated_session)
 
-@router.patch("/{session_id}/update", response_model=GameSessionDetails)
+@router.patch(
+    "/{session_id}/update", response_model=GameSessionDetails,
+    dependencies=[Depends(limiter.dependency("session_update"))]
+)
 async def update_session(
     session_id: str,
     update_data: SessionUpdate,
     current_user: User = Depends(get_current_user)
 ):
-    session = db.get_session(session_id)
-    if not session:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
-        
-    # Verify user owns the session
-    if str(session.userId) != str(current_user.id):
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authorized to update this session")
-    
-    updates = update_data.model_dump(exclude_unset=True)
-    if update_data.gameState is not None:
-        updates["gameState"] = update_data.gameState
-        
-    if updates:
-        updated_session = db.update_session(session_id, updates)
-        return updated_session
-        
-    return session
+    # A snapshot or seq reset takes the lock deltas hold, so a delta read
+    # before the resync can't be written after it
+    resync = update_data.gameState is not None or update_data.seq is not None
+    async with session_lock(session_id) if resync else nullcontext():
+        session = await get_owned_session(session_id, current_user, "update")
+        reject_simulated(session)
+
+        updates = update_data.model_dump(exclude_unset=True)
+        if update_data.gameState is not None:
+            updates["gameState"] = update_data.gameState
+
+        if updates:
+            updated_session = await session_buffer.update(session_id, updates)
+            publish_session(updated_session, "update")
+            return ModelResponse(updated_session)
+
+    return ModelResponse(session)
+
+@router.patch(
+    "/{session_id}/delta", response_model=SessionDeltaAck,
+    dependencies=[Depends(limiter.dependency("session_update"))]
+)
+async def apply_session_delta(
+    session_id: str,
+    delta: SessionDelta,
+    current_user: User = Depends(get_current_user)
+):
+    # Duplicate or stale deltas are acknowledged without being applied. A gap
+    # answers 409 with the expected seq; the client then resends a full
+    # snapshot (with seq) to /update. The session is read, checked and
+    # updated under its lock, so two deltas with the same seq can't both apply.
+    async with session_lock(session_id):
+        session = await get_owned_session(session_id, current_user, "update")
+        reject_simulated(session)
+        try:
+            if not check_sequence(session.seq, delta):
+                return ModelResponse(SessionDeltaAck(seq=session.seq))
+            game_state = apply_delta(session.gameState, delta, session.seq)
+        except SnapshotRequired as exc:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail={"message": exc.reason, "expectedSeq": exc.expected_seq}
+            )
+
+        updates = {"gameState": game_state, "seq": delta.seq}
+        if delta.currentScore is not None:
+            updates["currentScore"] = delta.currentScore
+        updated_session = await session_buffer.update(session_id, updates)
+    publish_session(updated_session, "update")
+    return ModelResponse(SessionDeltaAck(seq=updated_session.seq))
@@ -0,0 +1,25 @@
+"""Snake rules and constants from frontend/src/lib/gameLogic.ts.
+
+Kept apart from ``app.engine`` so the routes and the replay log format can
+use them without importing NumPy.
+"""
+GRID_SIZE = 20
+CELLS = GRID_SIZE * GRID_SIZE
+INITIAL_SPEED = 150
+# Fastest interval between moves, reached at 500 points
+MIN_SPEED = 50
+FOOD_SCORE = 10
+
+DIRECTIONS = ("UP", "DOWN", "LEFT", "RIGHT")
+DIRECTION_CODES = {name: code for code, name in enumerate(DIRECTIONS)}
+MODES = ("walls", "passthrough")
+
+
+def game_speed(score: int) -> int:
+    """Milliseconds between ticks, as getGameSpeed in the frontend."""
+    return max(MIN_SPEED, INITIAL_SPEED - (score // 50) * 10)
+
+
+def max_moves(elapsed_ms: float) -> int:
+    """Most moves a game can have made in ``elapsed_ms``, even at top speed."""
+    return max(0, int(elapsed_ms // MIN_SPEED))
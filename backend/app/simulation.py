@@ -0,0 +1,126 @@
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Optional, Tuple
+
+from . import config, metrics
+from .models import GameSessionDetails, GameState
+
+if TYPE_CHECKING:
+    import numpy as np
+
+    from .engine import SnakeEngine
+
+tick_seconds = metrics.histogram("simulation_tick_seconds", "Time spent advancing all simulated games once")
+simulated_games = metrics.gauge("simulation_games", "Server-authoritative games in progress")
+idle_ended = metrics.counter("simulation_idle_games_ended_total", "Server-authoritative games ended for lack of input")
+
+
+class Simulation:
+    """Server-authoritative sessions backed by one SnakeEngine.
+
+    Maps session ids to engine slots. The engine owns the game state; the
+    stored session is only refreshed when the game ends, and reads overlay
+    the live state on top of it. The engine, and NumPy with it, is created
+    with ``capacity`` slots when the first game starts. Games are kept in
+    order of their last input, so the ones idle for ``idle_timeout``
+    seconds are found without scanning the rest.
+    """
+
+    def __init__(self, capacity: int, idle_timeout: float = 0, clock: Callable[[], float] = time.monotonic):
+        self.capacity = capacity
+        self.idle_timeout = idle_timeout
+        self._engine: Optional["SnakeEngine"] = None
+        self._clock = clock
+        self._slots: Dict[str, int] = {}
+        self._sessions: Dict[int, str] = {}
+        self._last_input: "OrderedDict[str, float]" = OrderedDict()
+
+    @property
+    def engine(self) -> "SnakeEngine":
+        if self._engine is None:
+            from .engine import SnakeEngine
+            self._engine = SnakeEngine(capacity=self.capacity)
+        return self._engine
+
+    def _now(self) -> float:
+        return self._clock() * 1000
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._slots
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._slots)
+
+    def start(self, session_id: str, mode: str, seed: Optional[int] = None):
+        slot = self.engine.spawn(mode, now=self._now(), seed=seed)
+        self._slots[session_id] = slot
+        self._sessions[slot] = session_id
+        self._last_input[session_id] = self._clock()
+        simulated_games.set(len(self._slots))
+
+    def steer(self, session_id: str, direction: str):
+        self.engine.steer(self._slots[session_id], direction)
+        self._last_input[session_id] = self._clock()
+        self._last_input.move_to_end(session_id)
+
+    def moves(self, session_id: str) -> int:
+        return self.engine.moves(self._slots[session_id])
+
+    def score(self, session_id: str) -> int:
+        return self.engine.score(self._slots[session_id])
+
+    def game_state(self, session_id: str) -> GameState:
+        return GameState(**self.engine.state(self._slots[session_id]))
+
+    def overlay(self, session: Optional[GameSessionDetails]) -> Optional[GameSessionDetails]:
+        if session is None or str(session.id) not in self._slots:
+            return session
+        session_id = str(session.id)
+        return session.model_copy(update={
+            "gameState": self.game_state(session_id),
+            "currentScore": self.score(session_id),
+            "authoritative": True,
+        })
+
+    def finish(self, session_id: str):
+        slot = self._slots.pop(session_id, None)
+        if slot is not None:
+            del self._sessions[slot]
+            del self._last_input[session_id]
+            self.engine.remove(slot)
+            simulated_games.set(len(self._slots))
+
+    def step(self) -> Tuple["np.ndarray", List[str]]:
+        """Advance every due game; returns the moved slots and the ids of games that just ended."""
+        if self._engine is None:
+            return (), []
+        start = time.perf_counter()
+        moved, ended = self.engine.tick(self._now())
+        tick_seconds.observe(time.perf_counter() - start)
+        return moved, [self._sessions[slot] for slot in ended.tolist()]
+
+    def idle(self) -> List[str]:
+        """Ids of the games without an input for ``idle_timeout`` seconds, longest idle first."""
+        if self.idle_timeout <= 0:
+            return []
+        cutoff = self._clock() - self.idle_timeout
+        idle = []
+        for session_id, last_input in self._last_input.items():
+            if last_input > cutoff:
+                break
+            idle.append(session_id)
+        return idle
+
+    def moved_among(self, session_ids: List[str], moved: "np.ndarray") -> List[str]:
+        """The given sessions whose games advanced in the step that returned ``moved``."""
+        slots = {self._slots[session_id]: session_id for session_id in session_ids if session_id in self._slots}
+        if not slots or not len(moved):
+            return []
+        moved = set(moved.tolist())
+        return [session_id for slot, session_id in slots.items() if slot in moved]
+
+
+simulation = Simulation(capacity=config.SIMULATION_CAPACITY, idle_timeout=config.SIMULATION_IDLE_TIMEOUT)
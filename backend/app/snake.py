@@ -0,0 +1,114 @@
+from array import array
+from itertools import chain
+from operator import itemgetter
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+from pydantic import GetCoreSchemaHandler
+from pydantic_core import core_schema
+
+# Dead slots at the tail end of the buffer that trigger compaction
+COMPACT_THRESHOLD = 64
+
+_xy = itemgetter("x", "y")
+
+
+class SnakeBody:
+    """Snake segments packed into a signed 16-bit coordinate buffer.
+
+    Coordinates are stored tail-first as flat ``x, y`` pairs, so moving the
+    head is an append and dropping the tail only advances ``_start``; the
+    dead prefix is compacted once it outgrows the live part. That makes
+    both ends O(1) amortized, and a segment costs 4 bytes instead of a dict
+    with two boxed ints. The API still sees the usual ``[{"x": .., "y": ..}]``
+    list, produced only when the model is serialized.
+    """
+
+    __slots__ = ("_coords", "_start")
+
+    def __init__(self, segments: Iterable[Tuple[int, int]] = ()):
+        # segments are given head first, as in the JSON shape
+        flat = []
+        for x, y in segments:
+            flat.append(y)
+            flat.append(x)
+        flat.reverse()
+        self._coords = array("h", flat)
+        self._start = 0
+
+    @classmethod
+    def from_segments(cls, segments: List[Dict[str, int]]) -> "SnakeBody":
+        body = cls()
+        try:
+            body._coords = array("h", list(chain.from_iterable(map(_xy, reversed(segments)))))
+        except OverflowError:
+            raise ValueError("snake coordinates must fit in a signed 16-bit integer")
+        return body
+
+    def to_segments(self) -> List[Dict[str, int]]:
+        return [{"x": x, "y": y} for x, y in self]
+
+    def __len__(self) -> int:
+        return (len(self._coords) - self._start) // 2
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        coords = self._coords
+        for i in range(len(coords) - 2, self._start - 1, -2):
+            yield coords[i], coords[i + 1]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, SnakeBody):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"SnakeBody({list(self)!r})"
+
+    @property
+    def head(self) -> Tuple[int, int]:
+        if not len(self):
+            raise IndexError("empty snake")
+        return self._coords[-2], self._coords[-1]
+
+    def push_head(self, x: int, y: int):
+        try:
+            self._coords.append(x)
+        except OverflowError:
+            raise ValueError("snake coordinates must fit in a signed 16-bit integer")
+        try:
+            self._coords.append(y)
+        except OverflowError:
+            self._coords.pop()
+            raise ValueError("snake coordinates must fit in a signed 16-bit integer")
+
+    def pop_tail(self) -> Tuple[int, int]:
+        if not len(self):
+            raise IndexError("pop from empty snake")
+        start = self._start
+        tail = self._coords[start], self._coords[start + 1]
+        self._start = start + 2
+        if self._start >= COMPACT_THRESHOLD and self._start * 2 >= len(self._coords):
+            del self._coords[: self._start]
+            self._start = 0
+        return tail
+
+    def copy(self) -> "SnakeBody":
+        body = SnakeBody()
+        body._coords = self._coords[self._start :]
+        return body
+
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source: Any, handler: GetCoreSchemaHandler) -> core_schema.CoreSchema:
+        segment = core_schema.typed_dict_schema({
+            "x": core_schema.typed_dict_field(core_schema.int_schema()),
+            "y": core_schema.typed_dict_field(core_schema.int_schema()),
+        })
+        from_json = core_schema.no_info_after_validator_function(
+            cls.from_segments, core_schema.list_schema(segment)
+        )
+        return core_schema.json_or_python_schema(
+            json_schema=from_json,
+            python_schema=core_schema.union_schema([core_schema.is_instance_schema(cls), from_json]),
+            serialization=core_schema.plain_serializer_function_ser_schema(
+                lambda body: body.to_segments(), return_schema=core_schema.list_schema(segment)
+            ),
+        )
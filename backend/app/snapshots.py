@@ -0,0 +1,147 @@
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from . import metrics
+from .models import LeaderboardEntry, LeaderboardPage
+from .response_cache import CachedResponse, cached_response
+from .responses import ModelResponse
+from .rules import MODES
+from .storage import AsyncStorage
+
+logger = logging.getLogger(__name__)
+
+served = metrics.counter("leaderboard_snapshot_hits_total", "GET /leaderboard pages served from a top-k snapshot")
+fallbacks = metrics.counter(
+    "leaderboard_snapshot_fallbacks_total",
+    "Top-k GET /leaderboard pages read live because the snapshot was missing or too stale",
+)
+rebuilds = metrics.counter("leaderboard_snapshot_rebuilds_total", "Top-k snapshot rebuilds")
+rebuild_seconds = metrics.histogram("leaderboard_snapshot_rebuild_seconds", "Time to rebuild every top-k snapshot")
+snapshot_age = metrics.gauge("leaderboard_snapshot_age_seconds", "Seconds since the top-k snapshots were built")
+snapshot_lag = metrics.gauge(
+    "leaderboard_snapshot_staleness_seconds",
+    "Seconds since the oldest score the top-k snapshots leave out (0 when current)",
+)
+
+# Page sizes rendered when a snapshot is built; others are rendered on first request
+PRERENDERED_LIMITS = (10, 25, 50, 100)
+
+
+class Snapshot:
+    """Immutable top ``len(entries)`` of one scope, with its rendered pages."""
+
+    def __init__(self, entries: List[LeaderboardEntry], total: int):
+        self.entries = entries
+        self.total = total
+        self._pages: Dict[Tuple[int, int], CachedResponse] = {}
+
+    def page(self, limit: int, offset: int) -> CachedResponse:
+        # At most size^2 / 2 distinct pages fit in a snapshot, so the memo is bounded
+        cached = self._pages.get((limit, offset))
+        if cached is None:
+            page = LeaderboardPage(data=self.entries[offset:offset + limit], total=self.total)
+            cached = self._pages[(limit, offset)] = cached_response(ModelResponse(page).body)
+        return cached
+
+
+class TopSnapshots:
+    """Top-``size`` leaderboard pages per mode, rebuilt off the request path.
+
+    Every score change marks the snapshots dirty and wakes ``run``, which
+    waits for ``debounce`` seconds without changes (but never past half of
+    ``max_staleness``) and rebuilds all of them at once. ``page`` serves a
+    pre-rendered page when it lies within the top ``size`` and the oldest
+    change the snapshot misses is less than ``max_staleness`` seconds old;
+    otherwise it returns None and the caller reads the live index. Until
+    ``run`` has built a snapshot, every request falls back. The global board
+    has a snapshot from the start and each of ``rules.MODES`` once it is
+    requested; any other ``mode`` is always read live.
+    """
+
+    def __init__(
+        self, storage: AsyncStorage, size: int, debounce: float, max_staleness: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.storage = storage
+        self.size = size
+        self.debounce = debounce
+        self.max_staleness = max_staleness
+        self._clock = clock
+        self._snapshots: Dict[Optional[str], Snapshot] = {}
+        self._scopes: List[Optional[str]] = [None]
+        self._built_at: Optional[float] = None
+        self._version = 0
+        self._dirty_since: Optional[float] = None
+        self._last_change = 0.0
+        self._wakeup: Optional[asyncio.Event] = None
+        snapshot_age.set_function(lambda: self._seconds_since(self._built_at))
+        snapshot_lag.set_function(lambda: self._seconds_since(self._dirty_since))
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0
+
+    def _seconds_since(self, moment: Optional[float]) -> float:
+        return round(self._clock() - moment, 3) if moment is not None else 0
+
+    def invalidate(self, *_):
+        now = self._clock()
+        self._version += 1
+        self._last_change = now
+        if self._dirty_since is None:
+            self._dirty_since = now
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def page(self, mode: Optional[str], limit: int, offset: int) -> Optional[CachedResponse]:
+        scope = mode or None
+        if offset + limit > self.size or (scope is not None and scope not in MODES):
+            return None
+        snapshot = self._snapshots.get(scope)
+        stale = self._dirty_since is not None and self._clock() - self._dirty_since >= self.max_staleness
+        if snapshot is None or stale:
+            if scope not in self._scopes:
+                self._scopes.append(scope)
+                self.invalidate()
+            fallbacks.inc()
+            return None
+        served.inc()
+        return snapshot.page(limit, offset)
+
+    async def rebuild(self):
+        version, started = self._version, self._clock()
+        start = time.perf_counter()
+        snapshots = {}
+        for scope in list(self._scopes):
+            entries = await self.storage.get_leaderboard(mode=scope, limit=self.size)
+            total = await self.storage.get_total_scores(mode=scope)
+            snapshot = snapshots[scope] = Snapshot(entries, total)
+            for limit in PRERENDERED_LIMITS:
+                if limit <= self.size:
+                    snapshot.page(limit, 0)
+        self._snapshots = snapshots
+        self._built_at = self._clock()
+        # Reads began after every change before ``started``; one that landed
+        # mid-rebuild may be missing, so the snapshot is dirty from then on
+        self._dirty_since = None if self._version == version else started
+        rebuilds.inc()
+        rebuild_seconds.observe(time.perf_counter() - start)
+
+    async def run(self):
+        self._wakeup = asyncio.Event()
+        self._wakeup.set()
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            # Let a burst of scores settle, but rebuild well within the staleness bound
+            dirty_since = self._dirty_since if self._dirty_since is not None else self._clock()
+            deadline = dirty_since + self.max_staleness / 2
+            while (delay := min(self._last_change + self.debounce, deadline) - self._clock()) > 0:
+                await asyncio.sleep(delay)
+            self._wakeup.clear()
+            try:
+                await self.rebuild()
+            except Exception:
+                logger.exception("Rebuilding leaderboard snapshots failed")
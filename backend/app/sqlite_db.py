@@ -0,0 +1,611 @@
+import json
+import queue
+import sqlite3
+from contextlib import contextmanager
+import time
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from .models import User, LeaderboardEntry, GameSessionDetails
+from .ranking import window_start
+from .storage import Storage, DuplicateUserError, normalize_email
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    username TEXT NOT NULL,
+    email TEXT NOT NULL,
+    email_normalized TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    hashed_password TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_users_username ON users (username);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_users_email ON users (email_normalized);
+
+CREATE TABLE IF NOT EXISTS leaderboard (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    user_id TEXT NOT NULL,
+    username TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    mode TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    duration INTEGER
+);
+{leaderboard_indexes};
+
+-- Each user's best leaderboard row per mode, and overall under scope ''
+CREATE TABLE IF NOT EXISTS best_scores (
+    user_id TEXT NOT NULL,
+    scope TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    PRIMARY KEY (user_id, scope)
+);
+CREATE INDEX IF NOT EXISTS idx_best_scores_scope_score ON best_scores (scope, score DESC, seq);
+
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    username TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    is_active INTEGER NOT NULL,
+    mode TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    current_score INTEGER NOT NULL,
+    game_state TEXT,
+    last_updated_at TEXT,
+    seq INTEGER NOT NULL DEFAULT 0,
+    seed INTEGER,
+    -- Simulated by the worker that started it (app/simulation.py)
+    authoritative INTEGER NOT NULL DEFAULT 0,
+    -- COALESCE(last_updated_at, started_at), stored so the active feed can use an index
+    recency TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_active_recency ON sessions (is_active, recency DESC);
+
+-- Append-only input logs (app/replay.py); claimed once the session's score is verified and ranked
+CREATE TABLE IF NOT EXISTS replays (
+    session_id TEXT PRIMARY KEY,
+    data BLOB NOT NULL,
+    claimed INTEGER NOT NULL DEFAULT 0
+);
+
+-- Change counters that let each worker notice writes made by the others
+CREATE TABLE IF NOT EXISTS versions (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO versions (name, value) VALUES ('users', 0), ('scores', 0), ('revocations', 0);
+
+CREATE TABLE IF NOT EXISTS revoked_tokens (
+    token TEXT PRIMARY KEY,
+    expires_at REAL NOT NULL
+);
+"""
+
+# Dropped and rebuilt around bulk imports
+LEADERBOARD_INDEXES = {
+    "idx_leaderboard_score": "CREATE INDEX IF NOT EXISTS idx_leaderboard_score ON leaderboard (score DESC, seq)",
+    "idx_leaderboard_mode_score": (
+        "CREATE INDEX IF NOT EXISTS idx_leaderboard_mode_score ON leaderboard (mode, score DESC, seq)"
+    ),
+    "idx_leaderboard_timestamp": "CREATE INDEX IF NOT EXISTS idx_leaderboard_timestamp ON leaderboard (timestamp)",
+    "idx_leaderboard_mode_timestamp": (
+        "CREATE INDEX IF NOT EXISTS idx_leaderboard_mode_timestamp ON leaderboard (mode, timestamp, score DESC, seq)"
+    ),
+}
+SCHEMA = SCHEMA.format(leaderboard_indexes=";\n".join(LEADERBOARD_INDEXES.values()))
+
+# Statements are module constants so every pooled connection reuses its
+# compiled copy from sqlite3's per-connection statement cache.
+INSERT_USER = (
+    "INSERT INTO users (id, username, email, email_normalized, created_at, hashed_password) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+UPDATE_USER = (
+    "UPDATE users SET username = ?, email = ?, email_normalized = ?, created_at = ?, hashed_password = ? "
+    "WHERE id = ?"
+)
+SELECT_USER = "SELECT id, username, email, created_at, hashed_password FROM users"
+INSERT_SCORE = (
+    "INSERT INTO leaderboard (id, user_id, username, score, mode, timestamp, duration) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+SELECT_SCORE = "SELECT seq, id, user_id, username, score, mode, timestamp, duration FROM leaderboard"
+COUNT_AHEAD = "SELECT COUNT(*) FROM leaderboard WHERE score > ? OR (score = ? AND seq < ?)"
+# Every score from the first to the last row of a mode page, in global order
+WALK_SCORES = "SELECT score, seq FROM leaderboard WHERE score <= ? AND score >= ? ORDER BY score DESC, seq"
+# A window's entries, read through the timestamp index and numbered in
+# board order; pages of one mode keep their ranks among every mode
+SELECT_WINDOW = (
+    # Materialized, so the planner filters by time first instead of walking
+    # all of history down the score index to skip the sort
+    "WITH recent AS MATERIALIZED (SELECT * FROM leaderboard WHERE timestamp >= ?) "
+    "SELECT seq, id, user_id, username, score, mode, timestamp, duration, position FROM ("
+    "  SELECT *, ROW_NUMBER() OVER (ORDER BY score DESC, seq) AS position FROM recent"
+    ") {where} ORDER BY position LIMIT ? OFFSET ?"
+)
+UPSERT_BEST = (
+    "INSERT INTO best_scores (user_id, scope, score, seq) VALUES (?, ?, ?, ?) "
+    "ON CONFLICT (user_id, scope) DO UPDATE SET score = excluded.score, seq = excluded.seq "
+    "WHERE excluded.score > best_scores.score"
+)
+SELECT_BEST = (
+    "SELECT l.seq, l.id, l.user_id, l.username, l.score, l.mode, l.timestamp, l.duration "
+    "FROM best_scores b JOIN leaderboard l ON l.seq = b.seq"
+)
+COUNT_BEST_AHEAD = (
+    "SELECT COUNT(*) FROM best_scores WHERE scope = ? AND (score > ? OR (score = ? AND seq < ?))"
+)
+# Each user's best row per mode and overall, ties going to the earlier run
+REBUILD_BEST = (
+    "INSERT INTO best_scores (user_id, scope, score, seq) "
+    "SELECT user_id, scope, score, seq FROM ("
+    "  SELECT user_id, {scope} AS scope, score, seq, "
+    "  ROW_NUMBER() OVER (PARTITION BY user_id, {scope} ORDER BY score DESC, seq) AS position FROM leaderboard"
+    ") WHERE position = 1"
+)
+BUMP_VERSION = "UPDATE versions SET value = value + 1 WHERE name = ? RETURNING value"
+SELECT_VERSIONS = "SELECT name, value FROM versions"
+UPSERT_SESSION = (
+    "INSERT OR REPLACE INTO sessions (id, user_id, username, score, is_active, mode, started_at, "
+    "current_score, game_state, last_updated_at, seq, seed, authoritative, recency) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+APPEND_REPLAY = (
+    "INSERT INTO replays (session_id, data) VALUES (?, ?) "
+    # || yields TEXT even for two blobs; the cast keeps the bytes as they are
+    "ON CONFLICT (session_id) DO UPDATE SET data = CAST(data || excluded.data AS BLOB)"
+)
+SELECT_SESSION = (
+    "SELECT id, user_id, username, score, is_active, mode, started_at, current_score, "
+    "game_state, last_updated_at, seq, seed, authoritative FROM sessions"
+)
+
+
+def _timestamp(value: Optional[datetime]) -> Optional[str]:
+    # Stored as UTC ISO-8601 so lexical order matches chronological order
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).isoformat()
+
+
+class ConnectionPool:
+    """Fixed-size pool of SQLite connections shared between threads."""
+
+    def __init__(self, path: str, size: int = 8):
+        self._connections: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        for _ in range(size):
+            conn = sqlite3.connect(path, check_same_thread=False, timeout=30, cached_statements=256)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._connections.put(conn)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self._connections.get()
+        try:
+            yield conn
+        finally:
+            self._connections.put(conn)
+
+    def close(self):
+        while not self._connections.empty():
+            self._connections.get_nowait().close()
+
+
+class SQLiteDB(Storage):
+    """Persistent storage backend on a WAL-mode SQLite database.
+
+    Several uvicorn workers can point at the same file; WAL lets readers
+    proceed while a single writer commits.
+    """
+
+    blocking = True
+
+    def __init__(self, path: str, pool_size: int = 8, seed: bool = True):
+        self.pool = ConnectionPool(path, size=pool_size)
+        with self.pool.connection() as conn:
+            conn.executescript(SCHEMA)
+            with conn:
+                # Workers start at the same time; only the one that claims the marker seeds
+                claimed = conn.execute("INSERT OR IGNORE INTO versions (name, value) VALUES ('seeded', 1)").rowcount
+                empty = conn.execute("SELECT COUNT(*) FROM users").fetchone()[0] == 0
+            self._seen = dict(conn.execute(SELECT_VERSIONS).fetchall())
+        if seed and claimed and empty:
+            self._seed_data()
+
+    def reset(self):
+        with self.pool.connection() as conn, conn:
+            conn.execute("DELETE FROM users")
+            conn.execute("DELETE FROM leaderboard")
+            conn.execute("DELETE FROM best_scores")
+            conn.execute("DELETE FROM sessions")
+            conn.execute("DELETE FROM replays")
+            conn.execute("DELETE FROM revoked_tokens")
+            # An emptied database is seeded again on the next start, as before
+            conn.execute("DELETE FROM versions WHERE name = 'seeded'")
+            self._bump(conn, "users")
+            self._bump(conn, "scores")
+        self._user_changed(None)
+        self._scores_changed(None)
+
+    # Shared state
+    def _bump(self, conn: sqlite3.Connection, name: str):
+        value = conn.execute(BUMP_VERSION, (name,)).fetchone()[0]
+        # Our own write has already notified our listeners; a bigger jump
+        # means another worker wrote too, and sync() still has to catch up.
+        if value == self._seen.get(name, 0) + 1:
+            self._seen[name] = value
+
+    def sync(self):
+        with self.pool.connection() as conn:
+            versions = conn.execute(SELECT_VERSIONS).fetchall()
+            changed = [name for name, value in versions if self._seen.get(name) != value]
+            if not changed:
+                return
+            self._seen.update(versions)
+            revoked = []
+            if "revocations" in changed:
+                revoked = conn.execute(
+                    "SELECT token, expires_at FROM revoked_tokens WHERE expires_at > ?", (time.time(),)
+                ).fetchall()
+        if "users" in changed:
+            self._user_changed(None)
+        if "scores" in changed:
+            self._scores_changed(None)
+        for token, expires_at in revoked:
+            self._notify("revocation", token, expires_at)
+
+    def revoke_token(self, token: str, expires_at: float):
+        with self.pool.connection() as conn, conn:
+            conn.execute("DELETE FROM revoked_tokens WHERE expires_at <= ?", (time.time(),))
+            conn.execute("INSERT OR REPLACE INTO revoked_tokens (token, expires_at) VALUES (?, ?)", (token, expires_at))
+            self._bump(conn, "revocations")
+
+    # The attribute-style accessors mirror MockDB so code that resets the DB
+    # by assignment (the test fixtures do) works against either backend.
+    @property
+    def users(self) -> Dict[str, User]:
+        with self.pool.connection() as conn:
+            return {row[0]: self._user(row) for row in conn.execute(SELECT_USER)}
+
+    @users.setter
+    def users(self, users: Dict[str, User]):
+        with self.pool.connection() as conn, conn:
+            conn.execute("DELETE FROM users")
+            self._bump(conn, "users")
+        for user in users.values():
+            self.create_user(user)
+        self._user_changed(None)
+
+    @property
+    def leaderboard(self) -> List[LeaderboardEntry]:
+        return self.get_leaderboard(limit=-1)
+
+    @leaderboard.setter
+    def leaderboard(self, entries: Iterable[LeaderboardEntry]):
+        with self.pool.connection() as conn, conn:
+            conn.execute("DELETE FROM leaderboard")
+            conn.execute("DELETE FROM best_scores")
+            self._bump(conn, "scores")
+        self.import_scores(entries)
+
+    @property
+    def sessions(self) -> Dict[str, GameSessionDetails]:
+        with self.pool.connection() as conn:
+            return {row[0]: self._session(row) for row in conn.execute(SELECT_SESSION)}
+
+    @sessions.setter
+    def sessions(self, sessions: Dict[str, GameSessionDetails]):
+        with self.pool.connection() as conn, conn:
+            conn.execute("DELETE FROM sessions")
+            conn.execute("DELETE FROM replays")
+        for session in sessions.values():
+            self.create_session(session)
+
+    # Users
+    @staticmethod
+    def _user(row) -> User:
+        return User(
+            id=row[0], username=row[1], email=row[2],
+            createdAt=datetime.fromisoformat(row[3]), hashed_password=row[4]
+        )
+
+    @staticmethod
+    def _user_params(user: User) -> tuple:
+        return (
+            user.username, user.email, normalize_email(user.email),
+            _timestamp(user.createdAt), user.hashed_password
+        )
+
+    @staticmethod
+    def _duplicate(exc: sqlite3.IntegrityError) -> DuplicateUserError:
+        field = "username" if "users.username" in str(exc) else "email"
+        return DuplicateUserError(field)
+
+    def _fetch_user(self, where: str, value: str) -> Optional[User]:
+        with self.pool.connection() as conn:
+            row = conn.execute(f"{SELECT_USER} WHERE {where} = ?", (value,)).fetchone()
+        return self._user(row) if row else None
+
+    def get_user_by_email(self, email: str) -> Optional[User]:
+        return self._fetch_user("email_normalized", normalize_email(email))
+
+    def get_user_by_username(self, username: str) -> Optional[User]:
+        return self._fetch_user("username", username)
+
+    def get_user(self, user_id: str) -> Optional[User]:
+        return self._fetch_user("id", user_id)
+
+    def create_user(self, user: User) -> User:
+        try:
+            with self.pool.connection() as conn, conn:
+                conn.execute(INSERT_USER, (str(user.id),) + self._user_params(user))
+        except sqlite3.IntegrityError as exc:
+            raise self._duplicate(exc) from exc
+        return user
+
+    def update_user(self, user_id: str, updates: dict) -> Optional[User]:
+        user = self.get_user(user_id)
+        if user is None:
+            return None
+        updated = user.model_copy(update=updates)
+        try:
+            with self.pool.connection() as conn, conn:
+                conn.execute(UPDATE_USER, self._user_params(updated) + (user_id,))
+                self._bump(conn, "users")
+        except sqlite3.IntegrityError as exc:
+            raise self._duplicate(exc) from exc
+        self._user_changed(user)
+        return updated
+
+    def delete_user(self, user_id: str) -> Optional[User]:
+        user = self.get_user(user_id)
+        if user is not None:
+            with self.pool.connection() as conn, conn:
+                conn.execute("DELETE FROM users WHERE id = ?", (user_id,))
+                self._bump(conn, "users")
+            self._user_changed(user)
+        return user
+
+    # Leaderboard
+    @staticmethod
+    def _entry(row, rank: int) -> LeaderboardEntry:
+        return LeaderboardEntry(
+            id=row[1], userId=row[2], username=row[3], score=row[4], mode=row[5],
+            timestamp=datetime.fromisoformat(row[6]), duration=row[7], rank=rank
+        )
+
+    @staticmethod
+    def _rank(conn: sqlite3.Connection, score: int, seq: int) -> int:
+        return conn.execute(COUNT_AHEAD, (score, score, seq)).fetchone()[0] + 1
+
+    def _global_ranks(self, conn: sqlite3.Connection, rows: list) -> List[int]:
+        # One count for the first row of a mode page, then a single walk of
+        # the global index to its last row numbers everything in between
+        first, last = rows[0], rows[-1]
+        rank = self._rank(conn, first[4], first[0])
+        wanted = {row[0] for row in rows}
+        ranks = {}
+        for score, seq in conn.execute(WALK_SCORES, (first[4], last[4])):
+            if score == first[4] and seq < first[0]:
+                continue
+            if seq in wanted:
+                ranks[seq] = rank
+                if seq == last[0]:
+                    break
+            rank += 1
+        return [ranks[row[0]] for row in rows]
+
+    def add_score(self, entry: LeaderboardEntry) -> LeaderboardEntry:
+        with self.pool.connection() as conn:
+            with conn:
+                cursor = conn.execute(INSERT_SCORE, (
+                    str(entry.id), str(entry.userId), entry.username, entry.score,
+                    entry.mode, _timestamp(entry.timestamp), entry.duration
+                ))
+                seq = cursor.lastrowid
+                user_id = str(entry.userId)
+                conn.execute(UPSERT_BEST, (user_id, entry.mode, entry.score, seq))
+                conn.execute(UPSERT_BEST, (user_id, "", entry.score, seq))
+                self._bump(conn, "scores")
+            # Counted after the commit: the count walks every higher score,
+            # and workers would otherwise queue behind it for the write lock
+            rank = self._rank(conn, entry.score, seq)
+        ranked = entry.model_copy(update={"rank": rank})
+        self._scores_changed(ranked)
+        return ranked
+
+    def iter_scores(self, batch_size: int = 1000) -> Iterator[LeaderboardEntry]:
+        # Keyset pages over the primary key; the connection goes back to the pool between pages
+        last = 0
+        while True:
+            with self.pool.connection() as conn:
+                rows = conn.execute(f"{SELECT_SCORE} WHERE seq > ? ORDER BY seq LIMIT ?", (last, batch_size)).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield self._entry(row, None)
+            last = rows[-1][0]
+
+    def import_scores(self, entries: Iterable[LeaderboardEntry], batch_size: int = 10000) -> int:
+        entries = iter(entries)
+        added = 0
+        with self.pool.connection() as conn, conn:
+            conn.execute("BEGIN IMMEDIATE")
+            # Inserting into indexed tables costs a B-tree update per row and
+            # index; building each index once afterwards is a single sort
+            for name in LEADERBOARD_INDEXES:
+                conn.execute(f"DROP INDEX IF EXISTS {name}")
+            while batch := list(islice(entries, batch_size)):
+                conn.executemany(INSERT_SCORE, [
+                    (str(entry.id), str(entry.userId), entry.username, entry.score,
+                     entry.mode, _timestamp(entry.timestamp), entry.duration)
+                    for entry in batch
+                ])
+                added += len(batch)
+            for statement in LEADERBOARD_INDEXES.values():
+                conn.execute(statement)
+            conn.execute("DELETE FROM best_scores")
+            conn.execute(REBUILD_BEST.format(scope="mode"))
+            conn.execute(REBUILD_BEST.format(scope="''"))
+            self._bump(conn, "scores")
+        self._scores_changed(None)
+        return added
+
+    def get_leaderboard(
+        self, mode: Optional[str] = None, limit: int = 100, offset: int = 0, window: Optional[str] = None
+    ) -> List[LeaderboardEntry]:
+        if window:
+            # Windows are bounded by time, so numbering all of one costs the
+            # same whatever the offset, and no rank walks older history
+            since = _timestamp(window_start(window))
+            query = SELECT_WINDOW.format(where="WHERE mode = ?" if mode else "")
+            params = (since, mode, limit, offset) if mode else (since, limit, offset)
+            with self.pool.connection() as conn:
+                rows = conn.execute(query, params).fetchall()
+            return [self._entry(row, row[8]) for row in rows]
+        with self.pool.connection() as conn, conn:
+            if not mode:
+                rows = conn.execute(
+                    f"{SELECT_SCORE} ORDER BY score DESC, seq LIMIT ? OFFSET ?", (limit, offset)
+                ).fetchall()
+                return [self._entry(row, offset + i + 1) for i, row in enumerate(rows)]
+            # One snapshot for the page and the ranks counted around it
+            conn.execute("BEGIN")
+            rows = conn.execute(
+                f"{SELECT_SCORE} WHERE mode = ? ORDER BY score DESC, seq LIMIT ? OFFSET ?", (mode, limit, offset)
+            ).fetchall()
+            if not rows:
+                return []
+            # Ranks are global across modes, as with MockDB
+            return [self._entry(row, rank) for row, rank in zip(rows, self._global_ranks(conn, rows))]
+
+    def get_total_scores(self, mode: Optional[str] = None, window: Optional[str] = None) -> int:
+        since = _timestamp(window_start(window)) if window else ""
+        with self.pool.connection() as conn:
+            if mode:
+                # A range of idx_leaderboard_mode_timestamp, counted without reading the table
+                return conn.execute(
+                    "SELECT COUNT(*) FROM leaderboard WHERE mode = ? AND timestamp >= ?", (mode, since)
+                ).fetchone()[0]
+            return conn.execute("SELECT COUNT(*) FROM leaderboard WHERE timestamp >= ?", (since,)).fetchone()[0]
+
+    def get_best_scores(self, mode: Optional[str] = None, limit: int = 100, offset: int = 0) -> List[LeaderboardEntry]:
+        with self.pool.connection() as conn:
+            rows = conn.execute(
+                f"{SELECT_BEST} WHERE b.scope = ? ORDER BY b.score DESC, b.seq LIMIT ? OFFSET ?",
+                (mode or "", limit, offset)
+            ).fetchall()
+        return [self._entry(row, offset + i + 1) for i, row in enumerate(rows)]
+
+    def get_total_players(self, mode: Optional[str] = None) -> int:
+        with self.pool.connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM best_scores WHERE scope = ?", (mode or "",)).fetchone()[0]
+
+    def get_personal_best(self, user_id: str, mode: Optional[str] = None) -> Optional[LeaderboardEntry]:
+        scope = mode or ""
+        with self.pool.connection() as conn:
+            row = conn.execute(f"{SELECT_BEST} WHERE b.scope = ? AND b.user_id = ?", (scope, user_id)).fetchone()
+            if row is None:
+                return None
+            ahead = conn.execute(COUNT_BEST_AHEAD, (scope, row[4], row[4], row[0])).fetchone()[0]
+        return self._entry(row, ahead + 1)
+
+    # Sessions
+    @staticmethod
+    def _session(row) -> GameSessionDetails:
+        return GameSessionDetails(
+            id=row[0], userId=row[1], username=row[2], score=row[3], isActive=bool(row[4]),
+            mode=row[5], startedAt=datetime.fromisoformat(row[6]), currentScore=row[7],
+            gameState=json.loads(row[8]) if row[8] else None,
+            lastUpdatedAt=datetime.fromisoformat(row[9]) if row[9] else None,
+            seq=row[10], seed=row[11], authoritative=bool(row[12]),
+        )
+
+    @staticmethod
+    def _save_session(conn: sqlite3.Connection, session: GameSessionDetails):
+        game_state = session.model_dump(mode="json", include={"gameState"}, warnings=False)["gameState"]
+        conn.execute(UPSERT_SESSION, (
+            str(session.id), str(session.userId), session.username, session.score,
+            int(session.isActive), session.mode, _timestamp(session.startedAt),
+            session.currentScore, json.dumps(game_state) if game_state is not None else None,
+            _timestamp(session.lastUpdatedAt), session.seq, session.seed, int(session.authoritative),
+            _timestamp(session.lastUpdatedAt or session.startedAt),
+        ))
+
+    def create_session(self, session: GameSessionDetails) -> GameSessionDetails:
+        with self.pool.connection() as conn, conn:
+            self._save_session(conn, session)
+        return session
+
+    def get_session(self, session_id: str) -> Optional[GameSessionDetails]:
+        with self.pool.connection() as conn:
+            row = conn.execute(f"{SELECT_SESSION} WHERE id = ?", (session_id,)).fetchone()
+        return self._session(row) if row else None
+
+    def get_active_sessions(self, limit: int = 10) -> List[GameSessionDetails]:
+        with self.pool.connection() as conn:
+            rows = conn.execute(
+                f"{SELECT_SESSION} WHERE is_active = 1 ORDER BY recency DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [self._session(row) for row in rows]
+
+    def iter_sessions(self, batch_size: int = 1000) -> Iterator[GameSessionDetails]:
+        last = ""
+        while True:
+            with self.pool.connection() as conn:
+                rows = conn.execute(f"{SELECT_SESSION} WHERE id > ? ORDER BY id LIMIT ?", (last, batch_size)).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield self._session(row)
+            last = rows[-1][0]
+
+    def import_sessions(self, sessions: Iterable[GameSessionDetails]) -> int:
+        imported = 0
+        with self.pool.connection() as conn, conn:
+            for session in sessions:
+                self._save_session(conn, session)
+                imported += 1
+        return imported
+
+    def update_session(self, session_id: str, updates: dict) -> Optional[GameSessionDetails]:
+        with self.pool.connection() as conn, conn:
+            # Take the write lock before reading so concurrent updates can't interleave
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(f"{SELECT_SESSION} WHERE id = ?", (session_id,)).fetchone()
+            if row is None:
+                return None
+            session = self._session(row)
+            for key, value in updates.items():
+                if hasattr(session, key):
+                    setattr(session, key, value)
+            session.lastUpdatedAt = datetime.now(timezone.utc)
+            self._save_session(conn, session)
+        return session
+
+    # Replays
+    def append_replay(self, session_id: str, data: bytes):
+        with self.pool.connection() as conn, conn:
+            conn.execute(APPEND_REPLAY, (session_id, data))
+
+    def get_replay(self, session_id: str, unclaimed: bool = False) -> Optional[bytes]:
+        query = "SELECT data FROM replays WHERE session_id = ?" + (" AND claimed = 0" if unclaimed else "")
+        with self.pool.connection() as conn:
+            row = conn.execute(query, (session_id,)).fetchone()
+        return bytes(row[0]) if row else None
+
+    def claim_replay(self, session_id: str) -> Optional[bytes]:
+        with self.pool.connection() as conn, conn:
+            # One statement, so two workers can't both claim the same log
+            row = conn.execute(
+                "UPDATE replays SET claimed = 1 WHERE session_id = ? AND claimed = 0 RETURNING data", (session_id,)
+            ).fetchone()
+        return bytes(row[0]) if row else None
@@ -0,0 +1,397 @@
+import asyncio
+import functools
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone, timedelta
+from time import perf_counter
+from typing import Callable, Iterable, Iterator, List, Optional
+from uuid import uuid4
+
+from . import metrics
+from .models import User, LeaderboardEntry, GameSessionDetails
+
+operation_seconds = metrics.histogram(
+    "storage_operation_seconds", "Time spent in each storage method",
+    buckets=metrics.FAST_BUCKETS, labels=("backend", "operation"),
+)
+
+
+class DuplicateUserError(ValueError):
+    """Raised when a user would share an email or username with another user."""
+
+    def __init__(self, field: str):
+        super().__init__(f"User with this {field} already exists")
+        self.field = field
+
+def normalize_email(email: str) -> str:
+    return email.strip().casefold()
+
+
+def _timed(method: Callable, histogram: metrics.Histogram) -> Callable:
+    observe = histogram.observe
+
+    @functools.wraps(method)
+    def timed(*args, **kwargs):
+        start = perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            observe(perf_counter() - start)
+
+    return timed
+
+
+# Set on AsyncStorage worker threads to the event loop that is waiting on them
+_caller = threading.local()
+
+
+class Storage(ABC):
+    """Repository interface shared by the storage backends.
+
+    Routers talk to ``app.db.async_db``, the awaitable view of ``app.db.db``,
+    which is whichever implementation ``config.STORAGE_BACKEND`` selects.
+
+    Backends also have ``users``, ``leaderboard`` and ``sessions``
+    attributes, which the tests use to reset or seed the store. Reading one
+    returns every stored record: users and sessions by id, with ended
+    sessions included alongside active ones, and leaderboard entries in
+    rank order. Assigning one replaces the whole collection.
+    """
+
+    # Backends doing I/O set this, and AsyncStorage moves their calls off the loop
+    blocking = False
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Time every interface method the backend implements
+        for name in OPERATIONS:
+            method = cls.__dict__.get(name)
+            if method is not None:
+                setattr(cls, name, _timed(method, operation_seconds.labels(cls.__name__, name)))
+
+    def _listen(self, kind: str, callback: Callable):
+        self.__dict__.setdefault("_listeners", {}).setdefault(kind, []).append(callback)
+
+    def _notify(self, kind: str, *args):
+        # Listeners always run on the event loop; from a worker thread they are
+        # queued ahead of the result, so they have run when the caller resumes
+        loop = getattr(_caller, "loop", None)
+        for callback in self.__dict__.get("_listeners", {}).get(kind, ()):
+            if loop is None:
+                callback(*args)
+            else:
+                loop.call_soon_threadsafe(callback, *args)
+
+    def add_user_listener(self, callback: Callable[[Optional[User]], None]):
+        """Call ``callback(user)`` after a user is updated or deleted.
+
+        The callback receives the user as it was before the change, or None
+        when every user may have changed (e.g. after a reset).
+        """
+        self._listen("user", callback)
+
+    def _user_changed(self, user: Optional[User]):
+        self._notify("user", user)
+
+    def add_score_listener(self, callback: Callable[[Optional[LeaderboardEntry]], None]):
+        """Call ``callback(entry)`` after a score is added.
+
+        The callback receives None when the whole leaderboard was replaced.
+        """
+        self._listen("score", callback)
+
+    def _scores_changed(self, entry: Optional[LeaderboardEntry]):
+        self._notify("score", entry)
+
+    def add_revocation_listener(self, callback: Callable[[str, float], None]):
+        """Call ``callback(token, expires_at)`` for tokens revoked by another process."""
+        self._listen("revocation", callback)
+
+    # Shared state. The in-memory backend lives in a single process, where
+    # the listeners above already see every change, so these are no-ops.
+    # Backends shared between workers override them.
+    def sync(self):
+        """Fire listeners for changes other processes made since the last sync."""
+
+    def revoke_token(self, token: str, expires_at: float):
+        """Record a logged-out token for the other processes sharing this store."""
+
+    @abstractmethod
+    def reset(self):
+        """Remove all users, scores and sessions."""
+
+    # Users
+    @abstractmethod
+    def get_user_by_email(self, email: str) -> Optional[User]: ...
+
+    @abstractmethod
+    def get_user_by_username(self, username: str) -> Optional[User]: ...
+
+    @abstractmethod
+    def get_user(self, user_id: str) -> Optional[User]: ...
+
+    @abstractmethod
+    def create_user(self, user: User) -> User:
+        """Insert a user, raising DuplicateUserError if the email or username is taken."""
+
+    @abstractmethod
+    def update_user(self, user_id: str, updates: dict) -> Optional[User]: ...
+
+    @abstractmethod
+    def delete_user(self, user_id: str) -> Optional[User]: ...
+
+    # Leaderboard
+    @abstractmethod
+    def add_score(self, entry: LeaderboardEntry) -> LeaderboardEntry:
+        """Insert a score and return a copy carrying its rank."""
+
+    @abstractmethod
+    def get_leaderboard(
+        self, mode: Optional[str] = None, limit: int = 100, offset: int = 0, window: Optional[str] = None
+    ) -> List[LeaderboardEntry]:
+        """Score-ordered page; ``window`` (a key of ``ranking.WINDOWS``) limits it to recent entries."""
+
+    @abstractmethod
+    def get_total_scores(self, mode: Optional[str] = None, window: Optional[str] = None) -> int: ...
+
+    @abstractmethod
+    def get_best_scores(self, mode: Optional[str] = None, limit: int = 100, offset: int = 0) -> List[LeaderboardEntry]:
+        """Each user's best entry, ranked by position on the best-per-user board."""
+
+    @abstractmethod
+    def get_total_players(self, mode: Optional[str] = None) -> int: ...
+
+    @abstractmethod
+    def get_personal_best(self, user_id: str, mode: Optional[str] = None) -> Optional[LeaderboardEntry]:
+        """The user's best entry with its rank among every player's best."""
+
+    @abstractmethod
+    def iter_scores(self, batch_size: int = 1000) -> Iterator[LeaderboardEntry]:
+        """Every entry, without rank, read ``batch_size`` at a time.
+
+        Ties come out in submission order, so importing the stream again
+        reproduces the same ranks.
+        """
+
+    @abstractmethod
+    def import_scores(self, entries: Iterable[LeaderboardEntry]) -> int:
+        """Bulk ``add_score`` for new entries: indexes are built once for the
+        whole load instead of per entry. Returns the number of entries added.
+        """
+
+    # Sessions
+    @abstractmethod
+    def create_session(self, session: GameSessionDetails) -> GameSessionDetails: ...
+
+    @abstractmethod
+    def get_session(self, session_id: str) -> Optional[GameSessionDetails]: ...
+
+    @abstractmethod
+    def get_active_sessions(self, limit: int = 10) -> List[GameSessionDetails]: ...
+
+    @abstractmethod
+    def update_session(self, session_id: str, updates: dict) -> Optional[GameSessionDetails]: ...
+
+    @abstractmethod
+    def iter_sessions(self, batch_size: int = 1000) -> Iterator[GameSessionDetails]:
+        """Every stored session, active or ended, read ``batch_size`` at a time."""
+
+    @abstractmethod
+    def import_sessions(self, sessions: Iterable[GameSessionDetails]) -> int:
+        """Store many sessions at once; returns the number stored."""
+
+    # Replays
+    @abstractmethod
+    def append_replay(self, session_id: str, data: bytes):
+        """Append ``data`` to the session's input log, creating it if needed."""
+
+    @abstractmethod
+    def get_replay(self, session_id: str, unclaimed: bool = False) -> Optional[bytes]:
+        """The session's log; with ``unclaimed``, None once it was claimed."""
+
+    @abstractmethod
+    def claim_replay(self, session_id: str) -> Optional[bytes]:
+        """Mark the session's log as backing a ranked score and return it.
+
+        Returns None if there is no log or it was already claimed, so each
+        session backs at most one leaderboard entry.
+        """
+
+    def _seed_data(self):
+        # Fake data
+        # Common hash for 'password123'
+        pwd_hash = "$2b$12$tRNTpmIt9Qq5wghU0uyN0OIe3DcWnrom2JeCjMkYo735LK54RLgMe"
+        
+        # 1. Users
+        users_data = [
+            ("SnakeMaster", "snakemaster@example.com"),
+            ("NeonSlayer", "neon@example.com"),
+            ("ProGamer", "hacker@example.com")
+        ]
+        
+        created_users = []
+        for username, email in users_data:
+            u_id = uuid4()
+            user = User(
+                id=u_id,
+                username=username,
+                email=email,
+                createdAt=datetime.now(timezone.utc),
+                hashed_password=pwd_hash
+            )
+            self.create_user(user)
+            created_users.append(user)
+            
+        # 2. Leaderboard
+        # SnakeMaster is good at walls
+        self.add_score(LeaderboardEntry(
+            id=uuid4(), userId=created_users[0].id, username=created_users[0].username,
+            score=5000, mode="walls", duration=300, timestamp=datetime.now(timezone.utc) - timedelta(days=1)
+        ))
+        
+        # NeonSlayer is good at passthrough
+        self.add_score(LeaderboardEntry(
+            id=uuid4(), userId=created_users[1].id, username=created_users[1].username,
+            score=4500, mode="passthrough", duration=250, timestamp=datetime.now(timezone.utc) - timedelta(hours=2)
+        ))
+        
+        # ProGamer is okay
+        self.add_score(LeaderboardEntry(
+            id=uuid4(), userId=created_users[2].id, username=created_users[2].username,
+            score=3000, mode="walls", duration=180, timestamp=datetime.now(timezone.utc) - timedelta(days=2)
+        ))
+        
+        # 3. Active Session for NeonSlayer
+        s_id = uuid4()
+        session = GameSessionDetails(
+            id=s_id,
+            userId=created_users[1].id,
+            username=created_users[1].username,
+            score=1200,
+            isActive=True,
+            mode="walls",
+            startedAt=datetime.now(timezone.utc) - timedelta(minutes=5),
+            currentScore=1200,
+            gameState={"direction": "UP", "snake": [{"x": 10, "y": 10}], "food": {"x": 5, "y": 5}}
+        )
+        self.create_session(session)
+
+
+# Interface methods that do their work when called; the iter_* generators
+# only build an iterator, and exports drive them batch by batch
+OPERATIONS = tuple(sorted(name for name in Storage.__abstractmethods__ if not name.startswith("iter_"))) + (
+    "sync", "revoke_token",
+)
+
+
+class LazyStorage:
+    """Stands in for a storage backend that is created on first use.
+
+    ``app.db.db`` is one of these, so importing the app doesn't open the
+    database or write seed data: the lifespan calls ``open``, and anything
+    touching the store before that creates it then. Listeners added before
+    the backend exists are handed over to it; every other attribute is read
+    from, or set on, the backend.
+    """
+
+    def __init__(self, factory: Callable[[], Storage]):
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_storage", None)
+        object.__setattr__(self, "_listeners", [])
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    @property
+    def created(self) -> bool:
+        return self._storage is not None
+
+    def open(self) -> Storage:
+        """The backend, created (and seeded) by the first call."""
+        storage = self._storage
+        if storage is None:
+            with self._lock:
+                if self._storage is None:
+                    storage = self._factory()
+                    for kind, callback in self._listeners:
+                        storage._listen(kind, callback)
+                    object.__setattr__(self, "_storage", storage)
+                storage = self._storage
+        return storage
+
+    def _listen(self, kind: str, callback: Callable):
+        with self._lock:
+            if self._storage is None:
+                self._listeners.append((kind, callback))
+                return
+        self._storage._listen(kind, callback)
+
+    add_user_listener = Storage.add_user_listener
+    add_score_listener = Storage.add_score_listener
+    add_revocation_listener = Storage.add_revocation_listener
+
+    def __getattr__(self, name: str):
+        return getattr(self.open(), name)
+
+    def __setattr__(self, name: str, value):
+        setattr(self.open(), name, value)
+
+    def __delattr__(self, name: str):
+        delattr(self.open(), name)
+
+
+class AsyncStorage:
+    """Awaitable view of a storage backend.
+
+    Every method in ``OPERATIONS`` has a coroutine counterpart with the same
+    arguments. Calls to a ``blocking`` backend run on a pool of ``workers``
+    threads, so a slow query doesn't stall the event loop. The in-memory
+    backend answers in microseconds, much less than a thread hop, and runs
+    inline. The backend of a ``LazyStorage`` is resolved, and the pool
+    started, by the first call.
+    """
+
+    def __init__(self, storage: Storage, workers: int):
+        self.storage = storage
+        self.workers = workers
+        self._backend: Optional[Storage] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _open(self) -> Storage:
+        backend = self.storage.open() if isinstance(self.storage, LazyStorage) else self.storage
+        if backend.blocking:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="storage")
+        self._backend = backend
+        return backend
+
+    def _call_for(self, loop: asyncio.AbstractEventLoop, name: str, args: tuple, kwargs: dict):
+        _caller.loop = loop
+        try:
+            return getattr(self._backend, name)(*args, **kwargs)
+        finally:
+            _caller.loop = None
+
+    def shutdown(self):
+        # The next call starts a new pool, so the app can be started again
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        self._backend = None
+
+
+def _awaitable(name: str):
+    async def call(self: AsyncStorage, *args, **kwargs):
+        backend = self._backend
+        if backend is None:
+            backend = self._open()
+        if self._executor is None:
+            return getattr(backend, name)(*args, **kwargs)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._call_for, loop, name, args, kwargs)
+
+    call.__name__ = call.__qualname__ = name
+    call.__doc__ = f"Awaitable ``Storage.{name}``."
+    return call
+
+
+for _name in OPERATIONS:
+    setattr(AsyncStorage, _name, _awaitable(_name))
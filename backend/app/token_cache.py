@@ -0,0 +1,116 @@
+import heapq
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from . import metrics
+from .models import User
+
+hits = metrics.counter("token_cache_hits_total", "Authenticated requests served from the token cache")
+misses = metrics.counter("token_cache_misses_total", "Authenticated requests that decoded the JWT")
+
+
+class TokenCache:
+    """LRU cache of verified bearer tokens and the users they resolve to.
+
+    An entry lives until the token's ``exp`` claim or until it is evicted,
+    whichever comes first. Logged-out tokens are kept in a revocation set
+    until they would have expired anyway. Both sit in one heap by ``exp``,
+    and every ``put`` and ``revoke`` pops the expired ones off its top, so
+    memory follows the live tokens whatever ``max_size`` is; when the cache
+    is still full, the least recently used entry goes.
+    """
+
+    def __init__(self, max_size: int, clock: Callable[[], float] = time.time):
+        self.max_size = max_size
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[User, float]]" = OrderedDict()
+        self._tokens_by_user: Dict[str, Set[str]] = {}
+        self._expiry: List[Tuple[float, str]] = []
+        self._revoked: Dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, token: str) -> Optional[User]:
+        entry = self._entries.get(token)
+        if entry is None:
+            misses.inc()
+            return None
+        user, exp = entry
+        if exp <= self._clock():
+            self._discard(token)
+            misses.inc()
+            return None
+        self._entries.move_to_end(token)
+        hits.inc()
+        return user
+
+    def put(self, token: str, user: User, exp: float):
+        self._purge_expired()
+        if self.max_size <= 0:
+            return
+        self._discard(token)
+        while len(self._entries) >= self.max_size:
+            oldest = next(iter(self._entries))
+            self._discard(oldest)
+        self._entries[token] = (user, exp)
+        self._tokens_by_user.setdefault(user.username, set()).add(token)
+        self._push_expiry(exp, token)
+
+    def _push_expiry(self, exp: float, token: str):
+        heapq.heappush(self._expiry, (exp, token))
+        # Evicted and invalidated entries leave theirs behind until they expire;
+        # once those outnumber the live ones, rebuild the heap from the live ones
+        if len(self._expiry) > 2 * (len(self._entries) + len(self._revoked)) + 64:
+            self._expiry = [(exp, token) for token, (_, exp) in self._entries.items()]
+            self._expiry.extend((exp, token) for token, exp in self._revoked.items())
+            heapq.heapify(self._expiry)
+
+    def _discard(self, token: str):
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        tokens = self._tokens_by_user.get(entry[0].username)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[entry[0].username]
+
+    def _purge_expired(self):
+        now = self._clock()
+        while self._expiry and self._expiry[0][0] <= now:
+            exp, token = heapq.heappop(self._expiry)
+            entry = self._entries.get(token)
+            if entry is not None and entry[1] == exp:
+                self._discard(token)
+            if self._revoked.get(token) == exp:
+                del self._revoked[token]
+
+    def invalidate_user(self, user: Optional[User] = None):
+        """Drop cached tokens for ``user``, or every entry when user is None."""
+        if user is None:
+            self._entries.clear()
+            self._tokens_by_user.clear()
+            # Revocations still expire through the heap
+            self._expiry = [(exp, token) for token, exp in self._revoked.items()]
+            heapq.heapify(self._expiry)
+            return
+        for token in list(self._tokens_by_user.get(user.username, ())):
+            self._discard(token)
+
+    def revoke(self, token: str, exp: float):
+        self._purge_expired()
+        self._discard(token)
+        if exp > self._clock():
+            self._revoked[token] = exp
+            self._push_expiry(exp, token)
+
+    def is_revoked(self, token: str) -> bool:
+        exp = self._revoked.get(token)
+        if exp is None:
+            return False
+        if exp <= self._clock():
+            del self._revoked[token]
+            return False
+        return True
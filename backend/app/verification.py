@@ -0,0 +1,156 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor
+from typing import List, Optional, Sequence, Tuple
+
+from . import config, metrics
+from .db import async_db
+from .models import LeaderboardEntry, ScoreVerification
+from .replay import replay_scores
+from .storage import AsyncStorage
+
+logger = logging.getLogger(__name__)
+
+verified = metrics.counter("replays_verified_total", "Session-backed scores confirmed by replay and ranked")
+rejected = metrics.counter("replays_rejected_total", "Session-backed scores whose replay did not match")
+queue_depth = metrics.gauge("replay_queue_depth", "Submitted scores waiting for verification")
+batch_seconds = metrics.histogram("replay_batch_seconds", "Time spent replaying one batch of input logs")
+
+Job = Tuple[LeaderboardEntry, str, bytes]
+
+
+class ReplayVerifier:
+    """Ranks session-backed scores only once their input log replays to them.
+
+    Submissions wait in a queue with their log. ``run`` takes up to
+    ``batch_size`` at a time, splits the batch across a process pool (each
+    worker replays its share in one vectorized engine) and adds the entries
+    whose replayed score matches the claimed one to storage. Only then is
+    the session's log claimed, so a submission lost with the process (the
+    queue is in memory) can be made again. ``workers=0``
+    replays inline on the event loop; the pool is only started by the first
+    batch. The outcome of the last ``max_results`` submissions is kept for
+    ``status``. A pool broken by a dead worker is dropped and rebuilt for
+    the retry.
+    """
+
+    def __init__(self, storage: AsyncStorage, workers: int, batch_size: int, max_results: int = 10000):
+        self.storage = storage
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_results = max_results
+        self._queue: List[Job] = []
+        self._results: "OrderedDict[str, ScoreVerification]" = OrderedDict()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._executor: Optional[Executor] = None
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def submit(self, entry: LeaderboardEntry, session_id: str, log: bytes) -> ScoreVerification:
+        self._queue.append((entry, session_id, log))
+        queue_depth.set(len(self._queue))
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return self._record(session_id, entry, "pending")
+
+    def status(self, session_id: str) -> Optional[ScoreVerification]:
+        return self._results.get(session_id)
+
+    def _record(self, session_id: str, entry: LeaderboardEntry, status: str) -> ScoreVerification:
+        result = ScoreVerification(sessionId=session_id, score=entry.score, mode=entry.mode, status=status)
+        self._results[session_id] = result
+        self._results.move_to_end(session_id)
+        while len(self._results) > self.max_results:
+            self._results.popitem(last=False)
+        return result
+
+    def _take(self) -> List[Job]:
+        batch, self._queue = self._queue[:self.batch_size], self._queue[self.batch_size:]
+        queue_depth.set(len(self._queue))
+        return batch
+
+    async def _apply(self, batch: List[Job], scores: Sequence[Optional[int]]):
+        for (entry, session_id, _), score in zip(batch, scores):
+            # The claim fails if another worker ranked the same session first
+            if score is not None and score == entry.score and await self.storage.claim_replay(session_id):
+                await self.storage.add_score(entry)
+                verified.inc()
+                self._record(session_id, entry, "verified")
+            else:
+                rejected.inc()
+                self._record(session_id, entry, "rejected")
+
+    async def verify_pending(self) -> int:
+        """Replay everything queued, inline; returns the number of submissions handled."""
+        handled = 0
+        while self._queue:
+            batch = self._take()
+            start = time.perf_counter()
+            scores = replay_scores([log for _, _, log in batch])
+            batch_seconds.observe(time.perf_counter() - start)
+            await self._apply(batch, scores)
+            handled += len(batch)
+        return handled
+
+    def _pool(self) -> Executor:
+        if self._executor is None:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            # Workers only need app.replay; spawning avoids forking the server's threads
+            context = multiprocessing.get_context("spawn")
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+        return self._executor
+
+    async def _replay(self, logs: List[bytes]) -> List[Optional[int]]:
+        if self.workers <= 0:
+            return replay_scores(logs)
+        from concurrent.futures.process import BrokenProcessPool
+
+        executor = self._pool()
+        loop = asyncio.get_running_loop()
+        size = -(-len(logs) // self.workers)
+        try:
+            chunks = await asyncio.gather(*(
+                loop.run_in_executor(executor, replay_scores, logs[i:i + size])
+                for i in range(0, len(logs), size)
+            ))
+        except BrokenProcessPool:
+            # A dead worker breaks the pool for good; the retry starts a new one
+            if self._executor is executor:
+                self.shutdown()
+            raise
+        return [score for chunk in chunks for score in chunk]
+
+    async def run(self):
+        self._wakeup = asyncio.Event()
+        while True:
+            if not self._queue:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+            batch = self._take()
+            start = time.perf_counter()
+            try:
+                scores = await self._replay([log for _, _, log in batch])
+            except Exception:
+                logger.exception("Replaying submitted scores failed")
+                # Keep them queued for the next submission to retry
+                self._queue[:0] = batch
+                queue_depth.set(len(self._queue))
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            batch_seconds.observe(time.perf_counter() - start)
+            await self._apply(batch, scores)
+
+    def shutdown(self):
+        # The next batch starts a new pool
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+verifier = ReplayVerifier(async_db, workers=config.VERIFY_WORKERS, batch_size=config.VERIFY_BATCH_SIZE)
@@ -0,0 +1,124 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set, Tuple
+
+from . import config, metrics
+from .db import async_db
+from .models import GameSessionDetails
+from .storage import AsyncStorage
+
+logger = logging.getLogger(__name__)
+
+coalesced = metrics.counter("session_updates_coalesced_total", "Session updates merged into a pending write")
+flushed = metrics.counter("session_writes_flushed_total", "Buffered session writes sent to storage")
+pending_sessions = metrics.gauge("session_writes_pending", "Sessions with buffered, unflushed updates")
+
+
+class SessionWriteBuffer:
+    """Write-behind buffer for per-tick session updates.
+
+    Each session with unflushed updates has one pending copy in memory.
+    Further updates are merged into it, last write wins except
+    ``currentScore``, which keeps the maximum. Reads go through the buffer,
+    so clients and spectators see the latest state. Storage gets one write
+    per session per flush interval instead of one per tick.
+    ``flush_interval <= 0`` disables buffering and writes through. Storage
+    is awaited, so other requests can touch the buffer while a read or a
+    write is in flight.
+    """
+
+    def __init__(self, storage: AsyncStorage, flush_interval: float):
+        self.storage = storage
+        self.flush_interval = flush_interval
+        self._pending: Dict[str, Tuple[GameSessionDetails, Set[str]]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.flush_interval > 0
+
+    async def get(self, session_id: str) -> Optional[GameSessionDetails]:
+        entry = self._pending.get(session_id)
+        if entry is not None:
+            return entry[0]
+        return await self.storage.get_session(session_id)
+
+    def overlay(self, sessions: List[GameSessionDetails]) -> List[GameSessionDetails]:
+        """Replace stored sessions with their pending copies, if any."""
+        return [self._pending[str(s.id)][0] if str(s.id) in self._pending else s for s in sessions]
+
+    async def update(self, session_id: str, updates: dict) -> Optional[GameSessionDetails]:
+        if not self.enabled:
+            return await self.storage.update_session(session_id, updates)
+
+        entry = self._pending.get(session_id)
+        if entry is None:
+            stored = await self.storage.get_session(session_id)
+            if stored is None:
+                return None
+            # Another update may have buffered the session while this one read it
+            entry = self._pending.get(session_id)
+        if entry is not None:
+            session, fields = entry
+            coalesced.inc()
+        else:
+            # Deep copy so in-place changes (delta moves) never reach storage early
+            session, fields = stored.model_copy(deep=True), set()
+            self._pending[session_id] = (session, fields)
+            pending_sessions.set(len(self._pending))
+
+        for key, value in updates.items():
+            if not hasattr(session, key):
+                continue
+            if key == "currentScore" and value is not None:
+                value = max(session.currentScore, value)
+            setattr(session, key, value)
+            fields.add(key)
+        session.lastUpdatedAt = datetime.now(timezone.utc)
+        return session
+
+    async def flush(self, session_id: Optional[str] = None) -> int:
+        """Write pending updates to storage; returns the number of writes."""
+        session_ids = [session_id] if session_id is not None else list(self._pending)
+        written = 0
+        for pending_id in session_ids:
+            entry = self._pending.get(pending_id)
+            if entry is None or not entry[1]:
+                continue
+            session, fields = entry
+            # Reads keep seeing the pending copy during the write; updates
+            # made meanwhile go to a fresh field set, written next time
+            self._pending[pending_id] = (session, set())
+            try:
+                await self.storage.update_session(pending_id, {field: getattr(session, field) for field in fields})
+            except Exception:
+                # Kept, so a failed flush is retried next time
+                self._pending[pending_id][1].update(fields)
+                raise
+            if not self._pending[pending_id][1]:
+                del self._pending[pending_id]
+            written += 1
+        flushed.inc(written)
+        pending_sessions.set(len(self._pending))
+        return written
+
+    async def end(self, session_id: str, updates: dict) -> Optional[GameSessionDetails]:
+        # Ending is durable: what's pending is written with the end, before answering
+        entry = self._pending.pop(session_id, None)
+        pending_sessions.set(len(self._pending))
+        if entry is not None:
+            session, fields = entry
+            updates = {**{field: getattr(session, field) for field in fields}, **updates}
+            flushed.inc()
+        return await self.storage.update_session(session_id, updates)
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Flushing buffered session updates failed")
+
+
+session_buffer = SessionWriteBuffer(async_db, flush_interval=config.SESSION_FLUSH_INTERVAL)
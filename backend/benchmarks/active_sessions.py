@@ -0,0 +1,60 @@
+"""GET /sessions/active cost as ended-session history accumulates.
+
+Compares MockDB's recency index with the previous scan-filter-sort over
+every session ever created.
+
+    uv run python -m benchmarks.active_sessions --history 10000 100000 1000000
+"""
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+from app import config
+from app.db import MockDB
+from app.models import GameSessionDetails
+
+
+def legacy_active(sessions, limit):
+    active = [s for s in sessions.values() if s.isActive]
+    active.sort(key=lambda x: x.lastUpdatedAt or x.startedAt, reverse=True)
+    return active[:limit]
+
+
+def per_call(fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--history", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--active", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=100)
+    args = parser.parse_args()
+    config.SESSION_ARCHIVE_SIZE = 0
+
+    print(f"{'ended':>10} {'index us':>10} {'legacy us':>12}")
+    for history in args.history:
+        store = MockDB()
+        store.reset()
+        everything = {}
+        start = datetime.now(timezone.utc) - timedelta(days=1)
+        for i in range(history + args.active):
+            session = GameSessionDetails.model_construct(
+                id=uuid4(), userId=uuid4(), username="p", score=0, isActive=i >= history, mode="walls",
+                startedAt=start + timedelta(milliseconds=i), currentScore=0, gameState=None,
+                lastUpdatedAt=None, seq=0,
+            )
+            store.create_session(session)
+            everything[str(session.id)] = session
+
+        indexed = per_call(lambda: store.get_active_sessions(limit=args.limit), 200)
+        legacy = per_call(lambda: legacy_active(everything, args.limit), 5)
+        print(f"{history:>10,} {indexed * 1e6:>10.1f} {legacy * 1e6:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
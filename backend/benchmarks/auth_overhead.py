@@ -0,0 +1,50 @@
+"""Per-request cost of get_current_user with and without the token cache.
+
+    uv run python -m benchmarks.auth_overhead --iterations 50000
+"""
+import argparse
+import asyncio
+import time
+import warnings
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+from app import auth
+from app.db import db
+from app.models import User
+from app.token_cache import TokenCache
+
+
+async def measure(iterations, token):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await auth.get_current_user(token)
+    return (time.perf_counter() - start) / iterations
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=10000, help="registered users in the store")
+    args = parser.parse_args()
+    warnings.simplefilter("ignore")
+
+    db.reset()
+    now = datetime.now(timezone.utc)
+    for i in range(args.users):
+        db.create_user(User(id=uuid4(), username=f"user{i}", email=f"user{i}@example.com", createdAt=now))
+    token = auth.create_access_token({"sub": f"user{args.users - 1}"}, timedelta(minutes=30))
+
+    auth.token_cache = TokenCache(max_size=0)
+    uncached = await measure(args.iterations, token)
+    auth.token_cache = TokenCache(max_size=10000)
+    cached = await measure(args.iterations, token)
+
+    print(f"{'variant':<12} {'us/request':>12}")
+    print(f"{'no cache':<12} {uncached * 1e6:>12.2f}")
+    print(f"{'token cache':<12} {cached * 1e6:>12.2f}")
+    print(f"speedup: {uncached / cached:.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,99 @@
+"""Bulk import and streaming export rows/sec on the memory and SQLite backends.
+
+Writes N random leaderboard entries to a gzipped NDJSON file, then for
+each backend loads it with per-row ``add_score`` (on the first
+``--baseline-rows`` entries) and with ``import_scores``
+straight from the file, and streams it back out with ``export_chunks``.
+
+    uv run python -m benchmarks.bulk_import --rows 1000000
+"""
+import argparse
+import gzip
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from uuid import uuid4
+
+from app.bulk import export_chunks, gzip_chunks, import_stream, open_export, parse_lines
+from app.db import MockDB
+from app.models import LeaderboardEntry
+from app.sqlite_db import SQLiteDB
+
+
+def write_export(path, rows, players, seed):
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    users = [(uuid4(), f"player{i}") for i in range(players)]
+
+    def entries():
+        for _ in range(rows):
+            user_id, username = rng.choice(users)
+            yield LeaderboardEntry(
+                id=uuid4(), userId=user_id, username=username, score=rng.randrange(0, 100_000, 10),
+                mode=rng.choice(["walls", "passthrough"]), timestamp=now - timedelta(seconds=rng.randrange(0, 10**7)),
+                duration=rng.randrange(10, 600),
+            )
+
+    class Source:
+        def iter_scores(self, batch_size):
+            return entries()
+
+    with open(path, "wb") as out:
+        for chunk in gzip_chunks(export_chunks(Source(), "scores", batch_size=10_000)):
+            out.write(chunk)
+
+
+def make_store(backend, tmp):
+    if backend == "sqlite":
+        path = os.path.join(tmp, f"bulk-{uuid4().hex}.db")
+        return SQLiteDB(path, pool_size=2, seed=False)
+    store = MockDB()
+    store.reset()
+    return store
+
+
+def rate(rows, fn):
+    start = time.perf_counter()
+    fn()
+    return rows / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--baseline-rows", type=int, default=50_000, help="rows loaded one add_score at a time")
+    parser.add_argument("--players", type=int, default=50_000)
+    parser.add_argument("--backends", nargs="+", default=["memory", "sqlite"])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "scores.ndjson.gz")
+        write_export(path, args.rows, args.players, args.seed)
+        print(f"{args.rows} rows, {os.path.getsize(path) / 1e6:.1f} MB gzipped")
+        with gzip.open(path) as stream:
+            baseline = list(parse_lines("scores", islice(stream, args.baseline_rows)))
+        with open_export(path) as stream:
+            print(f"{'parse only':<24} {rate(args.rows, lambda: sum(1 for _ in parse_lines('scores', stream))):>12.0f} rows/s")
+
+        print(f"{'backend':<8} {'path':<15} {'rows/s':>12}")
+        for backend in args.backends:
+            store = make_store(backend, tmp)
+            per_row = rate(len(baseline), lambda: [store.add_score(entry) for entry in baseline])
+            print(f"{backend:<8} {'add_score':<15} {per_row:>12.0f}")
+
+            store = make_store(backend, tmp)
+            with open_export(path) as stream:
+                bulk = rate(args.rows, lambda: import_stream(store, "scores", stream))
+            assert store.get_total_scores() == args.rows
+            print(f"{backend:<8} {'import_scores':<15} {bulk:>12.0f}")
+
+            exported = rate(args.rows, lambda: sum(1 for _ in export_chunks(store, "scores", batch_size=1000)))
+            print(f"{backend:<8} {'export':<15} {exported:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
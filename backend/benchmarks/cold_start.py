@@ -0,0 +1,110 @@
+"""Worker cold start: import time by package and uvicorn time-to-first-request.
+
+Runs ``python -X importtime -c "import app.main"`` ``--runs`` times and
+reports the median time to import the app, with the packages that take
+the longest (self time, summed over their modules). Then starts
+``uvicorn app.main:app`` ``--runs`` times and times each from spawning the
+process to the first ``200`` from ``GET /leaderboard``, which includes the
+interpreter, the imports, the lifespan (storage creation and seeding) and
+the first request. A bare FastAPI app with one route is timed the same
+way, as the floor. The environment is passed through, so e.g.
+``SNAKE_STORAGE=sqlite`` or ``SNAKE_SEED_DATA=0`` apply.
+
+    uv run python -m benchmarks.cold_start --runs 10
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+import httpx
+
+BARE_APP = """
+from fastapi import FastAPI
+
+app = FastAPI()
+
+
+@app.get("/leaderboard")
+def leaderboard():
+    return []
+"""
+
+
+def import_times(module: str):
+    """Microseconds to import ``module`` and self time per top-level package, from ``-X importtime``."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"], capture_output=True, text=True, check=True,
+    )
+    total, packages = 0, defaultdict(int)
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        packages[name.split(".")[0]] += int(self_us)
+        if name == module:
+            total = int(cumulative_us)
+    return total, packages
+
+
+def first_request(app: str, port: int, env: dict, app_dir: str = ".", timeout: float = 30.0) -> float:
+    """Seconds from spawning uvicorn to its first successful response."""
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--app-dir", app_dir, "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+    try:
+        # Probing with bare connects: a full HTTP client per poll would take
+        # CPU away from the server it is timing on a small machine
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port)).close()
+                break
+            except OSError:
+                if time.perf_counter() - start > timeout:
+                    raise RuntimeError("server did not start")
+                time.sleep(0.005)
+        response = httpx.get(f"http://127.0.0.1:{port}/leaderboard", timeout=timeout)
+        response.raise_for_status()
+        return time.perf_counter() - start
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=12, help="packages listed by import time")
+    parser.add_argument("--port", type=int, default=8767)
+    args = parser.parse_args()
+
+    interpreter = statistics.median(import_times("site")[0] for _ in range(args.runs))
+    runs = [import_times("app.main") for _ in range(args.runs)]
+    print(f"interpreter (site)      {interpreter / 1000:8.1f} ms")
+    print(f"import app.main         {statistics.median(total for total, _ in runs) / 1000:8.1f} ms")
+    names = {name for _, packages in runs for name in packages}
+    medians = {name: statistics.median(packages.get(name, 0) for _, packages in runs) for name in names}
+    for name in sorted(medians, key=medians.get, reverse=True)[:args.top]:
+        print(f"  {name:<21} {medians[name] / 1000:8.1f} ms")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ)
+        env.setdefault("SNAKE_SQLITE_PATH", os.path.join(tmp, "cold_start.db"))
+        with open(os.path.join(tmp, "bare_app.py"), "w") as out:
+            out.write(BARE_APP)
+        for name, app, app_dir in [("bare FastAPI", "bare_app:app", tmp), ("app.main", "app.main:app", ".")]:
+            times = [first_request(app, args.port, env, app_dir) for _ in range(args.runs)]
+            print(f"first request {name:<13} {statistics.median(times) * 1000:8.1f} ms  "
+                  f"(min {min(times) * 1000:.1f}, max {max(times) * 1000:.1f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Payload size and validation cost: full game-state updates vs. deltas.
+
+    uv run python -m benchmarks.delta_updates --length 500
+"""
+import argparse
+import json
+import time
+
+from app.deltas import apply_delta
+from app.models import GameState, SessionDelta, SessionUpdate
+
+
+def per_call(fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--length", type=int, default=500, help="snake segments")
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+
+    snake = [{"x": i % 20, "y": i // 20} for i in range(args.length)]
+    full = json.dumps({
+        "currentScore": 1230,
+        "gameState": {"direction": "RIGHT", "snake": snake, "food": {"x": 3, "y": 4}},
+    }, separators=(",", ":"))
+    delta = json.dumps({"seq": 42, "head": {"x": 5, "y": 7}, "currentScore": 1230}, separators=(",", ":"))
+
+    full_validate = per_call(lambda: SessionUpdate.model_validate_json(full), args.iterations)
+    delta_validate = per_call(lambda: SessionDelta.model_validate_json(delta), args.iterations)
+    state = GameState(direction="RIGHT", snake=snake, food={"x": 3, "y": 4})
+    parsed = SessionDelta.model_validate_json(delta)
+    delta_apply = per_call(lambda: apply_delta(state, parsed, 41), args.iterations)
+
+    print(f"snake length: {args.length}")
+    print(f"{'format':<8} {'bytes':>8} {'validate us':>12} {'apply us':>10}")
+    print(f"{'full':<8} {len(full):>8} {full_validate * 1e6:>12.1f} {'-':>10}")
+    print(f"{'delta':<8} {len(delta):>8} {delta_validate * 1e6:>12.1f} {delta_apply * 1e6:>10.1f}")
+    print(f"bytes saved per tick: {1 - len(delta) / len(full):.1%}")
+
+
+if __name__ == "__main__":
+    main()
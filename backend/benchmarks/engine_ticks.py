@@ -0,0 +1,92 @@
+"""Engine steps per second for many concurrent server-authoritative games.
+
+Spawns N games in one ``SnakeEngine`` with staggered start times and
+random inputs, then steps the engine the way the background task does
+(every ``--interval`` ms of simulated time). Reports steps per second,
+game moves per second and the time one step takes, next to a plain Python
+loop over the same games using the frontend's per-game rules.
+
+    uv run python -m benchmarks.engine_ticks --games 1000 10000 50000
+"""
+import argparse
+import random
+import time
+
+from app.engine import DIRECTIONS, MODES, SnakeEngine
+
+
+def python_step(games, now):
+    # One dict per game, advanced one at a time: the shape of a per-session Python simulation
+    moved = 0
+    for game in games:
+        if game["over"] or game["due"] > now:
+            continue
+        x, y = game["snake"][0]
+        dx, dy = {"UP": (0, -1), "DOWN": (0, 1), "LEFT": (-1, 0), "RIGHT": (1, 0)}[game["direction"]]
+        x, y = (x + dx) % 20, (y + dy) % 20
+        if (x, y) in game["snake"][:-1]:
+            game["over"] = True
+            continue
+        game["snake"].insert(0, (x, y))
+        if (x, y) == game["food"]:
+            game["food"] = (random.randrange(20), random.randrange(20))
+        else:
+            game["snake"].pop()
+        game["due"] = now + 150
+        moved += 1
+    return moved
+
+
+def run_engine(games, steps, interval, seed):
+    rng = random.Random(seed)
+    engine = SnakeEngine(capacity=games, seed=seed)
+    slots = [engine.spawn(MODES[i % 2], now=rng.uniform(0, 150)) for i in range(games)]
+    now, moves, elapsed = 0.0, 0, 0.0
+    for _ in range(steps):
+        for slot in rng.sample(slots, max(1, games // 100)):
+            engine.steer(slot, rng.choice(DIRECTIONS))
+        now += interval
+        start = time.perf_counter()
+        moved, ended = engine.tick(now)
+        elapsed += time.perf_counter() - start
+        moves += len(moved)
+        # Keep the population steady, as new sessions replace finished ones
+        for slot in ended.tolist():
+            engine.remove(slot)
+            engine.spawn(MODES[slot % 2], now=now)
+    return steps / elapsed, moves / elapsed
+
+
+def run_python(games, steps, interval, seed):
+    rng = random.Random(seed)
+    state = [
+        {"snake": [(10, 10), (9, 10), (8, 10)], "direction": "RIGHT", "food": (rng.randrange(20), rng.randrange(20)),
+         "over": False, "due": rng.uniform(0, 150)}
+        for _ in range(games)
+    ]
+    now, moves = 0.0, 0
+    start = time.perf_counter()
+    for _ in range(steps):
+        now += interval
+        moves += python_step(state, now)
+    elapsed = time.perf_counter() - start
+    return steps / elapsed, moves / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, nargs="+", default=[1000, 10_000, 50_000])
+    parser.add_argument("--steps", type=int, default=300)
+    parser.add_argument("--interval", type=float, default=10.0, help="simulated ms between steps")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'games':>8} {'path':<8} {'steps/s':>10} {'ms/step':>9} {'moves/s':>12}")
+    for games in args.games:
+        for label, run in (("engine", run_engine), ("python", run_python)):
+            steps_per_second, moves_per_second = run(games, args.steps, args.interval, args.seed)
+            print(f"{games:>8} {label:<8} {steps_per_second:>10.0f} {1e3 / steps_per_second:>9.3f} {moves_per_second:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
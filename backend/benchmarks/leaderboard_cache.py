@@ -0,0 +1,102 @@
+"""GET /leaderboard throughput with and without the response cache.
+
+Runs the app in-process over httpx's ASGI transport. Clients read a handful
+of popular pages while a writer submits a score every ``--write-every``
+reads, once with the cache disabled, once enabled, once with clients
+revalidating through If-None-Match, and once with the top-k snapshot task
+running.
+
+    uv run python -m benchmarks.leaderboard_cache --entries 100000
+"""
+import argparse
+import asyncio
+import random
+import time
+import warnings
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import httpx
+
+from app.db import db
+from app.main import app
+from app.models import LeaderboardEntry
+from app.rate_limit import limiter
+from app.routers import leaderboard
+from app.snapshots import fallbacks, served
+
+USER = {"username": "cacheuser", "email": "cache@example.com", "password": "password123"}
+PAGES = [
+    "/leaderboard?limit=100",
+    "/leaderboard?limit=10",
+    "/leaderboard?mode=walls&limit=100",
+    "/leaderboard?mode=passthrough&limit=100",
+    "/leaderboard?limit=100&offset=100",
+]
+
+
+async def run(client, headers, requests, write_every, revalidate):
+    etags = {}
+    statuses = {}
+    start = time.perf_counter()
+    for i in range(requests):
+        if write_every and i and i % write_every == 0:
+            await client.post(
+                "/leaderboard/submit", headers=headers,
+                json={"score": random.randint(0, 100_000), "mode": random.choice(["walls", "passthrough"])},
+            )
+        page = random.choice(PAGES)
+        request_headers = {"If-None-Match": etags[page]} if revalidate and page in etags else {}
+        response = await client.get(page, headers=request_headers)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        etags[page] = response.headers["etag"]
+    return requests / (time.perf_counter() - start), statuses
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--write-every", type=int, default=100, help="reads per score submission; 0 for none")
+    args = parser.parse_args()
+    warnings.simplefilter("ignore")
+
+    random.seed(0)
+    db.reset()
+    now = datetime.now(timezone.utc)
+    db.leaderboard = [
+        LeaderboardEntry.model_construct(
+            id=uuid4(), userId=uuid4(), username=f"p{i}", score=random.randint(0, 100_000),
+            mode=random.choice(["walls", "passthrough"]), timestamp=now, rank=None, duration=None,
+        )
+        for i in range(args.entries)
+    ]
+    cache_size = leaderboard.leaderboard_cache.max_size or 256
+    # One user stands in for every writer, far above the per-user submit limit
+    limiter.rules = {}
+    snapshots = leaderboard.top_snapshots
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        signup = await client.post("/auth/signup", json=USER)
+        headers = {"Authorization": f"Bearer {signup.json()['token']}"}
+
+        print(f"{'variant':<14} {'req/s':>10}  statuses")
+        for name, size, revalidate in [("no cache", 0, False), ("cache", cache_size, False), ("cache + etag", cache_size, True)]:
+            leaderboard.leaderboard_cache.max_size = size
+            leaderboard.leaderboard_cache.invalidate()
+            rate, statuses = await run(client, headers, args.requests, args.write_every, revalidate)
+            print(f"{name:<14} {rate:>10.0f}  {statuses}")
+
+        if snapshots.enabled:
+            task = asyncio.create_task(snapshots.run())
+            await asyncio.sleep(snapshots.debounce * 2)
+            before = served.value, fallbacks.value
+            rate, statuses = await run(client, headers, args.requests, args.write_every, False)
+            task.cancel()
+            hits, misses = served.value - before[0], fallbacks.value - before[1]
+            print(f"{'snapshots':<14} {rate:>10.0f}  {statuses}  ({hits / max(hits + misses, 1):.0%} from snapshots)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,76 @@
+"""Score submission latency for the leaderboard store.
+
+Compares ``LeaderboardStore.add`` against the previous append + re-sort +
+re-rank implementation at several leaderboard sizes.
+
+    uv run python -m benchmarks.leaderboard_submit
+    uv run python -m benchmarks.leaderboard_submit --sizes 10000 100000
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from app.models import LeaderboardEntry
+from app.ranking import LeaderboardStore
+
+MODES = ("walls", "passthrough")
+
+
+def make_entry(score: int) -> LeaderboardEntry:
+    # model_construct skips validation so building 1M fixtures stays cheap
+    return LeaderboardEntry.model_construct(
+        id=uuid4(), userId=uuid4(), username="bench", score=score,
+        mode=random.choice(MODES), timestamp=datetime.now(timezone.utc),
+        rank=None, duration=None,
+    )
+
+
+def legacy_add(leaderboard, entry):
+    leaderboard.append(entry)
+    leaderboard.sort(key=lambda x: x.score, reverse=True)
+    for i, item in enumerate(leaderboard):
+        item.rank = i + 1
+    return entry
+
+
+def measure(add, target, entries):
+    samples = []
+    for entry in entries:
+        start = time.perf_counter()
+        add(target, entry)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return {
+        "mean_us": statistics.fmean(samples) * 1e6,
+        "p50_us": samples[len(samples) // 2] * 1e6,
+        "p99_us": samples[int(len(samples) * 0.99)] * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--submits", type=int, default=1000)
+    parser.add_argument("--legacy-submits", type=int, default=20)
+    args = parser.parse_args()
+
+    random.seed(0)
+    print(f"{'size':>10} {'impl':>8} {'mean us':>12} {'p50 us':>12} {'p99 us':>12}")
+    for size in args.sizes:
+        base = [make_entry(random.randint(0, 100_000)) for _ in range(size)]
+        extra = [make_entry(random.randint(0, 100_000)) for _ in range(args.submits)]
+
+        store = LeaderboardStore(base)
+        result = measure(LeaderboardStore.add, store, extra)
+        print(f"{size:>10} {'store':>8} {result['mean_us']:>12.1f} {result['p50_us']:>12.1f} {result['p99_us']:>12.1f}")
+
+        legacy = sorted(base, key=lambda x: x.score, reverse=True)
+        result = measure(legacy_add, legacy, extra[: args.legacy_submits])
+        print(f"{size:>10} {'legacy':>8} {result['mean_us']:>12.1f} {result['p50_us']:>12.1f} {result['p99_us']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Time-windowed leaderboard reads after a year of submissions.
+
+Replays a year of synthetic submissions, ending now, into ``LeaderboardStore``
+with the clock following along, then compares top-100 reads for each window
+against filtering the full history by timestamp and sorting it. The same
+history is then imported into ``SQLiteDB``, and its window pages and counts
+are timed too.
+
+    uv run python -m benchmarks.leaderboard_windows
+    uv run python -m benchmarks.leaderboard_windows --submissions 100000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+from app.models import LeaderboardEntry
+from app.ranking import LeaderboardStore, WINDOWS, window_start
+from app.sqlite_db import SQLiteDB
+
+MODES = ("walls", "passthrough")
+YEAR = timedelta(days=365)
+
+
+def make_entry(score: int, timestamp: datetime) -> LeaderboardEntry:
+    return LeaderboardEntry.model_construct(
+        id=uuid4(), userId=uuid4(), username="bench", score=score,
+        mode=random.choice(MODES), timestamp=timestamp, rank=None, duration=None,
+    )
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def top(history, since, mode, limit):
+    matching = [e for e in history if e.timestamp >= since and (not mode or e.mode == mode)]
+    matching.sort(key=lambda e: e.score, reverse=True)
+    return matching[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--submissions", type=int, default=500_000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--reads", type=int, default=200)
+    parser.add_argument("--scan-reads", type=int, default=3)
+    parser.add_argument("--sqlite-reads", type=int, default=20)
+    args = parser.parse_args()
+
+    random.seed(0)
+    # Ending now, so the SQLite backend, which reads the real clock, sees the same windows
+    start = datetime.now(timezone.utc) - YEAR
+    step = YEAR / args.submissions
+    now = [start]
+    store = LeaderboardStore(clock=lambda: now[0])
+    history = []
+
+    began = time.perf_counter()
+    for i in range(args.submissions):
+        now[0] = start + step * i
+        entry = make_entry(random.randint(0, 100_000), now[0])
+        history.append(entry)
+        store.add(entry)
+    elapsed = time.perf_counter() - began
+    print(f"{args.submissions} submissions over a year: {elapsed / args.submissions * 1e6:.1f} us/add")
+
+    print(f"{'window':>8} {'mode':>12} {'entries':>9} {'buckets ms':>11} {'scan ms':>9}")
+    for window in WINDOWS:
+        for mode in (None, "walls"):
+            since = window_start(window, now[0])
+            bucket_s, page = timed(lambda: store.page(mode=mode, limit=args.limit, window=window), args.reads)
+            scan_s, expected = timed(lambda: top(history, since, mode, args.limit), args.scan_reads)
+            assert [e.score for e in page] == [e.score for e in expected]
+            print(
+                f"{window:>8} {mode or 'all':>12} {store.count(mode=mode, window=window):>9} "
+                f"{bucket_s * 1e3:>11.3f} {scan_s * 1e3:>9.1f}"
+            )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sqlite = SQLiteDB(os.path.join(tmp, "windows.db"), pool_size=1, seed=False)
+        sqlite.import_scores(history)
+        print(f"{'window':>8} {'mode':>12} {'entries':>9} {'sqlite ms':>10} {'count ms':>9}")
+        for window in WINDOWS:
+            for mode in (None, "walls"):
+                page_s, page = timed(
+                    lambda: sqlite.get_leaderboard(mode=mode, limit=args.limit, window=window), args.sqlite_reads
+                )
+                count_s, total = timed(lambda: sqlite.get_total_scores(mode=mode, window=window), args.sqlite_reads)
+                expected = top(history, window_start(window), mode, args.limit)
+                assert [e.score for e in page] == [e.score for e in expected]
+                print(f"{window:>8} {mode or 'all':>12} {total:>9} {page_s * 1e3:>10.3f} {count_s * 1e3:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""Full game lifecycle load test with per-endpoint throughput and latency percentiles.
+
+Simulated players sign up and log in in one burst, then each plays
+``--games`` games: start a session, send ``--update-rate`` state updates
+per second for ``--game-seconds``, end it, submit the score and read the
+leaderboard. Spectators poll ``/sessions/active`` and the leaderboard
+meanwhile. The app runs in-process (``httpx.ASGITransport``, lifespan
+included) or as a local uvicorn server.
+
+The report is JSON: requests/sec, error count and p50/p95/p99 latency in
+milliseconds per endpoint. ``--baseline`` compares the run with a saved
+report and exits with status 1 if an endpoint's p95 or p99 grew, or its
+throughput fell, by more than ``--tolerance``.
+
+    uv run python -m benchmarks.load --players 50 --output load.json
+    uv run python -m benchmarks.load --target uvicorn --workers 2 --baseline load.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional
+from uuid import uuid4
+
+import httpx
+
+from benchmarks.worker_scaling import wait_ready
+
+
+class Recorder:
+    """Latency samples and status codes per endpoint name."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+
+    async def request(self, client: httpx.AsyncClient, name: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.TransportError:
+            self.statuses[name]["transport error"] += 1
+            return None
+        self.latencies[name].append(time.perf_counter() - start)
+        self.statuses[name][response.status_code] += 1
+        return response
+
+    def report(self, elapsed: float) -> Dict[str, dict]:
+        endpoints = {}
+        for name in sorted(self.statuses):
+            latencies = sorted(self.latencies[name])
+            count = sum(self.statuses[name].values())
+            endpoints[name] = {
+                "requests": count,
+                "errors": sum(n for status, n in self.statuses[name].items() if not str(status).startswith(("2", "3"))),
+                "rps": round(count / elapsed, 1),
+                **{f"p{q}": round(percentile(latencies, q) * 1000, 2) for q in (50, 95, 99)},
+            }
+        return endpoints
+
+
+def percentile(values: List[float], q: int) -> float:
+    # Nearest rank on a sorted list
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, round(q / 100 * len(values) + 0.5) - 1))]
+
+
+def game_state(rng: random.Random, length: int) -> dict:
+    x, y = rng.randrange(20), rng.randrange(20)
+    return {
+        "direction": rng.choice(["UP", "DOWN", "LEFT", "RIGHT"]),
+        "snake": [{"x": x, "y": (y + i) % 20} for i in range(length)],
+        "food": {"x": rng.randrange(20), "y": rng.randrange(20)},
+    }
+
+
+async def login(client, recorder, prefix, i) -> Optional[dict]:
+    user = {"username": f"{prefix}{i}", "email": f"{prefix}{i}@example.com", "password": "password123"}
+    await recorder.request(client, "POST /auth/signup", "POST", "/auth/signup", json=user)
+    response = await recorder.request(client, "POST /auth/login", "POST", "/auth/login",
+                                      json={"email": user["email"], "password": user["password"]})
+    if response is None or response.status_code != 200:
+        return None
+    return {"Authorization": f"Bearer {response.json()['token']}"}
+
+
+async def player(client, recorder, headers, args, seed):
+    rng = random.Random(seed)
+    interval = 1 / args.update_rate
+    for _ in range(args.games):
+        mode = rng.choice(["walls", "passthrough"])
+        response = await recorder.request(client, "POST /sessions/start", "POST", "/sessions/start",
+                                          headers=headers, json={"mode": mode})
+        if response is None or response.status_code != 201:
+            continue
+        session_id = response.json()["id"]
+        score = 0
+        for tick in range(int(args.update_rate * args.game_seconds)):
+            await asyncio.sleep(interval)
+            score += 10 * (rng.random() < 0.1)
+            await recorder.request(client, "PATCH /sessions/{id}/update", "PATCH", f"/sessions/{session_id}/update",
+                                   headers=headers, json={"currentScore": score, "gameState": game_state(rng, 3 + tick // 20)})
+        await recorder.request(client, "POST /sessions/{id}/end", "POST", f"/sessions/{session_id}/end",
+                               headers=headers, json={"finalScore": score})
+        await recorder.request(client, "POST /leaderboard/submit", "POST", "/leaderboard/submit",
+                               headers=headers, json={"score": score, "mode": mode})
+        await recorder.request(client, "GET /leaderboard", "GET", "/leaderboard", params={"mode": mode, "limit": 25})
+
+
+async def spectator(client, recorder, args, stop: asyncio.Event):
+    while not stop.is_set():
+        await recorder.request(client, "GET /sessions/active", "GET", "/sessions/active", params={"limit": 10})
+        await recorder.request(client, "GET /leaderboard", "GET", "/leaderboard", params={"limit": 25})
+        try:
+            await asyncio.wait_for(stop.wait(), args.poll_interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+@asynccontextmanager
+async def in_process_client(args) -> AsyncIterator[httpx.AsyncClient]:
+    from app.main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://load", timeout=args.timeout) as client:
+            yield client
+
+
+@asynccontextmanager
+async def uvicorn_client(args) -> AsyncIterator[httpx.AsyncClient]:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, SNAKE_STORAGE=args.storage, SNAKE_SQLITE_PATH=os.path.join(tmp, "load.db"))
+        if args.workers > 1:
+            # Buffered session updates are per worker; see the README
+            env["SNAKE_SESSION_FLUSH_INTERVAL"] = "0"
+        base_url = f"http://127.0.0.1:{args.port}"
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port),
+             "--workers", str(args.workers), "--log-level", "warning"],
+            env=env,
+        )
+        try:
+            await asyncio.to_thread(wait_ready, base_url)
+            limits = httpx.Limits(max_connections=args.players + args.spectators)
+            async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+                yield client
+        finally:
+            server.terminate()
+            server.wait()
+
+
+async def run(args) -> dict:
+    recorder = Recorder()
+    prefix = f"load{uuid4().hex[:8]}_"
+    connect = in_process_client if args.target == "in-process" else uvicorn_client
+    async with connect(args) as client:
+        start = time.perf_counter()
+        sessions = await asyncio.gather(*(login(client, recorder, prefix, i) for i in range(args.players)))
+        stop = asyncio.Event()
+        spectators = [asyncio.create_task(spectator(client, recorder, args, stop)) for _ in range(args.spectators)]
+        await asyncio.gather(*(
+            player(client, recorder, headers, args, args.seed + i) for i, headers in enumerate(sessions) if headers
+        ))
+        stop.set()
+        await asyncio.gather(*spectators)
+        elapsed = time.perf_counter() - start
+
+    endpoints = recorder.report(elapsed)
+    return {
+        "config": {
+            key: value for key, value in vars(args).items()
+            if key not in ("output", "baseline", "tolerance", "min_requests")
+        },
+        "elapsed": round(elapsed, 2),
+        "players_logged_in": sum(1 for headers in sessions if headers),
+        "total": {
+            "requests": sum(e["requests"] for e in endpoints.values()),
+            "errors": sum(e["errors"] for e in endpoints.values()),
+            "rps": round(sum(e["requests"] for e in endpoints.values()) / elapsed, 1),
+        },
+        "endpoints": endpoints,
+    }
+
+
+def compare(report: dict, baseline: dict, tolerance: float, min_requests: int) -> List[str]:
+    """One message per endpoint metric that regressed beyond ``tolerance``.
+
+    Endpoints with fewer than ``min_requests`` requests in either run are
+    skipped; their tail percentiles are a single sample.
+    """
+    regressions = []
+    for name, current in report["endpoints"].items():
+        before = baseline["endpoints"].get(name)
+        if before is None or min(before["requests"], current["requests"]) < min_requests:
+            continue
+        for q in ("p95", "p99"):
+            if before[q] and current[q] > before[q] * (1 + tolerance):
+                regressions.append(f"{name} {q} {before[q]:.2f} -> {current[q]:.2f} ms")
+        if current["rps"] < before["rps"] * (1 - tolerance):
+            regressions.append(f"{name} throughput {before['rps']:.1f} -> {current['rps']:.1f} req/s")
+    return regressions
+
+
+def print_table(report: dict):
+    print(f"{'endpoint':<30} {'requests':>9} {'errors':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}",
+          file=sys.stderr)
+    for name, e in report["endpoints"].items():
+        print(f"{name:<30} {e['requests']:>9} {e['errors']:>7} {e['rps']:>8.1f} {e['p50']:>8.2f} {e['p95']:>8.2f} "
+              f"{e['p99']:>8.2f}", file=sys.stderr)
+    total = report["total"]
+    print(f"{'total':<30} {total['requests']:>9} {total['errors']:>7} {total['rps']:>8.1f}  ({report['elapsed']}s)",
+          file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--target", choices=["in-process", "uvicorn"], default="in-process")
+    parser.add_argument("--players", type=int, default=20)
+    parser.add_argument("--spectators", type=int, default=5)
+    parser.add_argument("--games", type=int, default=2, help="games per player")
+    parser.add_argument("--game-seconds", type=float, default=3.0)
+    parser.add_argument("--update-rate", type=float, default=10.0, help="session updates per second per game")
+    parser.add_argument("--poll-interval", type=float, default=0.5, help="seconds between spectator polls")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--storage", choices=["memory", "sqlite"], default="memory", help="uvicorn target only")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn target only")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--output", default="-", help="file for the JSON report; - prints it")
+    parser.add_argument("--baseline", help="saved report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression")
+    parser.add_argument("--min-requests", type=int, default=20, help="fewest requests an endpoint needs to be compared")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print_table(report)
+    text = json.dumps(report, indent=2)
+    if args.output == "-":
+        print(text)
+    else:
+        with open(args.output, "w") as out:
+            out.write(text + "\n")
+
+    if args.baseline:
+        with open(args.baseline) as saved:
+            baseline = json.load(saved)
+        differing = [key for key, value in report["config"].items()
+                     if key not in ("seed", "port") and baseline["config"].get(key) != value]
+        if differing:
+            print(f"warning: baseline was run with different {', '.join(differing)}", file=sys.stderr)
+        regressions = compare(report, baseline, args.tolerance, args.min_requests)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print(f"no regressions beyond {args.tolerance:.0%} of the baseline", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
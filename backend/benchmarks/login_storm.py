@@ -0,0 +1,98 @@
+"""Latency of other endpoints while a burst of logins is hashing passwords.
+
+Runs the app in-process and measures GET /leaderboard latency with no
+logins, during a login storm with bcrypt inline on the event loop, and
+during the same storm with bcrypt on the worker pool.
+
+    uv run python -m benchmarks.login_storm --logins 40
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import warnings
+
+import httpx
+
+from app import auth
+from app.db import db
+from app.hashing import PasswordHasher
+from app.main import app
+
+USER = {"username": "stormuser", "email": "storm@example.com", "password": "password123"}
+
+
+def percentile(samples, pct):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct))]
+
+
+async def probe(client, stop, samples, gaps, interval):
+    last = time.perf_counter()
+    while not stop.is_set():
+        start = time.perf_counter()
+        await client.get("/leaderboard?limit=10")
+        now = time.perf_counter()
+        samples.append(now - start)
+        # A blocked event loop shows up as a long gap between completed probes
+        gaps.append(now - last)
+        last = now
+        await asyncio.sleep(interval)
+
+
+async def scenario(client, logins, duration, interval):
+    stop = asyncio.Event()
+    samples, gaps, statuses = [], [], []
+    prober = asyncio.create_task(probe(client, stop, samples, gaps, interval))
+    await asyncio.sleep(interval)
+
+    async def login():
+        response = await client.post("/auth/login", json={"email": USER["email"], "password": USER["password"]})
+        statuses.append(response.status_code)
+
+    start = time.perf_counter()
+    if logins:
+        await asyncio.gather(*(login() for _ in range(logins)))
+    # Keep probing briefly after the storm so a stalled loop is visible as a gap
+    await asyncio.sleep(max(duration - (time.perf_counter() - start), 0.2))
+    stop.set()
+    await prober
+    return samples, gaps, statuses
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--max-pending", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=2.0, help="minimum seconds per scenario")
+    parser.add_argument("--interval", type=float, default=0.005, help="seconds between probe requests")
+    args = parser.parse_args()
+    # The demo signing key triggers PyJWT's short-key warning on every token
+    warnings.simplefilter("ignore")
+
+    db.reset()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.post("/auth/signup", json=USER)
+
+        scenarios = [
+            ("idle", 0, PasswordHasher(workers=0, max_pending=args.max_pending)),
+            ("storm, inline bcrypt", args.logins, PasswordHasher(workers=0, max_pending=args.max_pending)),
+            (f"storm, {args.workers}-thread pool", args.logins,
+             PasswordHasher(workers=args.workers, max_pending=args.max_pending)),
+        ]
+        print(f"{'scenario':<28} {'probes':>7} {'p50 ms':>9} {'p99 ms':>9} {'max gap ms':>11}  login statuses")
+        for name, logins, hasher in scenarios:
+            auth.hasher = hasher
+            samples, gaps, statuses = await scenario(client, logins, args.duration, args.interval)
+            codes = {code: statuses.count(code) for code in sorted(set(statuses))}
+            print(
+                f"{name:<28} {len(samples):>7} {statistics.median(samples) * 1e3:>9.2f} "
+                f"{percentile(samples, 0.99) * 1e3:>9.2f} {max(gaps) * 1e3:>11.2f}  {codes}"
+            )
+            hasher.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
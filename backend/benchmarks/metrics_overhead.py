@@ -0,0 +1,106 @@
+"""Per-request cost of the request metrics middleware and storage spans.
+
+Drives the ASGI app directly (no HTTP client or socket) so the numbers
+are the instrumentation's own cost: the middleware around a no-op app,
+whole requests through the app built with and without it, and one timed
+storage call against the same method unwrapped.
+
+    uv run python -m benchmarks.metrics_overhead --iterations 50000
+"""
+import argparse
+import asyncio
+import time
+import warnings
+
+from app import metrics
+from app.db import MockDB, db
+from app.main import RequestMetrics, app
+
+
+def scope(path):
+    return {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"", "headers": [],
+        "server": ("testserver", 80), "client": ("testclient", 50000), "app": app,
+    }
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message):
+    pass
+
+
+async def per_request(asgi, path, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await asgi(scope(path), receive, send)
+    return (time.perf_counter() - start) / iterations
+
+
+async def compare(baseline, instrumented, path, iterations, repeats):
+    # Alternate the two and keep the best round of each, so drift and
+    # background noise don't land on one side only
+    await per_request(baseline, path, iterations // 10)
+    await per_request(instrumented, path, iterations // 10)
+    rounds = [(await per_request(baseline, path, iterations // repeats),
+               await per_request(instrumented, path, iterations // repeats)) for _ in range(repeats)]
+    return min(r[0] for r in rounds), min(r[1] for r in rounds)
+
+
+def report(label, without, with_metrics):
+    print(f"{label:<28} {without * 1e6:>8.2f} -> {with_metrics * 1e6:>8.2f} us  (+{(with_metrics - without) * 1e6:.2f} us)")
+
+
+def build_stack(instrumented):
+    saved = list(app.user_middleware)
+    if not instrumented:
+        app.user_middleware = [m for m in saved if m.cls is not RequestMetrics]
+    try:
+        return app.build_middleware_stack()
+    finally:
+        app.user_middleware = saved
+
+
+def per_call(fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn("missing")
+    return (time.perf_counter() - start) / iterations
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--paths", nargs="+", default=["/", "/leaderboard?limit=10", "/sessions/active"])
+    args = parser.parse_args()
+    warnings.simplefilter("ignore")
+
+    async def noop(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    report("middleware only", *await compare(noop, RequestMetrics(noop), "/", args.iterations, args.repeats))
+
+    plain, instrumented = build_stack(False), build_stack(True)
+    for path in args.paths:
+        route, _, query = path.partition("?")
+
+        def asgi_for(stack):
+            async def call(scope, receive, send):
+                scope["query_string"] = query.encode()
+                await stack(scope, receive, send)
+            return call
+
+        report(f"GET {path}", *await compare(asgi_for(plain), asgi_for(instrumented), route, args.iterations, args.repeats))
+
+    unwrapped = MockDB.get_user.__wrapped__.__get__(db)
+    report("storage span (get_user)", per_call(unwrapped, args.iterations * 10), per_call(db.get_user, args.iterations * 10))
+    print(f"{len(metrics.render().splitlines())} exposition lines")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,92 @@
+"""Rate limiter overhead per check, memory per key, and per request.
+
+Takes tokens round-robin over ``--keys`` distinct keys (10k by default)
+from the in-memory buckets and, with fewer takes, from the shared SQLite
+buckets, and reports the time per check, the buckets kept and their memory
+per key. Then times ``PATCH /sessions/{id}/update`` in-process with the
+limiter disabled and enabled.
+
+    uv run python -m benchmarks.rate_limit --keys 10000
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import tracemalloc
+import warnings
+
+import httpx
+
+from app.main import app
+from app.rate_limit import MemoryBuckets, Rule, SQLiteBuckets, limiter
+
+USER = {"username": "limituser", "email": "limit@example.com", "password": "password123"}
+
+
+def per_take(buckets, keys, takes, rule):
+    start = time.perf_counter()
+    for i in range(takes):
+        buckets.take(keys[i % len(keys)], rule)
+    return (time.perf_counter() - start) / takes
+
+
+def memory_per_key(keys, rule):
+    tracemalloc.start()
+    buckets = MemoryBuckets()
+    before = tracemalloc.get_traced_memory()[0]
+    for key in keys:
+        buckets.take(key, rule)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used / len(keys)
+
+
+async def per_request(requests):
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app), httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        signup = await client.post("/auth/signup", json=USER)
+        headers = {"Authorization": f"Bearer {signup.json()['token']}"}
+        session_id = (await client.post("/sessions/start", headers=headers, json={"mode": "walls"})).json()["id"]
+        rules = dict(limiter.rules)
+        results = {}
+        # High enough that every request is admitted: this times the check, not rejections
+        for name, rule in [("limiter off", None), ("limiter on", Rule(rate=1e9, burst=1e9))]:
+            limiter.rules = {"session_update": rule} if rule else {}
+            start = time.perf_counter()
+            for i in range(requests):
+                response = await client.patch(f"/sessions/{session_id}/update", headers=headers, json={"currentScore": i})
+                assert response.status_code == 200
+            results[name] = (time.perf_counter() - start) / requests
+        limiter.rules = rules
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--keys", type=int, default=10_000)
+    parser.add_argument("--takes", type=int, default=500_000)
+    parser.add_argument("--sqlite-takes", type=int, default=20_000)
+    parser.add_argument("--requests", type=int, default=3000)
+    args = parser.parse_args()
+    warnings.simplefilter("ignore")
+
+    keys = [f"user{i}:/sessions/{{session_id}}/update" for i in range(args.keys)]
+    # Buckets that stay partly drained, so none is evicted while the keys cycle
+    rule = Rule(rate=1, burst=1_000_000)
+    buckets = MemoryBuckets()
+    print(f"{'backend':<8} {'keys':>8} {'per check':>12} {'buckets kept':>13}")
+    print(f"{'memory':<8} {args.keys:>8} {per_take(buckets, keys, args.takes, rule) * 1e9:>9.0f} ns {len(buckets):>13}")
+    print(f"memory per key: {memory_per_key(keys, rule):.0f} bytes")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        shared = SQLiteBuckets(os.path.join(tmp, "limits.db"))
+        per_check = per_take(shared, keys, args.sqlite_takes, rule)
+        print(f"{'sqlite':<8} {args.keys:>8} {per_check * 1e6:>9.1f} µs")
+
+    for name, seconds in asyncio.run(per_request(args.requests)).items():
+        print(f"PATCH /update, {name:<12} {seconds * 1e6:8.1f} µs/request")
+
+
+if __name__ == "__main__":
+    main()
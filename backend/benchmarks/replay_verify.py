@@ -0,0 +1,100 @@
+"""Replay verification throughput in replays/sec, per batch size and per core.
+
+Records N games of random play (up to ``--max-moves`` moves each, in
+both modes) with the engine, then verifies their logs: one log per
+``replay_scores`` call, larger batches inline, and batches split over a
+process pool of 1, 2, 4... workers as ``ReplayVerifier`` does. Every
+replayed score is checked against the recorded one.
+
+    uv run python -m benchmarks.replay_verify --games 2000 --workers 1 2 4
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from app.engine import DIRECTIONS, MODES, SnakeEngine
+from app.replay import HEADER, RECORD, end_record, header, record, replay_scores
+
+
+def record_games(games, max_moves, seed):
+    rng = random.Random(seed)
+    engine = SnakeEngine(capacity=games, seed=seed)
+    seeds = [rng.randrange(2**32) for _ in range(games)]
+    slots = [engine.spawn(MODES[i % 2], now=0, seed=seeds[i]) for i in range(games)]
+    logs = [bytearray(header(MODES[i % 2], seeds[i])) for i in range(games)]
+    targets = [rng.randrange(max_moves // 4, max_moves) for _ in range(games)]
+    playing = set(slots)
+    now = 0
+    while playing:
+        for slot in rng.sample(sorted(playing), max(1, len(playing) // 5)):
+            direction = rng.choice(DIRECTIONS)
+            logs[slot] += record(engine.moves(slot), direction)
+            engine.steer(slot, direction)
+        now += 1000
+        engine.tick(now)
+        for slot in list(playing):
+            if engine.game_over(slot) or engine.moves(slot) >= targets[slot]:
+                logs[slot] += end_record(engine.moves(slot))
+                engine.remove(slot)
+                playing.discard(slot)
+    return [bytes(log) for log in logs], [engine.score(slot) for slot in slots]
+
+
+def inline(logs, batch_size):
+    scores = []
+    for i in range(0, len(logs), batch_size):
+        scores += replay_scores(logs[i:i + batch_size])
+    return scores
+
+
+def pooled(pool, workers, logs, batch_size):
+    scores = []
+    for i in range(0, len(logs), batch_size):
+        batch = logs[i:i + batch_size]
+        size = -(-len(batch) // workers)
+        for chunk in pool.map(replay_scores, [batch[j:j + size] for j in range(0, len(batch), size)]):
+            scores += chunk
+    return scores
+
+
+def timed(fn, logs, expected):
+    start = time.perf_counter()
+    scores = fn()
+    elapsed = time.perf_counter() - start
+    assert scores == expected, "a replay did not reproduce its score"
+    return len(logs) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=2000)
+    parser.add_argument("--max-moves", type=int, default=400)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 64, 256])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    logs, expected = record_games(args.games, args.max_moves, args.seed)
+    inputs = sum((len(log) - HEADER.size) // RECORD.size - 1 for log in logs)
+    print(f"{os.cpu_count()} cores, {args.games} games, {inputs} inputs, "
+          f"{np.mean([len(log) for log in logs]):.0f} bytes/log")
+    print(f"{'path':<12} {'batch':>6} {'replays/s':>10} {'per core':>9}")
+    for batch_size in args.batch_sizes:
+        rate = timed(lambda: inline(logs, batch_size), logs, expected)
+        print(f"{'inline':<12} {batch_size:>6} {rate:>10.0f} {rate:>9.0f}")
+
+    batch_size = max(args.batch_sizes)
+    for workers in args.workers:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            list(pool.map(replay_scores, [[]] * workers))  # start the workers before timing
+            rate = timed(lambda: pooled(pool, workers, logs, batch_size), logs, expected)
+        print(f"{f'{workers} workers':<12} {batch_size:>6} {rate:>10.0f} {rate / workers:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Response serialization cost for 1000-entry leaderboard pages.
+
+Compares the previous ``response_model=dict`` path (validate, then
+``jsonable_encoder`` and ``json.dumps`` through JSONResponse), FastAPI's
+typed ``response_model`` path (validate, then dump to JSON bytes), and
+``ModelResponse`` (build the page model from the already validated
+entries and dump it to JSON bytes).
+
+    uv run python -m benchmarks.serialization --entries 1000
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app.models import GameSessionDetails, GameState, LeaderboardEntry, LeaderboardPage, ActiveSessionsPage
+from app.responses import ModelResponse
+from app.snake import SnakeBody
+
+
+def per_call(fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations
+
+
+def compare(name, page_type, content, iterations):
+    dict_adapter = TypeAdapter(dict)
+    page_adapter = TypeAdapter(page_type)
+    variants = {
+        "dict + jsonable_encoder": lambda: JSONResponse(jsonable_encoder(dict_adapter.validate_python(content))),
+        "typed response_model": lambda: page_adapter.dump_json(page_adapter.validate_python(content)),
+        "ModelResponse": lambda: ModelResponse(page_type(**content)),
+    }
+    bodies = {label: fn() for label, fn in variants.items()}
+    assert bodies["ModelResponse"].body == bodies["typed response_model"]
+
+    baseline = None
+    for label, fn in variants.items():
+        seconds = per_call(fn, iterations)
+        baseline = baseline or seconds
+        print(f"{name:<18} {label:<26} {seconds * 1e3:>9.3f} {baseline / seconds:>8.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=1000)
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--snake-length", type=int, default=50)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    random.seed(0)
+    now = datetime.now(timezone.utc)
+    entries = [
+        LeaderboardEntry(
+            id=uuid4(), userId=uuid4(), username=f"player{i}", score=random.randint(0, 100_000),
+            mode=random.choice(["walls", "passthrough"]), timestamp=now, rank=i + 1, duration=120,
+        )
+        for i in range(args.entries)
+    ]
+    sessions = [
+        GameSessionDetails(
+            id=uuid4(), userId=uuid4(), username=f"player{i}", mode="walls", startedAt=now,
+            lastUpdatedAt=now, currentScore=100,
+            gameState=GameState(
+                direction="RIGHT", food={"x": 1, "y": 1},
+                snake=SnakeBody((x, 5) for x in range(args.snake_length, 0, -1)),
+            ),
+        )
+        for i in range(args.sessions)
+    ]
+
+    print(f"{'payload':<18} {'path':<26} {'ms/page':>9} {'speedup':>9}")
+    compare(f"{args.entries} entries", LeaderboardPage, {"data": entries, "total": len(entries)}, args.iterations)
+    compare(f"{args.sessions} sessions", ActiveSessionsPage, {"data": sessions, "total": len(sessions)}, args.iterations)
+
+
+if __name__ == "__main__":
+    main()
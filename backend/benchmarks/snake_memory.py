@@ -0,0 +1,85 @@
+"""Memory and move throughput of packed snake bodies across many sessions.
+
+Compares SnakeBody with the previous list-of-dicts representation for 10k
+concurrent sessions.
+
+    uv run python -m benchmarks.snake_memory --sessions 10000 --length 200
+"""
+import argparse
+import json
+import time
+import tracemalloc
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from app.models import GameState
+from app.snake import SnakeBody
+
+
+class LegacyGameState(BaseModel):
+    direction: Optional[str] = None
+    snake: Optional[List[dict]] = None
+    food: Optional[dict] = None
+    gameOver: Optional[bool] = None
+
+
+def segments(length, offset):
+    return [{"x": (offset + i) % 20, "y": i // 20 % 20} for i in range(length)]
+
+
+def allocated(build):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return objects, after - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=10_000)
+    parser.add_argument("--length", type=int, default=200)
+    parser.add_argument("--ticks", type=int, default=20)
+    args = parser.parse_args()
+
+    lists, list_bytes = allocated(lambda: [segments(args.length, i) for i in range(args.sessions)])
+    bodies, body_bytes = allocated(
+        lambda: [SnakeBody((s["x"], s["y"]) for s in segments(args.length, i)) for i in range(args.sessions)]
+    )
+
+    start = time.perf_counter()
+    for tick in range(args.ticks):
+        for snake in lists:
+            snake.insert(0, {"x": tick % 20, "y": 0})
+            snake.pop()
+    list_moves = args.sessions * args.ticks / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for tick in range(args.ticks):
+        for body in bodies:
+            body.push_head(tick % 20, 0)
+            body.pop_tail()
+    body_moves = args.sessions * args.ticks / (time.perf_counter() - start)
+
+    payload = json.dumps({"direction": "UP", "snake": segments(args.length, 0), "food": {"x": 1, "y": 1}})
+    iterations = 2000
+    start = time.perf_counter()
+    for _ in range(iterations):
+        LegacyGameState.model_validate_json(payload)
+    legacy_validate = (time.perf_counter() - start) / iterations
+    start = time.perf_counter()
+    for _ in range(iterations):
+        GameState.model_validate_json(payload)
+    packed_validate = (time.perf_counter() - start) / iterations
+
+    print(f"{args.sessions:,} sessions, {args.length} segments each")
+    print(f"{'representation':<16} {'MiB':>8} {'bytes/seg':>10} {'moves/s':>12} {'validate us':>12}")
+    total = args.sessions * args.length
+    print(f"{'list of dicts':<16} {list_bytes / 2**20:>8.1f} {list_bytes / total:>10.1f} {list_moves:>12,.0f} {legacy_validate * 1e6:>12.1f}")
+    print(f"{'SnakeBody':<16} {body_bytes / 2**20:>8.1f} {body_bytes / total:>10.1f} {body_moves:>12,.0f} {packed_validate * 1e6:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Live-spectate fan-out with thousands of simulated spectators.
+
+Each game session publishes a board frame every tick; spectators are
+asyncio tasks subscribed to a session topic, and a share of them are slow
+consumers that take longer than a tick to handle each frame. Reports the
+publisher-side cost per frame and what the spectators received.
+
+    uv run python -m benchmarks.spectators --spectators 5000 --sessions 50
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from app.models import GameSessionDetails, GameState
+from app.pubsub import Broker
+
+
+async def spectator(subscription, delay, received):
+    async for _ in subscription:
+        received[0] += 1
+        if delay:
+            await asyncio.sleep(delay)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--spectators", type=int, default=5000)
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--ticks", type=int, default=100)
+    parser.add_argument("--tick", type=float, default=0.05, help="seconds between frames per session")
+    parser.add_argument("--slow-share", type=float, default=0.1, help="fraction of slow spectators")
+    parser.add_argument("--buffer", type=int, default=8)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    broker = Broker(buffer_size=args.buffer)
+    now = datetime.now(timezone.utc)
+    sessions = [
+        GameSessionDetails(
+            id=uuid4(), userId=uuid4(), username=f"player{i}", mode="walls", startedAt=now,
+            gameState=GameState(direction="UP", snake=[{"x": 10, "y": y} for y in range(30)], food={"x": 1, "y": 1}),
+        )
+        for i in range(args.sessions)
+    ]
+    topics = [f"session:{s.id}" for s in sessions]
+
+    fast_received, slow_received = [0], [0]
+    tasks, subscriptions = [], []
+    for i in range(args.spectators):
+        slow = rng.random() < args.slow_share
+        subscription = broker.subscribe(topics[i % len(topics)])
+        subscriptions.append((slow, subscription))
+        delay = args.tick * 3 if slow else 0
+        tasks.append(asyncio.create_task(spectator(subscription, delay, slow_received if slow else fast_received)))
+
+    publish_costs = []
+    start = time.perf_counter()
+    for tick in range(args.ticks):
+        tick_start = time.perf_counter()
+        for session, topic in zip(sessions, topics):
+            session.currentScore = tick
+            t0 = time.perf_counter()
+            broker.publish(topic, session.model_dump_json())
+            publish_costs.append(time.perf_counter() - t0)
+        await asyncio.sleep(max(0.0, args.tick - (time.perf_counter() - tick_start)))
+    for topic in topics:
+        broker.close_topic(topic)
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+
+    slow_count = sum(1 for slow, _ in subscriptions if slow)
+    fast_count = len(subscriptions) - slow_count
+    per_topic = args.spectators / args.sessions
+    dropped = sum(s.dropped for _, s in subscriptions)
+    print(f"spectators: {args.spectators} ({slow_count} slow) across {args.sessions} sessions, {args.ticks} ticks in {elapsed:.2f}s")
+    print(f"publish (encode + fan-out to ~{per_topic:.0f}): mean {statistics.fmean(publish_costs) * 1e6:.1f} us, "
+          f"max {max(publish_costs) * 1e3:.2f} ms")
+    print(f"frames delivered: {fast_received[0] + slow_received[0]:,} "
+          f"({fast_received[0] / max(fast_count, 1):.1f}/fast spectator, {slow_received[0] / max(slow_count, 1):.1f}/slow spectator)")
+    print(f"frames dropped for slow consumers: {dropped:,}")
+    print(f"delivered frames/sec: {(fast_received[0] + slow_received[0]) / elapsed:,.0f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
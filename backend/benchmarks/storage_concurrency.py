@@ -0,0 +1,136 @@
+"""Mixed storage workload from many concurrent clients, with and without AsyncStorage.
+
+Each client coroutine runs a mix of score submissions, leaderboard
+pages, session updates and user lookups. They call the backend directly
+on the event loop, as the routers used to, and then through
+``AsyncStorage``. A heartbeat task sleeping 1 ms records the worst loop
+stall, i.e. how long a request could wait behind storage work. The
+in-memory backend is also driven from plain threads to measure its
+locks under contention.
+
+    uv run python -m benchmarks.storage_concurrency --clients 64 --ops 200
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from app.db import MockDB
+from app.models import GameSessionDetails, LeaderboardEntry, User
+from app.sqlite_db import SQLiteDB
+from app.storage import AsyncStorage
+
+
+def populate(store, players):
+    now = datetime.now(timezone.utc)
+    users = [store.create_user(User(id=uuid4(), username=f"user{i}", email=f"user{i}@example.com", createdAt=now))
+             for i in range(players)]
+    sessions = [store.create_session(GameSessionDetails(
+        id=uuid4(), userId=user.id, username=user.username, mode="walls", startedAt=now)) for user in users]
+    return users, sessions
+
+
+def operation(rng, users, sessions):
+    """One (method name, args, kwargs) drawn from the mix."""
+    roll = rng.random()
+    user = rng.choice(users)
+    if roll < 0.2:
+        entry = LeaderboardEntry(id=uuid4(), userId=user.id, username=user.username, score=rng.randrange(10_000),
+                                 mode=rng.choice(["walls", "passthrough"]), timestamp=datetime.now(timezone.utc))
+        return "add_score", (entry,), {}
+    if roll < 0.6:
+        return "get_leaderboard", (), {"limit": 100}
+    if roll < 0.8:
+        return "update_session", (str(rng.choice(sessions).id), {"currentScore": rng.randrange(1000)}), {}
+    return "get_user_by_username", (user.username,), {}
+
+
+async def heartbeat(stop, worst):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.001)
+        worst[0] = max(worst[0], time.perf_counter() - start - 0.001)
+
+
+async def drive(call, clients, ops, users, sessions):
+    stop, worst = asyncio.Event(), [0.0]
+    beat = asyncio.create_task(heartbeat(stop, worst))
+
+    async def client(seed):
+        rng = random.Random(seed)
+        for _ in range(ops):
+            name, args, kwargs = operation(rng, users, sessions)
+            await call(name, args, kwargs)
+            await asyncio.sleep(0)  # each operation stands for a separate request
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(seed) for seed in range(clients)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await beat
+    return clients * ops / elapsed, worst[0]
+
+
+def threaded(store, threads, ops, users, sessions):
+    def worker(seed):
+        rng = random.Random(seed)
+        for _ in range(ops):
+            name, args, kwargs = operation(rng, users, sessions)
+            getattr(store, name)(*args, **kwargs)
+
+    pool = [threading.Thread(target=worker, args=(seed,)) for seed in range(threads)]
+    start = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return threads * ops / (time.perf_counter() - start)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--ops", type=int, default=200, help="operations per client")
+    parser.add_argument("--players", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=8, help="AsyncStorage threads for SQLite")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 16])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        backends = {
+            "memory": MockDB(),
+            "sqlite": SQLiteDB(os.path.join(tmp, "concurrency.db"), pool_size=args.workers, seed=False),
+        }
+        print(f"{args.clients} clients x {args.ops} ops, {os.cpu_count()} cores")
+        print(f"{'backend':<8} {'path':<14} {'ops/s':>10} {'worst stall':>12}")
+        populated = {}
+        for name, store in backends.items():
+            store.reset()
+            users, sessions = populated[name] = populate(store, args.players)
+
+            async def direct(method, call_args, kwargs, store=store):
+                return getattr(store, method)(*call_args, **kwargs)
+
+            storage = AsyncStorage(store, workers=args.workers)
+
+            async def awaited(method, call_args, kwargs, storage=storage):
+                return await getattr(storage, method)(*call_args, **kwargs)
+
+            for label, call in (("on the loop", direct), ("AsyncStorage", awaited)):
+                rate, stall = await drive(call, args.clients, args.ops, users, sessions)
+                print(f"{name:<8} {label:<14} {rate:>10,.0f} {stall * 1000:>10.2f}ms")
+            storage.shutdown()
+
+        for threads in args.threads:
+            rate = threaded(backends["memory"], threads, args.clients * args.ops // threads, *populated["memory"])
+            print(f"{'memory':<8} {f'{threads} threads':<14} {rate:>10,.0f}")
+        backends["sqlite"].pool.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,80 @@
+"""Operation throughput for the in-memory and SQLite storage backends.
+
+    uv run python -m benchmarks.storage_throughput
+    uv run python -m benchmarks.storage_throughput --ops 20000 --sqlite-path /tmp/bench.db
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from app.db import MockDB
+from app.models import User, LeaderboardEntry, GameSessionDetails, GameState
+from app.sqlite_db import SQLiteDB
+
+MODES = ("walls", "passthrough")
+
+
+def run(name, ops, fn):
+    start = time.perf_counter()
+    for i in range(ops):
+        fn(i)
+    elapsed = time.perf_counter() - start
+    return name, ops / elapsed
+
+
+def bench(store, ops):
+    now = datetime.now(timezone.utc)
+    users = [
+        User(id=uuid4(), username=f"user{i}", email=f"user{i}@example.com", createdAt=now)
+        for i in range(ops)
+    ]
+    sessions = [
+        GameSessionDetails(id=uuid4(), userId=users[i].id, username=users[i].username, mode="walls", startedAt=now)
+        for i in range(ops)
+    ]
+    state = GameState(direction="UP", snake=[{"x": 5, "y": y} for y in range(20)], food={"x": 1, "y": 1})
+    rng = random.Random(0)
+
+    def add_score(i):
+        store.add_score(LeaderboardEntry(
+            id=uuid4(), userId=users[i].id, username=users[i].username,
+            score=rng.randint(0, 10_000), mode=rng.choice(MODES), timestamp=now,
+        ))
+
+    return [
+        run("create_user", ops, lambda i: store.create_user(users[i])),
+        run("get_user_by_username", ops, lambda i: store.get_user_by_username(users[i].username)),
+        run("add_score", ops, add_score),
+        run("get_leaderboard(top 100)", ops // 10, lambda i: store.get_leaderboard(limit=100)),
+        run("get_leaderboard(mode, top 100)", ops // 10, lambda i: store.get_leaderboard(mode="walls", limit=100)),
+        run("create_session", ops, lambda i: store.create_session(sessions[i])),
+        run("update_session", ops, lambda i: store.update_session(str(sessions[i].id), {"currentScore": i, "gameState": state})),
+        run("get_active_sessions(10)", ops // 10, lambda i: store.get_active_sessions(limit=10)),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ops", type=int, default=5000)
+    parser.add_argument("--sqlite-path", default=None)
+    args = parser.parse_args()
+
+    memory = MockDB()
+    memory.reset()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.sqlite_path or os.path.join(tmp, "bench.db")
+        sqlite = SQLiteDB(path, seed=False)
+        sqlite.reset()
+        results = zip(bench(memory, args.ops), bench(sqlite, args.ops))
+        print(f"{'operation':<32} {'memory ops/s':>14} {'sqlite ops/s':>14}")
+        for (name, mem_rate), (_, sql_rate) in results:
+            print(f"{name:<32} {mem_rate:>14,.0f} {sql_rate:>14,.0f}")
+        sqlite.pool.close()
+
+
+if __name__ == "__main__":
+    main()
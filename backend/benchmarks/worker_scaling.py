@@ -0,0 +1,114 @@
+"""Request throughput as uvicorn workers are added, on the shared SQLite store.
+
+Starts ``uvicorn app.main:app --workers N`` against a fresh SQLite file for
+each worker count and drives it from several client processes: mostly
+leaderboard and active-session reads, with a score submission every
+``--write-every`` requests. Before timing, it checks that a score submitted
+through one connection is visible through every other one.
+
+Throughput can only scale with the cores that are free for the workers,
+so run this on a machine with at least as many cores as the largest
+worker count plus the client processes.
+
+    uv run python -m benchmarks.worker_scaling --workers 1 2 4 --clients 8
+"""
+import argparse
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+USER = {"username": "scaleuser", "email": "scale@example.com", "password": "password123"}
+READS = ["/leaderboard?limit=25", "/leaderboard?mode=walls&limit=25", "/sessions/active"]
+
+
+def wait_ready(base_url, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/").status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError("server did not start")
+
+
+def client_loop(base_url, token, duration, write_every, seed):
+    headers = {"Authorization": f"Bearer {token}"}
+    done = 0
+    with httpx.Client(base_url=base_url) as client:
+        deadline = time.perf_counter() + duration
+        while time.perf_counter() < deadline:
+            if write_every and done % write_every == write_every - 1:
+                client.post("/leaderboard/submit", headers=headers, json={"score": (seed * 7919 + done) % 10_000, "mode": "walls"})
+            else:
+                client.get(READS[(seed + done) % len(READS)])
+            done += 1
+    return done
+
+
+def check_consistency(base_url, token, connections=8):
+    # New connections are spread over the workers by the kernel
+    score = 987_654
+    httpx.post(
+        f"{base_url}/leaderboard/submit", headers={"Authorization": f"Bearer {token}"},
+        json={"score": score, "mode": "walls"},
+    ).raise_for_status()
+    for _ in range(connections):
+        top = httpx.get(f"{base_url}/leaderboard?limit=1").json()["data"][0]
+        assert top["score"] == score, "a worker served a stale leaderboard"
+
+
+def run(workers, args):
+    with tempfile.TemporaryDirectory() as tmp:
+        # Every client submits as one user, far above the per-user submit limit
+        env = dict(os.environ, SNAKE_STORAGE="sqlite", SNAKE_SQLITE_PATH=os.path.join(tmp, "scale.db"),
+                   SNAKE_SESSION_FLUSH_INTERVAL="0", SNAKE_RATE_LIMIT_SUBMITS="0")
+        base_url = f"http://127.0.0.1:{args.port}"
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port),
+             "--workers", str(workers), "--log-level", "warning"],
+            env=env,
+        )
+        try:
+            wait_ready(base_url)
+            token = httpx.post(f"{base_url}/auth/signup", json=USER).json()["token"]
+            check_consistency(base_url, token)
+            with multiprocessing.Pool(args.clients) as pool:
+                start = time.perf_counter()
+                counts = pool.starmap(
+                    client_loop,
+                    [(base_url, token, args.duration, args.write_every, i) for i in range(args.clients)],
+                )
+                elapsed = time.perf_counter() - start
+            return sum(counts) / elapsed
+        finally:
+            server.terminate()
+            server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=8, help="load generator processes")
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--write-every", type=int, default=20)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} cores")
+    print(f"{'workers':>8} {'req/s':>10} {'scaling':>8}")
+    baseline = None
+    for workers in args.workers:
+        rate = run(workers, args)
+        baseline = baseline or rate / workers
+        print(f"{workers:>8} {rate:>10.0f} {rate / baseline:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
+from datetime import timedelta
+
 from fastapi.testclient import TestClient
 import pytest
 from app.main import app
@@ -21,3 +23,10 @@ def auth_headers(client):
     response = client.post("/auth/login", json={"email": "test@example.com", "password": "password123"})
     token = response.json()["token"]
     return {"Authorization": f"Bearer {token}"}
+
+@pytest.fixture
+def age_session():
+    # Client-run games can't report more moves than their age allows at top speed
+    def age(session_id, seconds=60):
+        db.get_session(session_id).startedAt -= timedelta(seconds=seconds)
+    return age
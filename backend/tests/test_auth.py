@@ -42,3 +42,78 @@ def test_me(client, auth_headers):
     response = client.get("/auth/me", headers=auth_headers)
     assert response.status_code == 200
     assert response.json()["email"] == "test@example.com"
+
+def test_signup_duplicate_username(client):
+    client.post(
+        "/auth/signup",
+        json={"username": "samename", "email": "first@example.com", "password": "password123"}
+    )
+    response = client.post(
+        "/auth/signup",
+        json={"username": "samename", "email": "second@example.com", "password": "password123"}
+    )
+    assert response.status_code == 409
+    assert response.json()["detail"] == "User with this username already exists"
+
+def test_login_email_case_insensitive(client):
+    client.post(
+        "/auth/signup",
+        json={"username": "caseuser", "email": "Case.User@Example.com", "password": "password123"}
+    )
+    response = client.post(
+        "/auth/login",
+        json={"email": "case.user@example.com", "password": "password123"}
+    )
+    assert response.status_code == 200
+
+def test_signup_rejected_when_hash_pool_saturated(client, monkeypatch):
+    from app import auth
+    from app.hashing import PasswordHasher
+    monkeypatch.setattr(auth, "hasher", PasswordHasher(workers=1, max_pending=0))
+    response = client.post(
+        "/auth/signup",
+        json={"username": "busyuser", "email": "busy@example.com", "password": "password123"}
+    )
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
+
+def test_hasher_restarts_after_shutdown():
+    import asyncio
+    from app.hashing import PasswordHasher, verify_password
+    hasher = PasswordHasher(workers=1, max_pending=4)
+    hashed = asyncio.run(hasher.hash("password123"))
+    hasher.shutdown()
+    assert asyncio.run(hasher.verify("password123", hashed))
+    hasher.shutdown()
+    assert verify_password("password123", hashed)
+
+def test_logout_revokes_token(client, auth_headers):
+    assert client.get("/auth/me", headers=auth_headers).status_code == 200
+    response = client.post("/auth/logout", headers=auth_headers)
+    assert response.status_code == 200
+    assert client.get("/auth/me", headers=auth_headers).status_code == 401
+
+def test_cached_token_dropped_when_user_deleted(client, auth_headers):
+    from app.db import db
+    assert client.get("/auth/me", headers=auth_headers).status_code == 200
+    user = db.get_user_by_username("testuser")
+    db.delete_user(str(user.id))
+    assert client.get("/auth/me", headers=auth_headers).status_code == 401
+
+def test_shared_state_is_synced_only_where_it_is_read(client, auth_headers, monkeypatch):
+    from app.db import async_db
+    calls = []
+
+    async def sync():
+        calls.append(None)
+
+    monkeypatch.setattr(async_db, "sync", sync)
+    for path in ("/", "/metrics", "/sessions/active"):
+        client.get(path)
+    assert len(calls) == 0
+    client.get("/leaderboard")
+    client.get("/auth/me", headers=auth_headers)
+    assert len(calls) == 2
+    # Once per request, though both the router and get_current_user depend on it
+    client.get("/leaderboard/me", headers=auth_headers)
+    assert len(calls) == 3
@@ -0,0 +1,166 @@
+import asyncio
+import sys
+import threading
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import pytest
+
+from app.db import MockDB
+from app.models import User, LeaderboardEntry, GameSessionDetails
+from app.sqlite_db import SQLiteDB
+from app.storage import AsyncStorage
+
+
+def make_entry(user, score, mode="walls"):
+    return LeaderboardEntry(
+        id=uuid4(), userId=user.id, username=user.username, score=score, mode=mode, timestamp=datetime.now(timezone.utc)
+    )
+
+def make_user(username):
+    return User(id=uuid4(), username=username, email=f"{username}@example.com", createdAt=datetime.now(timezone.utc))
+
+@pytest.fixture
+def fast_switching():
+    # Hand the GIL over far more often than usual, so threads interleave inside methods
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+def run_threads(*targets):
+    errors = []
+
+    def guarded(target):
+        try:
+            target()
+        except BaseException as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=guarded, args=(target,)) for target in targets]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+
+def test_mockdb_stays_consistent_under_threads(fast_switching):
+    store = MockDB()
+    store.reset()
+    users = [store.create_user(make_user(f"player{i}")) for i in range(20)]
+    renamed = store.create_user(make_user("renamed"))
+    writers, per_writer = 8, 2000
+    done = threading.Event()
+
+    def write_scores(seed):
+        for i in range(per_writer):
+            store.add_score(make_entry(users[(seed + i) % len(users)], (seed * 7919 + i * 104729) % 10_000,
+                                       mode=("walls", "passthrough")[i % 2]))
+
+    def read_pages():
+        while not done.is_set():
+            page = store.get_leaderboard(limit=50)
+            assert [entry.rank for entry in page] == list(range(1, len(page) + 1))
+            assert [entry.score for entry in page] == sorted((entry.score for entry in page), reverse=True)
+            store.get_leaderboard(mode="walls", limit=20)
+            store.get_best_scores(limit=20)
+
+    def churn_sessions():
+        for i in range(200):
+            session = store.create_session(GameSessionDetails(
+                id=uuid4(), userId=users[0].id, username="player0", mode="walls", startedAt=datetime.now(timezone.utc)
+            ))
+            store.update_session(str(session.id), {"currentScore": i})
+            store.update_session(str(session.id), {"isActive": False})
+            assert store.get_session(str(session.id)) is not None
+
+    def rename_user():
+        for i in range(200):
+            store.update_user(str(renamed.id), {"username": f"renamed{i}"})
+
+    def read_user():
+        while not done.is_set():
+            # Lookups take no lock but must never miss a user mid-update
+            assert store.get_user(str(renamed.id)) is not None
+            assert store.get_user_by_email("renamed@example.com") is not None
+
+    def writers_then_done():
+        try:
+            run_threads(*(lambda seed=seed: write_scores(seed) for seed in range(writers)), churn_sessions, rename_user)
+        finally:
+            done.set()
+
+    run_threads(writers_then_done, read_pages, read_user)
+
+    total = writers * per_writer
+    assert store.get_total_scores() == total
+    assert store.get_total_scores(mode="walls") + store.get_total_scores(mode="passthrough") == total
+    assert sum(1 for _ in store.iter_scores(batch_size=97)) == total
+    assert store.get_total_players() == len(users)
+    assert store.get_active_sessions() == []
+    assert store.get_user_by_username("renamed199") is not None
+
+def test_async_storage_runs_memory_backend_inline():
+    store = MockDB()
+    store.reset()
+    storage = AsyncStorage(store, workers=4)
+    user = store.create_user(make_user("alice"))
+
+    async def scenario():
+        await asyncio.gather(*(storage.add_score(make_entry(user, i)) for i in range(100)))
+        return await storage.get_leaderboard(limit=3), await storage.get_total_scores()
+
+    page, total = asyncio.run(scenario())
+    assert [entry.score for entry in page] == [99, 98, 97]
+    assert total == 100
+
+def test_async_storage_moves_blocking_backend_off_the_loop(tmp_path):
+    store = SQLiteDB(str(tmp_path / "async.db"), pool_size=4, seed=False)
+    storage = AsyncStorage(store, workers=4)
+    user = store.create_user(make_user("bob"))
+    listener_threads = []
+    store.add_score_listener(lambda entry: listener_threads.append(threading.get_ident()))
+    entries = [make_entry(user, score) for score in range(200)]
+
+    async def submit(entry):
+        await storage.add_score(entry)
+        # Listeners are delivered before the caller resumes
+        return len(listener_threads)
+
+    async def scenario():
+        loop_thread = threading.get_ident()
+        seen = await asyncio.gather(*(submit(entry) for entry in entries))
+        page = await storage.get_leaderboard(limit=5)
+        return loop_thread, seen, page
+
+    try:
+        loop_thread, seen, page = asyncio.run(scenario())
+    finally:
+        storage.shutdown()
+        store.pool.close()
+    assert listener_threads == [loop_thread] * len(entries)
+    assert min(seen) >= 1 and max(seen) == len(entries)
+    assert [entry.score for entry in page] == [199, 198, 197, 196, 195]
+
+def test_async_storage_propagates_backend_errors(tmp_path):
+    store = SQLiteDB(str(tmp_path / "errors.db"), pool_size=2, seed=False)
+    storage = AsyncStorage(store, workers=2)
+    store.create_user(make_user("carol"))
+    try:
+        with pytest.raises(ValueError, match="already exists"):
+            asyncio.run(storage.create_user(make_user("carol")))
+    finally:
+        storage.shutdown()
+        store.pool.close()
+
+def test_async_storage_restarts_after_shutdown(tmp_path):
+    store = SQLiteDB(str(tmp_path / "restart.db"), pool_size=2, seed=False)
+    storage = AsyncStorage(store, workers=2)
+    try:
+        assert asyncio.run(storage.get_total_scores()) == 0
+        storage.shutdown()
+        assert asyncio.run(storage.get_total_scores()) == 0
+    finally:
+        storage.shutdown()
+        store.pool.close()
@@ -0,0 +1,302 @@
+import gzip
+import random
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+
+from app import config
+from app.bulk import export_chunks, gzip_chunks, main as bulk_main, parse_lines
+from app.db import MockDB, DuplicateUserError
+from app.models import User, LeaderboardEntry, GameSessionDetails, GameState
+from app.sqlite_db import SQLiteDB
+
+
+def make_user(username, email):
+    return User(id=uuid4(), username=username, email=email, createdAt=datetime.now(timezone.utc))
+
+@pytest.fixture(params=["memory", "sqlite"])
+def empty_db(request, tmp_path):
+    if request.param == "sqlite":
+        store = SQLiteDB(str(tmp_path / "test.db"), pool_size=2)
+    else:
+        store = MockDB()
+    store.reset()
+    return store
+
+def test_create_user_enforces_unique_email(empty_db):
+    empty_db.create_user(make_user("alice", "alice@example.com"))
+    with pytest.raises(DuplicateUserError) as exc:
+        empty_db.create_user(make_user("alice2", "ALICE@example.com"))
+    assert exc.value.field == "email"
+    assert len(empty_db.users) == 1
+
+def test_create_user_enforces_unique_username(empty_db):
+    empty_db.create_user(make_user("bob", "bob@example.com"))
+    with pytest.raises(DuplicateUserError) as exc:
+        empty_db.create_user(make_user("bob", "bob2@example.com"))
+    assert exc.value.field == "username"
+
+def test_update_user_reindexes(empty_db):
+    user = empty_db.create_user(make_user("carol", "carol@example.com"))
+    empty_db.create_user(make_user("dave", "dave@example.com"))
+
+    updated = empty_db.update_user(str(user.id), {"username": "caroline", "email": "caroline@example.com"})
+    assert empty_db.get_user_by_username("carol") is None
+    assert empty_db.get_user_by_email("carol@example.com") is None
+    assert empty_db.get_user_by_username("caroline") == updated
+    assert empty_db.get_user_by_email("caroline@example.com") == updated
+
+    with pytest.raises(DuplicateUserError):
+        empty_db.update_user(str(user.id), {"username": "dave"})
+    # A rejected update leaves the indexes untouched
+    assert empty_db.get_user_by_username("caroline") == updated
+
+def test_delete_user_unindexes(empty_db):
+    user = empty_db.create_user(make_user("erin", "erin@example.com"))
+    assert empty_db.delete_user(str(user.id)) == user
+    assert empty_db.get_user_by_email("erin@example.com") is None
+    assert empty_db.get_user_by_username("erin") is None
+    assert empty_db.delete_user(str(user.id)) is None
+
+def test_leaderboard_pages_and_ranks(empty_db):
+    now = datetime.now(timezone.utc)
+    for i, (score, mode) in enumerate([(10, "walls"), (50, "passthrough"), (30, "walls"), (30, "walls")]):
+        entry = LeaderboardEntry(
+            id=uuid4(), userId=uuid4(), username=f"p{i}", score=score, mode=mode, timestamp=now
+        )
+        empty_db.add_score(entry)
+
+    page = empty_db.get_leaderboard(limit=10)
+    assert [(e.username, e.rank) for e in page] == [("p1", 1), ("p2", 2), ("p3", 3), ("p0", 4)]
+    walls = empty_db.get_leaderboard(mode="walls", limit=2, offset=1)
+    assert [(e.username, e.rank) for e in walls] == [("p3", 3), ("p0", 4)]
+    assert empty_db.get_total_scores() == 4
+    assert empty_db.get_total_scores(mode="walls") == 3
+
+def test_best_scores_keep_one_entry_per_user(empty_db):
+    now = datetime.now(timezone.utc)
+    alice, bob = uuid4(), uuid4()
+    for user_id, name, score, mode in [
+        (alice, "alice", 10, "walls"), (bob, "bob", 40, "walls"), (alice, "alice", 70, "passthrough"),
+        (alice, "alice", 30, "walls"), (bob, "bob", 20, "walls"), (alice, "alice", 30, "walls"),
+    ]:
+        empty_db.add_score(LeaderboardEntry(
+            id=uuid4(), userId=user_id, username=name, score=score, mode=mode, timestamp=now
+        ))
+
+    walls = empty_db.get_best_scores(mode="walls")
+    assert [(e.username, e.score, e.rank) for e in walls] == [("bob", 40, 1), ("alice", 30, 2)]
+    overall = empty_db.get_best_scores()
+    assert [(e.username, e.score, e.mode) for e in overall] == [("alice", 70, "passthrough"), ("bob", 40, "walls")]
+    assert empty_db.get_total_players() == 2
+    assert empty_db.get_total_players(mode="passthrough") == 1
+
+    mine = empty_db.get_personal_best(str(alice), mode="walls")
+    assert (mine.score, mine.rank) == (30, 2)
+    assert empty_db.get_personal_best(str(bob), mode="passthrough") is None
+
+def test_leaderboard_windows(empty_db):
+    now = datetime.now(timezone.utc)
+    for age, score, mode in [
+        (timedelta(minutes=1), 10, "walls"), (timedelta(hours=3), 40, "walls"),
+        (timedelta(days=2), 30, "passthrough"), (timedelta(days=20), 90, "walls"),
+    ]:
+        empty_db.add_score(LeaderboardEntry(
+            id=uuid4(), userId=uuid4(), username=f"s{score}", score=score, mode=mode, timestamp=now - age
+        ))
+
+    assert [e.score for e in empty_db.get_leaderboard(window="hour")] == [10]
+    assert [(e.score, e.rank) for e in empty_db.get_leaderboard(window="day")] == [(40, 1), (10, 2)]
+    week = empty_db.get_leaderboard(mode="walls", window="week")
+    assert [(e.score, e.rank) for e in week] == [(40, 1), (10, 3)]
+    assert empty_db.get_total_scores(window="week") == 3
+    assert empty_db.get_total_scores(mode="passthrough", window="day") == 0
+    assert empty_db.get_total_scores() == 4
+
+def random_entries(count, players=20):
+    rng = random.Random(count)
+    now = datetime.now(timezone.utc)
+    users = [uuid4() for _ in range(players)]
+    return [
+        LeaderboardEntry(
+            id=uuid4(), userId=users[i % players], username=f"p{i % players}", score=rng.randrange(0, 500, 10),
+            mode=rng.choice(["walls", "passthrough"]), timestamp=now - timedelta(minutes=rng.randrange(0, 3000)),
+        )
+        for i in range(count)
+    ]
+
+def board(store):
+    return (
+        [(e.id, e.rank) for e in store.get_leaderboard(limit=1000)],
+        [(e.id, e.rank) for e in store.get_leaderboard(mode="walls", limit=1000, window="day")],
+        [(e.id, e.rank) for e in store.get_best_scores(limit=1000)],
+        [(e.id, e.rank) for e in store.get_best_scores(mode="passthrough", limit=1000)],
+    )
+
+def test_import_scores_matches_add_score(empty_db, tmp_path):
+    entries = random_entries(300)
+    reference = MockDB()
+    reference.reset()
+    for entry in entries:
+        reference.add_score(entry)
+    assert empty_db.import_scores(iter(entries[:100])) == 100
+    # Importing into a non-empty board appends after existing ties
+    assert empty_db.import_scores(iter(entries[100:])) == 200
+    assert board(empty_db) == board(reference)
+    assert empty_db.get_total_scores(mode="walls") == reference.get_total_scores(mode="walls")
+
+def test_mode_pages_rank_like_the_reference(empty_db):
+    reference = MockDB()
+    reference.reset()
+    for entry in random_entries(400):
+        reference.add_score(entry)
+        empty_db.add_score(entry)
+    for window in (None, "hour", "day"):
+        for offset, limit in [(0, 1), (0, 50), (37, 25), (190, 100)]:
+            page = lambda store: [
+                (e.id, e.rank) for e in store.get_leaderboard(mode="walls", limit=limit, offset=offset, window=window)
+            ]
+            assert page(empty_db) == page(reference)
+
+def test_export_round_trip(empty_db):
+    for entry in random_entries(250):
+        empty_db.add_score(entry)
+    restored = MockDB()
+    restored.reset()
+    lines = b"".join(gzip_chunks(export_chunks(empty_db, "scores", batch_size=64)))
+    assert restored.import_scores(parse_lines("scores", gzip.decompress(lines).splitlines())) == 250
+    # Ties keep their order, so every rank survives the round trip
+    assert board(restored) == board(empty_db)
+
+    now = datetime.now(timezone.utc)
+    for i in range(5):
+        empty_db.create_session(GameSessionDetails(
+            id=uuid4(), userId=uuid4(), username=f"s{i}", mode="walls", startedAt=now, isActive=i % 2 == 0
+        ))
+    lines = b"".join(export_chunks(empty_db, "sessions", batch_size=2)).splitlines()
+    assert len(lines) == 5
+    assert restored.import_sessions(parse_lines("sessions", lines)) == 5
+    assert {s.id for s in restored.get_active_sessions(limit=10)} == {s.id for s in empty_db.get_active_sessions(limit=10)}
+
+def test_export_does_not_repeat_rows_added_midway():
+    store = MockDB()
+    store.reset()
+    for entry in random_entries(100):
+        store.add_score(entry)
+    scores = store.iter_scores(batch_size=10)
+    seen = [next(scores) for _ in range(10)]
+    store.add_score(LeaderboardEntry(
+        id=uuid4(), userId=uuid4(), username="late", score=10_000, mode="walls", timestamp=datetime.now(timezone.utc)
+    ))
+    seen += list(scores)
+    assert len({e.id for e in seen}) == len(seen) == 100
+
+def test_bulk_cli_refuses_the_memory_backend(monkeypatch, capsys):
+    # A store built by the CLI process would hold only seed data
+    monkeypatch.setattr(config, "STORAGE_BACKEND", "memory")
+    monkeypatch.setattr("sys.argv", ["app.bulk", "import", "scores", "scores.ndjson"])
+    with pytest.raises(SystemExit) as exc:
+        bulk_main()
+    assert exc.value.code == 2
+    assert "SNAKE_STORAGE=sqlite" in capsys.readouterr().err
+
+def test_session_update_and_active_feed(empty_db):
+    now = datetime.now(timezone.utc)
+    ids = []
+    for i in range(3):
+        session = GameSessionDetails(
+            id=uuid4(), userId=uuid4(), username=f"p{i}", mode="walls", startedAt=now
+        )
+        empty_db.create_session(session)
+        ids.append(str(session.id))
+
+    updated = empty_db.update_session(ids[0], {"currentScore": 40, "gameState": GameState(direction="UP")})
+    assert updated.currentScore == 40
+    assert empty_db.get_session(ids[0]).gameState.direction == "UP"
+
+    empty_db.update_session(ids[1], {"isActive": False})
+    active = empty_db.get_active_sessions(limit=10)
+    assert [str(s.id) for s in active] == [ids[0], ids[2]]
+    assert empty_db.update_session("missing", {"currentScore": 1}) is None
+
+def test_ended_sessions_leave_active_feed(empty_db):
+    now = datetime.now(timezone.utc)
+    session = GameSessionDetails(id=uuid4(), userId=uuid4(), username="p", mode="walls", startedAt=now)
+    empty_db.create_session(session)
+    empty_db.update_session(str(session.id), {"isActive": False, "score": 10})
+    assert empty_db.get_active_sessions(limit=10) == []
+    assert empty_db.get_session(str(session.id)).score == 10
+
+def test_replays_append_and_claim_once(empty_db):
+    session_id = str(uuid4())
+    assert empty_db.get_replay(session_id) is None
+    empty_db.append_replay(session_id, b"SNKR\x00")
+    empty_db.append_replay(session_id, b"\xff\x01")
+    assert empty_db.get_replay(session_id) == b"SNKR\x00\xff\x01"
+    assert empty_db.get_replay(session_id, unclaimed=True) == b"SNKR\x00\xff\x01"
+    assert empty_db.claim_replay(session_id) == b"SNKR\x00\xff\x01"
+    assert empty_db.claim_replay(session_id) is None
+    assert empty_db.get_replay(session_id, unclaimed=True) is None
+    assert empty_db.get_replay(session_id) == b"SNKR\x00\xff\x01"
+    assert empty_db.claim_replay(str(uuid4())) is None
+
+def test_sessions_attribute_holds_active_and_ended_sessions(empty_db):
+    now = datetime.now(timezone.utc)
+    active, ended = (
+        GameSessionDetails(id=uuid4(), userId=uuid4(), username=f"p{i}", mode="walls", startedAt=now)
+        for i in range(2)
+    )
+    empty_db.sessions = {str(active.id): active, str(ended.id): ended}
+    empty_db.update_session(str(ended.id), {"isActive": False})
+    sessions = empty_db.sessions
+    assert set(sessions) == {str(active.id), str(ended.id)}
+    assert sessions[str(ended.id)].isActive is False
+    empty_db.sessions = {}
+    assert empty_db.sessions == {}
+
+def test_archive_evicts_oldest_ended_sessions(monkeypatch):
+    monkeypatch.setattr(config, "SESSION_ARCHIVE_SIZE", 2)
+    store = MockDB()
+    store.reset()
+    now = datetime.now(timezone.utc)
+    ids = []
+    for i in range(3):
+        session = GameSessionDetails(id=uuid4(), userId=uuid4(), username=f"p{i}", mode="walls", startedAt=now)
+        store.create_session(session)
+        store.update_session(str(session.id), {"isActive": False})
+        ids.append(str(session.id))
+    assert store.get_session(ids[0]) is None
+    assert store.get_session(ids[2]) is not None
+    assert set(store.sessions) == set(ids[1:])
+
+def test_sqlite_seeds_once_for_concurrent_workers(tmp_path):
+    path = str(tmp_path / "shared.db")
+    first, second = SQLiteDB(path, pool_size=1), SQLiteDB(path, pool_size=1)
+    assert len(first.users) == len(second.users) == 3
+
+def test_sqlite_sync_notifies_other_workers(tmp_path):
+    path = str(tmp_path / "shared.db")
+    worker_a, worker_b = SQLiteDB(path, pool_size=1, seed=False), SQLiteDB(path, pool_size=1, seed=False)
+    seen_a, seen_b = [], []
+    for store, seen in ((worker_a, seen_a), (worker_b, seen_b)):
+        store.add_user_listener(lambda user, seen=seen: seen.append(("user", user)))
+        store.add_score_listener(lambda entry, seen=seen: seen.append(("score", entry)))
+        store.add_revocation_listener(lambda token, exp, seen=seen: seen.append(("revoked", token)))
+
+    user = worker_a.create_user(make_user("frank", "frank@example.com"))
+    worker_a.add_score(LeaderboardEntry(
+        id=uuid4(), userId=user.id, username="frank", score=5, mode="walls", timestamp=datetime.now(timezone.utc)
+    ))
+    worker_a.update_user(str(user.id), {"username": "franky"})
+    worker_a.revoke_token("some.jwt.token", datetime.now(timezone.utc).timestamp() + 60)
+    seen_a.clear()
+
+    worker_b.sync()
+    assert sorted(kind for kind, _ in seen_b) == ["revoked", "score", "user"]
+    assert ("revoked", "some.jwt.token") in seen_b
+    seen_b.clear()
+    worker_b.sync()
+    # Nothing new, and a worker's own writes were already announced locally
+    worker_a.sync()
+    assert seen_a == seen_b == []
@@ -0,0 +1,101 @@
+import random
+
+import pytest
+
+from app.engine import GRID_SIZE, SnakeEngine
+from app.rules import game_speed
+
+OPPOSITE = {"UP": "DOWN", "DOWN": "UP", "LEFT": "RIGHT", "RIGHT": "LEFT"}
+MOVES = {"UP": (0, -1), "DOWN": (0, 1), "LEFT": (-1, 0), "RIGHT": (1, 0)}
+
+
+def reference_step(state, mode, next_direction, next_food):
+    """updateGameState from frontend/src/lib/gameLogic.ts, food supplied by the caller."""
+    if state["gameOver"]:
+        return state
+    direction = state["direction"] if OPPOSITE[state["direction"]] == next_direction else next_direction
+    head = state["snake"][0]
+    dx, dy = MOVES[direction]
+    x, y = head["x"] + dx, head["y"] + dy
+    if mode == "passthrough":
+        x, y = x % GRID_SIZE, y % GRID_SIZE
+    elif not (0 <= x < GRID_SIZE and 0 <= y < GRID_SIZE):
+        return {**state, "gameOver": True}
+    new_head = {"x": x, "y": y}
+    if new_head in state["snake"][1:]:
+        return {**state, "gameOver": True}
+    ate = new_head == state["food"]
+    snake = [new_head] + state["snake"]
+    if not ate:
+        snake = snake[:-1]
+    return {
+        **state,
+        "snake": snake,
+        "direction": direction,
+        "food": next_food() if ate else state["food"],
+        "score": state["score"] + (10 if ate else 0),
+    }
+
+
+@pytest.mark.parametrize("mode", ["walls", "passthrough"])
+def test_engine_matches_frontend_rules(mode):
+    rng = random.Random(7)
+    engine = SnakeEngine(capacity=4, seed=1)
+    now = 0.0
+    slots = [engine.spawn(mode, now=now) for _ in range(20)]
+    states = {slot: {**engine.state(slot), "score": 0} for slot in slots}
+    inputs = {slot: "RIGHT" for slot in slots}
+
+    for _ in range(400):
+        for slot in slots:
+            if rng.random() < 0.3:
+                inputs[slot] = rng.choice(list(MOVES))
+                engine.steer(slot, inputs[slot])
+        now += 150
+        moved, ended = engine.tick(now)
+        for slot in slots:
+            if states[slot]["gameOver"]:
+                continue
+            due = slot in moved or slot in ended
+            if not due:
+                continue
+            states[slot] = reference_step(states[slot], mode, inputs[slot], lambda: engine.state(slot)["food"])
+            actual = {**engine.state(slot), "score": engine.score(slot)}
+            assert actual == states[slot]
+    # Over 400 ticks every walls game runs into something; passthrough games mostly bite themselves
+    assert any(state["gameOver"] for state in states.values())
+    assert any(state["score"] > 0 for state in states.values())
+
+
+def test_engine_ticks_follow_game_speed():
+    engine = SnakeEngine(seed=0)
+    slot = engine.spawn("passthrough", now=0)
+    assert not len(engine.tick(149)[0])
+    assert list(engine.tick(150)[0]) == [slot]
+    assert not len(engine.tick(299)[0])
+    assert game_speed(0) == 150 and game_speed(120) == 130 and game_speed(10_000) == 50
+
+
+def test_engine_reversal_is_ignored_and_walls_end_the_game():
+    engine = SnakeEngine(seed=0)
+    slot = engine.spawn("walls", now=0)
+    engine.steer(slot, "LEFT")
+    engine.tick(150)
+    assert engine.state(slot)["direction"] == "RIGHT"
+    assert engine.state(slot)["snake"][0] == {"x": 11, "y": 10}
+
+    now = 150
+    while not engine.game_over(slot):
+        now += 150
+        engine.tick(now)
+    assert engine.state(slot)["snake"][0] == {"x": GRID_SIZE - 1, "y": 10}
+
+
+def test_engine_reuses_slots_and_grows():
+    engine = SnakeEngine(capacity=2, seed=0)
+    slots = [engine.spawn() for _ in range(5)]
+    assert engine.capacity >= 5 and len(engine) == 5
+    engine.remove(slots[1])
+    assert engine.spawn("passthrough") == slots[1]
+    with pytest.raises(ValueError):
+        engine.spawn("speedrun")
@@ -1,3 +1,6 @@
+import pytest
+
+
 def test_get_leaderboard_empty(client):
     response = client.get("/leaderboard")
     assert response.status_code == 200
@@ -17,6 +20,12 @@ def test_submit_score(client, auth_headers):
     assert data["mode"] == "walls"
     assert data["rank"] == 1
 
+@pytest.mark.parametrize("body", [{"score": 2**63}, {"score": 100, "duration": 2**63}])
+def test_submit_score_out_of_sqlite_range(client, auth_headers, body):
+    # Refused by the model, so the SQLite backend can't fail on binding it
+    response = client.post("/leaderboard/submit", headers=auth_headers, json={"mode": "walls", **body})
+    assert response.status_code == 422
+
 def test_submit_score_unauth(client):
     response = client.post(
         "/leaderboard/submit",
@@ -40,3 +49,173 @@ def test_leaderboard_ordering(client, auth_headers):
     assert data[0]["rank"] == 1
     assert data[1]["rank"] == 2
     assert data[2]["rank"] == 3
+
+def test_leaderboard_mode_pagination(client, auth_headers):
+    for score, mode in [(100, "walls"), (400, "passthrough"), (300, "walls"), (200, "walls")]:
+        client.post("/leaderboard/submit", headers=auth_headers, json={"score": score, "mode": mode})
+
+    response = client.get("/leaderboard?mode=walls&limit=2&offset=1")
+    body = response.json()
+    assert body["total"] == 3
+    # Ranks stay global across modes
+    assert [(e["score"], e["rank"]) for e in body["data"]] == [(200, 3), (100, 4)]
+
+    response = client.get("/leaderboard?mode=speedrun")
+    assert response.json() == {"data": [], "total": 0}
+
+def test_leaderboard_best_view_and_me(client, auth_headers):
+    response = client.get("/leaderboard/me", headers=auth_headers)
+    assert response.status_code == 404
+
+    for score, mode in [(100, "walls"), (300, "walls"), (200, "walls"), (50, "passthrough")]:
+        client.post("/leaderboard/submit", headers=auth_headers, json={"score": score, "mode": mode})
+
+    body = client.get("/leaderboard?view=best").json()
+    assert body["total"] == 1
+    assert [e["score"] for e in body["data"]] == [300]
+
+    response = client.get("/leaderboard/me?mode=passthrough", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["entry"]["score"] == 50
+    assert response.json()["entry"]["rank"] == 1
+    assert response.json()["players"] == 1
+
+    assert client.get("/leaderboard/me").status_code == 401
+    assert client.get("/leaderboard?view=top").status_code == 422
+
+def test_leaderboard_window(client, auth_headers):
+    for score in (100, 300):
+        client.post("/leaderboard/submit", headers=auth_headers, json={"score": score, "mode": "walls"})
+
+    body = client.get("/leaderboard?window=day&mode=walls").json()
+    assert body["total"] == 2
+    assert [(e["score"], e["rank"]) for e in body["data"]] == [(300, 1), (100, 2)]
+
+    assert client.get("/leaderboard?window=month").status_code == 422
+    assert client.get("/leaderboard?window=day&view=best").status_code == 400
+
+def test_leaderboard_etag_and_invalidation(client, auth_headers):
+    client.post("/leaderboard/submit", headers=auth_headers, json={"score": 100, "mode": "walls"})
+
+    first = client.get("/leaderboard")
+    etag = first.headers["etag"]
+    again = client.get("/leaderboard", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.headers["etag"] == etag
+
+    client.post("/leaderboard/submit", headers=auth_headers, json={"score": 200, "mode": "walls"})
+    changed = client.get("/leaderboard", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert [e["score"] for e in changed.json()["data"]] == [200, 100]
+
+def play_recorded_session(client, auth_headers, age_session, ticks):
+    sess_id = client.post("/sessions/start", headers=auth_headers, json={"mode": "passthrough"}).json()["id"]
+    age_session(sess_id)
+    client.post(f"/sessions/{sess_id}/input", headers=auth_headers, json={"direction": "DOWN", "tick": 1})
+    client.post(f"/sessions/{sess_id}/end", headers=auth_headers, json={"finalScore": 0, "ticks": ticks})
+    return sess_id
+
+def test_submit_with_session_is_verified_by_replay(client, auth_headers, age_session):
+    import asyncio
+    from app.replay import replay_scores
+    from app.verification import verifier
+    sess_id = play_recorded_session(client, auth_headers, age_session, ticks=40)
+    score = replay_scores([client.get(f"/sessions/{sess_id}/replay").content])[0]
+
+    response = client.post(
+        "/leaderboard/submit", headers=auth_headers,
+        json={"score": score, "mode": "passthrough", "sessionId": sess_id}
+    )
+    assert response.status_code == 202
+    assert response.json()["status"] == "pending"
+    assert client.get("/leaderboard").json()["total"] == 0
+
+    assert asyncio.run(verifier.verify_pending()) == 1
+    assert client.get(f"/leaderboard/verifications/{sess_id}").json()["status"] == "verified"
+    assert client.get("/leaderboard").json()["data"][0]["score"] == score
+
+    # A session backs one submission
+    response = client.post(
+        "/leaderboard/submit", headers=auth_headers,
+        json={"score": score, "mode": "passthrough", "sessionId": sess_id}
+    )
+    assert response.status_code == 409
+
+def test_submit_with_session_rejects_wrong_score(client, auth_headers, age_session):
+    import asyncio
+    from app.verification import verifier
+    sess_id = play_recorded_session(client, auth_headers, age_session, ticks=10)
+    response = client.post(
+        "/leaderboard/submit", headers=auth_headers,
+        json={"score": 5000, "mode": "passthrough", "sessionId": sess_id}
+    )
+    assert response.status_code == 202
+    asyncio.run(verifier.verify_pending())
+    assert client.get(f"/leaderboard/verifications/{sess_id}").json()["status"] == "rejected"
+    assert client.get("/leaderboard").json()["total"] == 0
+
+def test_unverified_submission_can_be_made_again(client, auth_headers, age_session):
+    from app.verification import verifier
+    sess_id = play_recorded_session(client, auth_headers, age_session, ticks=10)
+    body = {"score": 0, "mode": "passthrough", "sessionId": sess_id}
+    assert client.post("/leaderboard/submit", headers=auth_headers, json=body).status_code == 202
+    # Queued once
+    assert client.post("/leaderboard/submit", headers=auth_headers, json=body).status_code == 409
+    # The log is only claimed by verification, so a queue lost with the process can be refilled
+    verifier._take()
+    verifier._results.clear()
+    assert client.post("/leaderboard/submit", headers=auth_headers, json=body).status_code == 202
+    verifier._take()
+
+def test_submit_with_active_or_mismatched_session(client, auth_headers, age_session):
+    sess_id = client.post("/sessions/start", headers=auth_headers, json={"mode": "walls"}).json()["id"]
+    age_session(sess_id)
+    body = {"score": 0, "mode": "walls", "sessionId": sess_id}
+    assert client.post("/leaderboard/submit", headers=auth_headers, json=body).status_code == 409
+    client.post(f"/sessions/{sess_id}/end", headers=auth_headers, json={"finalScore": 0, "ticks": 1})
+    body["mode"] = "passthrough"
+    assert client.post("/leaderboard/submit", headers=auth_headers, json=body).status_code == 400
+
+def test_export_streams_ndjson(client, auth_headers, monkeypatch):
+    import gzip
+    import json
+    from app import config
+    for score in (100, 300, 200):
+        client.post("/leaderboard/submit", headers=auth_headers, json={"score": score, "mode": "walls"})
+    # Only for admins; none are configured by default
+    assert client.get("/leaderboard/export").status_code == 401
+    assert client.get("/leaderboard/export", headers=auth_headers).status_code == 403
+    monkeypatch.setattr(config, "ADMIN_EMAILS", frozenset({"test@example.com"}))
+    response = client.get("/leaderboard/export", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.content.splitlines()]
+    assert sorted(row["score"] for row in rows) == [100, 200, 300]
+    assert all("rank" not in row for row in rows)
+
+    response = client.get("/leaderboard/export?compress=gzip", headers=auth_headers)
+    assert response.headers["content-disposition"] == 'attachment; filename="scores.ndjson.gz"'
+    assert len(gzip.decompress(response.content).splitlines()) == 3
+
+
+def test_export_reads_storage_off_the_event_loop(client, auth_headers, monkeypatch):
+    import asyncio
+    from app import bulk, config
+    client.post("/leaderboard/submit", headers=auth_headers, json={"score": 100, "mode": "walls"})
+    monkeypatch.setattr(config, "ADMIN_EMAILS", frozenset({"test@example.com"}))
+    export_chunks = bulk.export_chunks
+    on_loop = []
+
+    def chunks(*args):
+        for chunk in export_chunks(*args):
+            try:
+                asyncio.get_running_loop()
+                on_loop.append(True)
+            except RuntimeError:
+                on_loop.append(False)
+            yield chunk
+
+    monkeypatch.setattr(bulk, "export_chunks", chunks)
+    assert client.get("/leaderboard/export", headers=auth_headers).status_code == 200
+    assert on_loop == [False]
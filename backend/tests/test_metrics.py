@@ -0,0 +1,67 @@
+from app import metrics
+from app.db import db
+
+
+def sample(text, series):
+    for line in text.splitlines():
+        name, _, value = line.rpartition(" ")
+        if name == series:
+            return float(value)
+    return 0.0
+
+
+def scrape(client):
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    return response.text
+
+def test_histogram_exposition_is_cumulative():
+    histogram = metrics.Histogram("test_seconds", "Test", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(value)
+    assert list(histogram.samples('{op="x"}')) == [
+        'test_seconds_bucket{op="x",le="0.1"} 1',
+        'test_seconds_bucket{op="x",le="1.0"} 3',
+        'test_seconds_bucket{op="x",le="+Inf"} 4',
+        'test_seconds_sum{op="x"} 4.05',
+        'test_seconds_count{op="x"} 4',
+    ]
+
+def test_family_labels_children_and_escapes_values():
+    family = metrics.Family(metrics.Counter, "test_total", "Test", ("path",))
+    family.labels('a"b').inc()
+    family.labels('a"b').inc(2)
+    assert list(family.samples("")) == ['test_total{path="a\\"b"} 3']
+
+def test_metrics_endpoint_lists_registered_metrics(client):
+    text = scrape(client)
+    for name, kind in [("token_cache_hits_total", "counter"), ("password_hash_seconds", "histogram"),
+                       ("http_requests_in_flight", "gauge")]:
+        assert f"# TYPE {name} {kind}" in text
+    assert "/metrics" not in client.get("/openapi.json").json()["paths"]
+
+def test_requests_are_counted_by_route_template_and_status(client):
+    series = 'http_responses_total{method="GET",route="/sessions/{session_id}",status="404"}'
+    before = sample(scrape(client), series)
+    client.get("/sessions/does-not-exist")
+    client.get("/sessions/also-missing")
+    text = scrape(client)
+    assert sample(text, series) == before + 2
+    assert sample(text, 'http_request_duration_seconds_count{method="GET",route="/sessions/{session_id}"}') >= 2
+    assert "/sessions/does-not-exist" not in text
+
+def test_unmatched_paths_share_one_label(client):
+    series = 'http_responses_total{method="GET",route="unmatched",status="404"}'
+    before = sample(scrape(client), series)
+    client.get("/no/such/path")
+    assert sample(scrape(client), series) == before + 1
+
+def test_storage_and_token_spans_are_timed(client, auth_headers):
+    series = f'storage_operation_seconds_count{{backend="{type(db.open()).__name__}",operation="add_score"}}'
+    before = scrape(client)
+    response = client.post("/leaderboard/submit", json={"score": 50, "mode": "walls"}, headers=auth_headers)
+    assert response.status_code == 201
+    after = scrape(client)
+    assert sample(after, series) == sample(before, series) + 1
+    assert sample(after, 'auth_token_seconds_count{operation="encode"}') >= 1
@@ -0,0 +1,149 @@
+import asyncio
+from datetime import datetime
+from pathlib import Path
+from uuid import UUID
+
+import pytest
+import yaml
+
+from app.verification import verifier
+
+SPEC = yaml.safe_load((Path(__file__).resolve().parents[2] / "openapi.yaml").read_text())
+
+
+def resolve(schema):
+    while "$ref" in schema:
+        node = SPEC
+        for part in schema["$ref"].lstrip("#/").split("/"):
+            node = node[part]
+        schema = node
+    return schema
+
+
+def check(value, schema, path="$"):
+    """Minimal OpenAPI 3.0 schema check covering what openapi.yaml uses."""
+    schema = resolve(schema)
+    for part in schema.get("allOf", ()):
+        check(value, part, path)
+    kind = schema.get("type")
+    if kind == "object":
+        assert isinstance(value, dict), f"{path}: expected object"
+        for name in schema.get("required", ()):
+            assert name in value, f"{path}: missing {name}"
+        for name, prop in schema.get("properties", {}).items():
+            # The spec leaves out `nullable`; optional fields are returned as null when unset
+            if value.get(name) is not None:
+                check(value[name], prop, f"{path}.{name}")
+    elif kind == "array":
+        assert isinstance(value, list), f"{path}: expected array"
+        for i, item in enumerate(value):
+            check(item, schema["items"], f"{path}[{i}]")
+    elif kind == "integer":
+        assert isinstance(value, int) and not isinstance(value, bool), f"{path}: expected integer"
+        assert value >= schema.get("minimum", value), f"{path}: below minimum"
+    elif kind == "boolean":
+        assert isinstance(value, bool), f"{path}: expected boolean"
+    elif kind == "string":
+        assert isinstance(value, str), f"{path}: expected string"
+        if schema.get("format") == "uuid":
+            UUID(value)
+        elif schema.get("format") == "date-time":
+            datetime.fromisoformat(value)
+        if "enum" in schema:
+            assert value in schema["enum"], f"{path}: {value!r} not in enum"
+
+
+def assert_conforms(response, path, method):
+    spec = SPEC["paths"][path][method]["responses"][str(response.status_code)]
+    check(response.json(), spec["content"]["application/json"]["schema"])
+
+
+@pytest.fixture
+def session_id(client, auth_headers):
+    response = client.post("/sessions/start", headers=auth_headers, json={"mode": "walls"})
+    assert_conforms(response, "/sessions/start", "post")
+    return response.json()["id"]
+
+
+def test_auth_responses_conform(client):
+    user = {"username": "specuser", "email": "spec@example.com", "password": "password123"}
+    response = client.post("/auth/signup", json=user)
+    assert response.status_code == 201
+    assert_conforms(response, "/auth/signup", "post")
+    assert "hashed_password" not in response.json()["user"]
+
+    response = client.post("/auth/login", json={"email": user["email"], "password": user["password"]})
+    assert_conforms(response, "/auth/login", "post")
+
+    headers = {"Authorization": f"Bearer {response.json()['token']}"}
+    response = client.get("/auth/me", headers=headers)
+    assert_conforms(response, "/auth/me", "get")
+    assert "hashed_password" not in response.json()
+
+
+def test_leaderboard_responses_conform(client, auth_headers):
+    response = client.post("/leaderboard/submit", headers=auth_headers, json={"score": 120, "mode": "walls"})
+    assert response.status_code == 201
+    assert_conforms(response, "/leaderboard/submit", "post")
+
+    for query in ("", "?mode=walls", "?view=best", "?window=day"):
+        response = client.get(f"/leaderboard{query}")
+        assert_conforms(response, "/leaderboard", "get")
+        assert response.json()["total"] == 1
+
+    response = client.get("/leaderboard/me", headers=auth_headers)
+    assert_conforms(response, "/leaderboard/me", "get")
+    assert response.json()["entry"]["rank"] == 1
+
+
+def test_session_responses_conform(client, auth_headers, session_id):
+    state = {"direction": "RIGHT", "snake": [{"x": 3, "y": 1}, {"x": 2, "y": 1}], "food": {"x": 5, "y": 5}}
+    response = client.patch(
+        f"/sessions/{session_id}/update", headers=auth_headers, json={"currentScore": 10, "gameState": state}
+    )
+    assert_conforms(response, "/sessions/{sessionId}/update", "patch")
+
+    response = client.get("/sessions/active")
+    assert_conforms(response, "/sessions/active", "get")
+    assert session_id in [s["id"] for s in response.json()["data"]]
+
+    response = client.get(f"/sessions/{session_id}")
+    assert_conforms(response, "/sessions/{sessionId}", "get")
+    assert response.json()["gameState"]["snake"] == state["snake"]
+
+    response = client.post(f"/sessions/{session_id}/end", headers=auth_headers, json={"finalScore": 10})
+    assert_conforms(response, "/sessions/{sessionId}/end", "post")
+
+
+def test_delta_responses_conform(client, auth_headers, session_id):
+    state = {"direction": "RIGHT", "snake": [{"x": 3, "y": 1}, {"x": 2, "y": 1}], "food": {"x": 5, "y": 5}}
+    client.patch(f"/sessions/{session_id}/update", headers=auth_headers, json={"gameState": state, "seq": 1})
+    response = client.patch(
+        f"/sessions/{session_id}/delta", headers=auth_headers, json={"seq": 2, "head": {"x": 4, "y": 1}}
+    )
+    assert_conforms(response, "/sessions/{sessionId}/delta", "patch")
+    response = client.patch(f"/sessions/{session_id}/delta", headers=auth_headers, json={"seq": 9})
+    assert response.status_code == 409
+    assert_conforms(response, "/sessions/{sessionId}/delta", "patch")
+    assert response.json()["detail"]["expectedSeq"] == 3
+
+
+def test_verified_submission_responses_conform(client, auth_headers, age_session):
+    sess_id = client.post("/sessions/start", headers=auth_headers, json={"mode": "walls"}).json()["id"]
+    age_session(sess_id)
+    client.post(f"/sessions/{sess_id}/input", headers=auth_headers, json={"direction": "DOWN", "tick": 1})
+    client.post(f"/sessions/{sess_id}/end", headers=auth_headers, json={"finalScore": 0, "ticks": 3})
+    response = client.post(
+        "/leaderboard/submit", headers=auth_headers, json={"score": 0, "mode": "walls", "sessionId": sess_id}
+    )
+    assert response.status_code == 202
+    assert_conforms(response, "/leaderboard/submit", "post")
+
+    response = client.get(f"/leaderboard/verifications/{sess_id}")
+    assert_conforms(response, "/leaderboard/verifications/{sessionId}", "get")
+    assert response.json()["status"] == "pending"
+
+    asyncio.run(verifier.verify_pending())
+    response = client.get(f"/leaderboard/verifications/{sess_id}")
+    assert_conforms(response, "/leaderboard/verifications/{sessionId}", "get")
+    assert response.json()["status"] != "pending"
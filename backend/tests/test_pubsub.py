@@ -0,0 +1,43 @@
+import asyncio
+
+from app.pubsub import Broker
+
+
+def test_fan_out_to_all_subscribers():
+    async def scenario():
+        broker = Broker(buffer_size=8)
+        first = broker.subscribe("topic")
+        second = broker.subscribe("topic")
+        broker.publish("topic", "a")
+        broker.publish("other", "ignored")
+        assert await first.__anext__() == "a"
+        assert await second.__anext__() == "a"
+        first.close()
+        assert broker.subscriber_count("topic") == 1
+
+    asyncio.run(scenario())
+
+def test_slow_subscriber_keeps_latest_frames():
+    async def scenario():
+        broker = Broker(buffer_size=3)
+        subscription = broker.subscribe("topic")
+        for i in range(10):
+            broker.publish("topic", str(i))
+        broker.close_topic("topic")
+        frames = [frame async for frame in subscription]
+        assert frames == ["7", "8", "9"]
+        assert subscription.dropped == 7
+        assert broker.subscriber_count("topic") == 0
+
+    asyncio.run(scenario())
+
+def test_subscriber_wakes_on_publish():
+    async def scenario():
+        broker = Broker(buffer_size=4)
+        subscription = broker.subscribe("topic")
+        reader = asyncio.create_task(subscription.__anext__())
+        await asyncio.sleep(0)
+        broker.publish("topic", "frame")
+        assert await asyncio.wait_for(reader, 1) == "frame"
+
+    asyncio.run(scenario())
@@ -0,0 +1,169 @@
+import random
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+
+from app.models import LeaderboardEntry
+from app.ranking import SortedList, LeaderboardStore, WINDOWS, window_start
+
+
+def make_entry(score, mode="walls"):
+    return LeaderboardEntry(
+        id=uuid4(), userId=uuid4(), username="player", score=score,
+        mode=mode, timestamp=datetime.now(timezone.utc)
+    )
+
+def test_sorted_list_matches_sorted_reference():
+    rng = random.Random(1)
+    values = SortedList()
+    reference = []
+    for _ in range(5000):
+        value = rng.randint(0, 300)
+        values.add(value)
+        reference.append(value)
+        if rng.random() < 0.2:
+            victim = rng.choice(reference)
+            values.remove(victim)
+            reference.remove(victim)
+    reference.sort()
+
+    assert list(values) == reference
+    assert len(values) == len(reference)
+    assert list(values.islice(100, 250)) == reference[100:250]
+    for probe in (0, 17, 150, 301):
+        assert values.bisect_left(probe) == bisect_left(reference, probe)
+        assert values.bisect_right(probe) == bisect_right(reference, probe)
+    for position in (0, 1, 999, len(reference) - 1):
+        assert values[position] == reference[position]
+
+def test_sorted_list_remove_missing():
+    values = SortedList([1, 2, 3])
+    with pytest.raises(ValueError):
+        values.remove(4)
+
+def test_store_ranks_match_legacy_sort():
+    rng = random.Random(2)
+    store = LeaderboardStore()
+    legacy = []
+    for _ in range(500):
+        entry = make_entry(rng.randint(0, 50), rng.choice(["walls", "passthrough"]))
+        store.add(entry)
+        legacy.append(entry)
+    # The old implementation: stable sort by score descending, rank = position
+    legacy.sort(key=lambda x: x.score, reverse=True)
+
+    page = store.page(limit=1000)
+    assert [e.id for e in page] == [e.id for e in legacy]
+    assert [e.rank for e in page] == list(range(1, 501))
+
+    walls = store.page(mode="walls", limit=20, offset=5)
+    expected = [(i + 1, e.id) for i, e in enumerate(legacy) if e.mode == "walls"][5:25]
+    assert [(e.rank, e.id) for e in walls] == expected
+
+def test_store_add_returns_rank():
+    store = LeaderboardStore()
+    assert store.add(make_entry(10)).rank == 1
+    assert store.add(make_entry(30)).rank == 1
+    assert store.add(make_entry(10)).rank == 3
+
+def legacy_page(entries, mode, limit, offset):
+    # Reference: the pre-index MockDB behaviour (global sort, global ranks, filter then slice)
+    ranked = sorted(entries, key=lambda x: x.score, reverse=True)
+    ranks = {e.id: i + 1 for i, e in enumerate(ranked)}
+    filtered = [e for e in ranked if not mode or e.mode == mode]
+    return [(ranks[e.id], e.id) for e in filtered[offset : offset + limit]], len(filtered)
+
+@pytest.mark.parametrize("mode", [None, "walls", "passthrough", "speedrun", "unknown"])
+@pytest.mark.parametrize("limit,offset", [(10, 0), (25, 40), (100, 290), (5, 1000)])
+def test_store_partitions_match_legacy(mode, limit, offset):
+    rng = random.Random(3)
+    entries = [
+        make_entry(rng.randint(0, 80), rng.choice(["walls", "passthrough", "speedrun"]))
+        for _ in range(600)
+    ]
+    # Half loaded up-front, half through add(), to cover both build paths
+    store = LeaderboardStore(entries[:300])
+    for entry in entries[300:]:
+        store.add(entry)
+
+    expected, total = legacy_page(entries, mode, limit, offset)
+    page = store.page(mode=mode, limit=limit, offset=offset)
+    assert [(e.rank, e.id) for e in page] == expected
+    assert store.count(mode=mode) == total
+
+@pytest.mark.parametrize("mode", [None, "walls", "speedrun"])
+def test_store_best_per_user_matches_reference(mode):
+    rng = random.Random(5)
+    users = [uuid4() for _ in range(40)]
+    entries = []
+    for _ in range(500):
+        entry = make_entry(rng.randint(0, 60), rng.choice(["walls", "passthrough", "speedrun"]))
+        entries.append(entry.model_copy(update={"userId": rng.choice(users)}))
+    store = LeaderboardStore(entries[:200])
+    for entry in entries[200:]:
+        store.add(entry)
+
+    best = {}
+    for entry in entries:
+        if mode and entry.mode != mode:
+            continue
+        current = best.get(entry.userId)
+        if current is None or entry.score > current.score:
+            best[entry.userId] = entry
+    # Equal bests keep submission order
+    order = {e.id: i for i, e in enumerate(entries)}
+    expected = sorted(best.values(), key=lambda e: (-e.score, order[e.id]))
+
+    page = store.best_page(mode=mode, limit=1000)
+    assert [e.id for e in page] == [e.id for e in expected]
+    assert [e.rank for e in page] == list(range(1, len(expected) + 1))
+    assert store.player_count(mode=mode) == len(expected)
+    for rank, entry in enumerate(expected, start=1):
+        mine = store.personal_best(str(entry.userId), mode=mode)
+        assert (mine.id, mine.rank) == (entry.id, rank)
+    assert store.personal_best(str(uuid4()), mode=mode) is None
+
+@pytest.mark.parametrize("window", list(WINDOWS))
+@pytest.mark.parametrize("mode", [None, "walls"])
+def test_store_windows_match_filtered_reference(window, mode):
+    rng = random.Random(11)
+    start = datetime(2025, 3, 1, tzinfo=timezone.utc)
+    now = [start]
+    store = LeaderboardStore(clock=lambda: now[0])
+    entries = []
+    # Two weeks of submissions, a few minutes apart, with the clock following along
+    while now[0] < start + timedelta(days=14):
+        now[0] += timedelta(minutes=rng.randint(1, 30))
+        entry = make_entry(rng.randint(0, 500), rng.choice(["walls", "passthrough"]))
+        entry = entry.model_copy(update={"timestamp": now[0] - timedelta(minutes=rng.randint(0, 10))})
+        entries.append(entry)
+        store.add(entry)
+
+    since = window_start(window, now[0])
+    ranked = sorted(
+        (e for e in entries if e.timestamp >= since), key=lambda e: -e.score
+    )
+    ranks = {e.id: i for i, e in enumerate(ranked, start=1)}
+    expected = [e for e in ranked if not mode or e.mode == mode]
+
+    page = store.page(mode=mode, limit=20, offset=5, window=window)
+    assert [(e.id, e.rank) for e in page] == [(e.id, ranks[e.id]) for e in expected[5:25]]
+    assert store.count(mode=mode, window=window) == len(expected)
+
+def test_store_window_buckets_expire():
+    now = [datetime(2025, 3, 1, 12, tzinfo=timezone.utc)]
+    store = LeaderboardStore(clock=lambda: now[0])
+    store.add(make_entry(10).model_copy(update={"timestamp": now[0]}))
+    assert store.count(window="hour") == store.count(window="week") == 1
+
+    now[0] += timedelta(hours=2)
+    assert store.count(window="hour") == 0
+    assert store.count(window="day") == 1
+    now[0] += timedelta(days=8)
+    assert store.count(window="week") == 0
+    assert store.count() == 1
+    # Too old for any window when it arrives
+    store.add(make_entry(20).model_copy(update={"timestamp": now[0] - timedelta(days=30)}))
+    assert store.count(window="week") == 0
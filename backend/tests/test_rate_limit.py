@@ -0,0 +1,95 @@
+import asyncio
+
+from app.rate_limit import MemoryBuckets, RateLimiter, Rule, SQLiteBuckets, limiter
+
+
+def test_bucket_allows_burst_then_refills():
+    now = [0.0]
+    buckets = MemoryBuckets(clock=lambda: now[0])
+    rule = Rule(rate=2, burst=3)
+    assert [buckets.take("a", rule) for _ in range(3)] == [0, 0, 0]
+    assert buckets.take("a", rule) == 0.5
+    now[0] = 0.5
+    assert buckets.take("a", rule) == 0
+    assert buckets.take("a", rule) == 0.5
+    # Other keys have their own bucket
+    assert buckets.take("b", rule) == 0
+
+
+def test_full_buckets_are_evicted():
+    now = [0.0]
+    buckets = MemoryBuckets(clock=lambda: now[0])
+    rule = Rule(rate=10, burst=5)
+    for i in range(1000):
+        buckets.take(f"user{i}", rule)
+    assert len(buckets) == 1000
+    # One token refills in 0.1s; later keys push out the ones that are full again
+    now[0] = 0.2
+    buckets.take("late", rule)
+    assert len(buckets) == 1
+    # A drained bucket survives until it has refilled
+    for _ in range(6):
+        buckets.take("late", rule)
+    now[0] = 0.5
+    buckets.take("other", rule)
+    assert len(buckets) == 2
+
+
+def test_slow_rule_does_not_hold_back_eviction():
+    now = [0.0]
+    buckets = MemoryBuckets(clock=lambda: now[0])
+    slow, fast = Rule(rate=0.01, burst=5), Rule(rate=10, burst=5)
+    # Full again only after 100s, and first in line
+    buckets.take("idle", slow)
+    for i in range(1000):
+        buckets.take(f"user{i}", fast)
+    now[0] = 0.2
+    buckets.take("late", fast)
+    assert len(buckets) == 2
+    now[0] = 100.0
+    buckets.take("late", fast)
+    assert len(buckets) == 1
+
+
+def test_sqlite_buckets_are_shared(tmp_path):
+    path = str(tmp_path / "limits.db")
+    now = [1000.0]
+    first = SQLiteBuckets(path, clock=lambda: now[0])
+    second = SQLiteBuckets(path, clock=lambda: now[0])
+    rule = Rule(rate=1, burst=2)
+    assert first.take("a", rule) == 0
+    assert second.take("a", rule) == 0
+    assert first.take("a", rule) == 1
+    now[0] += 1
+    assert second.take("a", rule) == 0
+
+
+def test_submit_is_limited_per_user(client, auth_headers, monkeypatch):
+    monkeypatch.setitem(limiter.rules, "score_submit", Rule(rate=0.1, burst=2))
+    submit = lambda headers: client.post("/leaderboard/submit", headers=headers, json={"score": 10, "mode": "walls"})
+    assert [submit(auth_headers).status_code for _ in range(2)] == [201, 201]
+    response = submit(auth_headers)
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "10"
+
+    client.post("/auth/signup", json={"username": "other", "email": "other@example.com", "password": "password123"})
+    token = client.post("/auth/login", json={"email": "other@example.com", "password": "password123"}).json()["token"]
+    assert submit({"Authorization": f"Bearer {token}"}).status_code == 201
+
+
+def test_session_update_routes_have_separate_buckets(client, auth_headers, monkeypatch):
+    monkeypatch.setitem(limiter.rules, "session_update", Rule(rate=0.1, burst=1))
+    sess_id = client.post("/sessions/start", headers=auth_headers, json={"mode": "walls"}).json()["id"]
+    update = lambda: client.patch(f"/sessions/{sess_id}/update", headers=auth_headers, json={"currentScore": 10})
+    assert update().status_code == 200
+    assert update().status_code == 429
+    delta = client.patch(f"/sessions/{sess_id}/delta", headers=auth_headers, json={"seq": 1, "currentScore": 20})
+    assert delta.status_code == 200
+
+
+def test_limiter_restarts_after_shutdown(tmp_path):
+    restarted = RateLimiter(SQLiteBuckets(str(tmp_path / "limits.db")), {"a": Rule(rate=1, burst=5)})
+    assert asyncio.run(restarted.acquire("a", "key")) == 0
+    restarted.shutdown()
+    assert asyncio.run(restarted.acquire("a", "key")) == 0
+    restarted.shutdown()
@@ -0,0 +1,86 @@
+import asyncio
+import random
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from app.engine import DIRECTIONS, SnakeEngine
+from app.replay import end_record, header, parse, record, replay_scores
+from app.verification import ReplayVerifier
+
+
+def play(mode, seed, moves, rng):
+    """Run one game in the engine, logging inputs the way the sessions router does."""
+    engine = SnakeEngine(seed=0)
+    slot = engine.spawn(mode, now=0, seed=seed)
+    log = bytearray(header(mode, seed))
+    now = 0
+    while engine.moves(slot) < moves and not engine.game_over(slot):
+        if rng.random() < 0.3:
+            direction = rng.choice(DIRECTIONS)
+            log += record(engine.moves(slot), direction)
+            engine.steer(slot, direction)
+        now += 150
+        engine.tick(now)
+    log += end_record(engine.moves(slot))
+    return bytes(log), engine.score(slot)
+
+
+def test_replays_reproduce_scores():
+    rng = random.Random(3)
+    games = [play(rng.choice(["walls", "passthrough"]), rng.randrange(2**32), rng.randrange(5, 300), rng)
+             for _ in range(50)]
+    assert replay_scores([log for log, _ in games]) == [score for _, score in games]
+    assert any(score > 0 for _, score in games)
+
+
+def test_replay_format_round_trip():
+    log = header("walls", 42) + record(0, "UP") + record(0, "LEFT") + record(3, "DOWN") + end_record(7)
+    replay = parse(log)
+    assert (replay.mode, replay.seed, replay.end) == ("walls", 42, 7)
+    assert replay.moves.tolist() == [0, 0, 3]
+
+
+def test_invalid_replays_score_none():
+    valid = header("walls", 1) + end_record(2)
+    unterminated = header("walls", 1) + record(0, "UP")
+    out_of_order = header("walls", 1) + record(5, "UP") + record(2, "LEFT") + end_record(9)
+    # Steering up five times from the middle of a 20-cell grid can't last 50 moves in walls mode
+    crashed_early = header("walls", 1) + record(0, "UP") + end_record(50)
+    assert replay_scores([b"junk", valid[:-1], unterminated, out_of_order, crashed_early, valid]) == [
+        None, None, None, None, None, 0
+    ]
+
+
+def test_verifier_replaces_a_broken_pool():
+    rng = random.Random(5)
+    games = [play("walls", rng.randrange(2**32), 40, rng) for _ in range(4)]
+    logs = [log for log, _ in games]
+    verifier = ReplayVerifier(storage=None, workers=2, batch_size=8)
+
+    async def scenario():
+        assert await verifier._replay(logs) == [score for _, score in games]
+        broken = verifier._executor
+        for process in list(broken._processes.values()):
+            process.kill()
+            process.join()
+        with pytest.raises(BrokenProcessPool):
+            await verifier._replay(logs)
+        assert verifier._executor is None
+        assert await verifier._replay(logs) == [score for _, score in games]
+        assert verifier._executor is not broken
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        verifier.shutdown()
+
+
+def test_replay_stops_once_every_game_is_over():
+    # Straight right from the middle hits the wall within ten moves
+    crashed = header("walls", 1) + end_record(2**32 - 1)
+    valid = header("walls", 2) + end_record(3)
+    start = time.perf_counter()
+    assert replay_scores([crashed, valid]) == [None, 0]
+    assert time.perf_counter() - start < 1
@@ -0,0 +1,41 @@
+from app.response_cache import ResponseCache, etag_matches
+
+
+def test_put_and_get():
+    cache = ResponseCache(max_size=2)
+    stored = cache.put("a", b"[1]", cache.version)
+    assert cache.get("a") == stored
+    assert stored.etag.startswith('"')
+    assert cache.get("b") is None
+
+def test_lru_eviction():
+    cache = ResponseCache(max_size=2)
+    cache.put("a", b"a", cache.version)
+    cache.put("b", b"b", cache.version)
+    cache.get("a")
+    cache.put("c", b"c", cache.version)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+
+def test_invalidate_drops_entries_and_stale_puts():
+    cache = ResponseCache(max_size=8)
+    cache.put("a", b"a", cache.version)
+    version = cache.version
+    cache.invalidate()
+    assert cache.get("a") is None
+    # Rendered before the invalidation: returned to the caller but not stored
+    stale = cache.put("a", b"old", version)
+    assert stale.body == b"old"
+    assert len(cache) == 0
+
+def test_disabled_cache_stores_nothing():
+    cache = ResponseCache(max_size=0)
+    cache.put("a", b"a", cache.version)
+    assert len(cache) == 0
+
+def test_etag_matches():
+    assert etag_matches('"x", "y"', '"y"')
+    assert etag_matches('W/"y"', '"y"')
+    assert etag_matches("*", '"y"')
+    assert not etag_matches(None, '"y"')
+    assert not etag_matches('"x"', '"y"')
@@ -1,3 +1,8 @@
+import asyncio
+
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
 def create_session_helper(client, auth_headers):
     response = client.post(
         "/sessions/start",
@@ -49,3 +54,338 @@ def test_end_session(client, auth_headers):
     data = response.json()
     assert data["isActive"] == False
     assert data["score"] == 150
+
+def test_stream_session_updates(client, auth_headers):
+    sess_id = create_session_helper(client, auth_headers)
+    with client.websocket_connect(f"/sessions/{sess_id}/stream") as ws:
+        assert ws.receive_json()["currentScore"] == 0
+
+        client.patch(f"/sessions/{sess_id}/update", headers=auth_headers, json={"currentScore": 30})
+        assert ws.receive_json()["currentScore"] == 30
+
+        client.post(f"/sessions/{sess_id}/end", headers=auth_headers, json={"finalScore": 40})
+        final = ws.receive_json()
+        assert final["isActive"] == False
+        assert final["score"] == 40
+
+def test_stream_unknown_session(client):
+    with pytest.raises(WebSocketDisconnect):
+        with client.websocket_connect("/sessions/missing/stream") as ws:
+            ws.receive_json()
+
+def test_stream_active_sessions_feed(client, auth_headers):
+    with client.websocket_connect("/sessions/active/stream") as ws:
+        assert ws.receive_json() == {"type": "snapshot", "data": []}
+        sess_id = create_session_helper(client, auth_headers)
+        event = ws.receive_json()
+        assert event["type"] == "start"
+        assert event["session"]["id"] == sess_id
+        assert "gameState" not in event["session"]
+
+def start_with_snapshot(client, auth_headers):
+    sess_id = create_session_helper(client, auth_headers)
+    snapshot = {
+        "direction": "RIGHT",
+        "snake": [{"x": 5, "y": 5}, {"x": 4, "y": 5}, {"x": 3, "y": 5}],
+        "food": {"x": 7, "y": 5},
+    }
+    response = client.patch(
+        f"/sessions/{sess_id}/update",
+        headers=auth_headers,
+        json={"gameState": snapshot, "seq": 0}
+    )
+    assert response.status_code == 200
+    return sess_id
+
+def test_scores_out_of_sqlite_range(client, auth_headers):
+    sess_id = create_session_helper(client, auth_headers)
+    for method, path, body in [
+        ("patch", "update", {"currentScore": 2**63}), ("patch", "update", {"seq": 2**63}),
+        ("patch", "delta", {"seq": 1, "currentScore": 2**63}), ("post", "end", {"finalScore": -2**63 - 1}),
+    ]:
+        response = getattr(client, method)(f"/sessions/{sess_id}/{path}", headers=auth_headers, json=body)
+        assert response.status_code == 422
+
+def test_delta_moves_snake(client, auth_headers):
+    sess_id = start_with_snapshot(client, auth_headers)
+    delta = client.patch(f"/sessions/{sess_id}/delta", headers=auth_headers, json={"seq": 1, "head": {"x": 6, "y": 5}})
+    assert delta.json() == {"seq": 1}
+    delta = client.patch(
+        f"/sessions/{sess_id}/delta",
+        headers=auth_headers,
+        json={"seq": 2, "head": {"x": 7, "y": 5}, "grew": True, "food": {"x": 1, "y": 1}, "currentScore": 10}
+    )
+    assert delta.json() == {"seq": 2}
+
+    session = client.get(f"/sessions/{sess_id}").json()
+    assert session["gameState"]["snake"] == [{"x": 7, "y": 5}, {"x": 6, "y": 5}, {"x": 5, "y": 5}, {"x": 4, "y": 5}]
+    assert session["gameState"]["food"] == {"x": 1, "y": 1}
+    assert session["currentScore"] == 10
+    assert session["seq"] == 2
+
+def test_delta_duplicate_is_ignored(client, auth_headers):
+    sess_id = start_with_snapshot(client, auth_headers)
+    client.patch(f"/sessions/{sess_id}/delta", headers=auth_headers, json={"seq": 1, "head": {"x": 6, "y": 5}})
+    response = client.patch(f"/sessions/{sess_id}/delta", headers=auth_headers, json={"seq": 1, "head": {"x": 6, "y": 5}})
+    assert response.status_code == 200
+    assert client.get(f"/sessions/{sess_id}").json()["gameState"]["snake"][0] == {"x": 6, "y": 5}
+
+def test_delta_gap_requires_snapshot(client, auth_headers):
+    sess_id = start_with_snapshot(client, auth_headers)
+    response = client.patch(f"/sessions/{sess_id}/delta", headers=auth_headers, json={"seq": 3, "head": {"x": 6, "y": 5}})
+    assert response.status_code == 409
+    assert response.json()["detail"]["expectedSeq"] == 1
+
+    # Full snapshot fallback resynchronises the sequence
+    client.patch(
+        f"/sessions/{sess_id}/update",
+        headers=auth_headers,
+        json={"gameState": {"snake": [{"x": 9, "y": 9}]}, "seq": 3}
+    )
+    response = client.patch(f"/sessions/{sess_id}/delta", headers=auth_headers, json={"seq": 4, "head": {"x": 9, "y": 8}})
+    assert response.status_code == 200
+    assert client.get(f"/sessions/{sess_id}").json()["gameState"]["snake"] == [{"x": 9, "y": 8}]
+
+def test_delta_without_snapshot(client, auth_headers):
+    sess_id = create_session_helper(client, auth_headers)
+    response = client.patch(f"/sessions/{sess_id}/delta", headers=auth_headers, json={"seq": 1, "head": {"x": 1, "y": 1}})
+    assert response.status_code == 409
+
+def test_delta_leaves_stored_state_alone():
+    from app.deltas import apply_delta
+    from app.models import GameState, SessionDelta
+    state = GameState(snake=[{"x": 5, "y": 5}, {"x": 4, "y": 5}], food={"x": 7, "y": 5})
+    moved = apply_delta(state, SessionDelta(seq=1, head={"x": 6, "y": 5}, food={"x": 1, "y": 1}), 0)
+    assert list(moved.snake) == [(6, 5), (5, 5)]
+    assert list(state.snake) == [(5, 5), (4, 5)]
+    assert state.food == {"x": 7, "y": 5}
+
+def test_concurrent_deltas_apply_once(client, auth_headers):
+    from app.db import db
+    from app.models import SessionDelta
+    from app.routers import sessions
+    sess_id = start_with_snapshot(client, auth_headers)
+    user = db.get_user_by_email("test@example.com")
+    delta = SessionDelta(seq=1, head={"x": 6, "y": 5})
+
+    async def race():
+        return await asyncio.gather(*(sessions.apply_session_delta(sess_id, delta, user) for _ in range(2)))
+
+    asyncio.run(race())
+    session = client.get(f"/sessions/{sess_id}").json()
+    assert session["gameState"]["snake"] == [{"x": 6, "y": 5}, {"x": 5, "y": 5}, {"x": 4, "y": 5}]
+    assert session["seq"] == 1
+    assert sess_id not in sessions._session_locks
+
+def test_snapshot_is_ordered_after_a_pending_delta(client, auth_headers, monkeypatch):
+    from app.db import db
+    from app.models import SessionDelta, SessionUpdate
+    from app.routers import sessions
+    sess_id = start_with_snapshot(client, auth_headers)
+    user = db.get_user_by_email("test@example.com")
+    update = sessions.session_buffer.update
+
+    async def slow_delta_write(session_id, updates):
+        # The delta's write is still in flight when the snapshot arrives
+        if updates.get("seq") == 1:
+            await asyncio.sleep(0.05)
+        return await update(session_id, updates)
+
+    monkeypatch.setattr(sessions.session_buffer, "update", slow_delta_write)
+    snapshot = SessionUpdate(gameState={"snake": [{"x": 9, "y": 9}]}, seq=5)
+
+    async def race():
+        delta = asyncio.create_task(
+            sessions.apply_session_delta(sess_id, SessionDelta(seq=1, head={"x": 6, "y": 5}), user)
+        )
+        await asyncio.sleep(0)
+        await sessions.update_session(sess_id, snapshot, user)
+        await delta
+
+    asyncio.run(race())
+    session = client.get(f"/sessions/{sess_id}").json()
+    assert session["gameState"]["snake"] == [{"x": 9, "y": 9}]
+    assert session["seq"] == 5
+
+def start_simulated_session(client, auth_headers, mode="walls"):
+    response = client.post("/sessions/start", headers=auth_headers, json={"mode": mode, "authoritative": True})
+    assert response.status_code == 201
+    data = response.json()
+    assert data["authoritative"] == True
+    assert data["gameState"]["snake"][0] == {"x": 10, "y": 10}
+    return data["id"]
+
+def test_simulated_session_follows_inputs(client, auth_headers, monkeypatch):
+    from app.routers import sessions
+    from app.simulation import simulation
+    now = [0.0]
+    monkeypatch.setattr(simulation, "_clock", lambda: now[0])
+    sess_id = start_simulated_session(client, auth_headers)
+
+    response = client.post(f"/sessions/{sess_id}/input", headers=auth_headers, json={"direction": "UP"})
+    assert response.status_code == 204
+    now[0] += 0.15
+    asyncio.run(sessions.step_simulation())
+
+    data = client.get(f"/sessions/{sess_id}").json()
+    assert data["gameState"]["direction"] == "UP"
+    assert data["gameState"]["snake"][0] == {"x": 10, "y": 9}
+
+    # Run into the top wall; the server ends the game with its own score
+    while client.get(f"/sessions/{sess_id}").json()["isActive"]:
+        now[0] += 0.15
+        asyncio.run(sessions.step_simulation())
+    data = client.get(f"/sessions/{sess_id}").json()
+    assert data["gameState"]["gameOver"] == True
+    assert data["score"] == data["currentScore"]
+
+def test_simulated_session_rejects_client_state(client, auth_headers):
+    sess_id = start_simulated_session(client, auth_headers)
+    response = client.patch(f"/sessions/{sess_id}/update", headers=auth_headers, json={"currentScore": 9999})
+    assert response.status_code == 409
+    response = client.patch(f"/sessions/{sess_id}/delta", headers=auth_headers, json={"seq": 1, "currentScore": 9999})
+    assert response.status_code == 409
+
+    response = client.post(f"/sessions/{sess_id}/end", headers=auth_headers, json={"finalScore": 9999})
+    assert response.status_code == 200
+    assert response.json()["score"] == 0
+    assert response.json()["isActive"] == False
+
+def test_simulated_session_elsewhere_fails_closed(client, auth_headers):
+    from app.db import db
+    from app.replay import HEADER
+    from app.simulation import simulation
+    sess_id = start_simulated_session(client, auth_headers)
+    # As seen by a worker that isn't running the game
+    simulation.finish(sess_id)
+    for method, path, body in [
+        ("post", "end", {"finalScore": 9999, "ticks": 5}), ("post", "input", {"direction": "UP", "tick": 1}),
+        ("patch", "update", {"currentScore": 9999}), ("patch", "delta", {"seq": 1, "currentScore": 9999}),
+    ]:
+        response = getattr(client, method)(f"/sessions/{sess_id}/{path}", headers=auth_headers, json=body)
+        assert response.status_code == 409
+    assert db.get_session(sess_id).isActive
+    assert db.get_session(sess_id).currentScore == 0
+    assert len(db.get_replay(sess_id)) == HEADER.size
+
+def test_ended_simulated_session_cannot_be_ended_again(client, auth_headers):
+    sess_id = start_simulated_session(client, auth_headers)
+    assert client.post(f"/sessions/{sess_id}/end", headers=auth_headers, json={"finalScore": 0}).status_code == 200
+    response = client.post(f"/sessions/{sess_id}/end", headers=auth_headers, json={"finalScore": 9999, "ticks": 5})
+    assert response.status_code == 409
+    assert client.get(f"/sessions/{sess_id}").json()["score"] == 0
+
+def test_simulated_sessions_end_when_the_worker_stops(client, auth_headers):
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+    with TestClient(app) as running:
+        sess_id = start_simulated_session(running, auth_headers)
+    data = client.get(f"/sessions/{sess_id}").json()
+    assert data["isActive"] == False
+    assert data["authoritative"] == True
+
+def test_input_on_client_run_session(client, auth_headers, age_session):
+    from app.replay import HEADER, RECORD
+    sess_id = create_session_helper(client, auth_headers)
+    age_session(sess_id)
+    response = client.post(f"/sessions/{sess_id}/input", headers=auth_headers, json={"direction": "UP"})
+    assert response.status_code == 400
+    response = client.post(f"/sessions/{sess_id}/input", headers=auth_headers, json={"direction": "UP", "tick": 2})
+    assert response.status_code == 204
+    client.post(f"/sessions/{sess_id}/end", headers=auth_headers, json={"finalScore": 0, "ticks": 5})
+    response = client.post(f"/sessions/{sess_id}/input", headers=auth_headers, json={"direction": "UP", "tick": 6})
+    assert response.status_code == 409
+
+    replay = client.get(f"/sessions/{sess_id}/replay")
+    assert replay.headers["content-type"] == "application/octet-stream"
+    assert len(replay.content) == HEADER.size + 2 * RECORD.size
+
+    response = client.post("/sessions/start", headers=auth_headers, json={"mode": "speedrun", "authoritative": True})
+    assert response.status_code == 400
+
+def test_export_sessions(client, auth_headers, monkeypatch):
+    import json
+    from app import config
+    sess_id = create_session_helper(client, auth_headers)
+    assert client.get("/sessions/export").status_code == 401
+    assert client.get("/sessions/export", headers=auth_headers).status_code == 403
+    monkeypatch.setattr(config, "ADMIN_EMAILS", frozenset({"test@example.com"}))
+    response = client.get("/sessions/export", headers=auth_headers)
+    assert response.status_code == 200
+    assert [json.loads(line)["id"] for line in response.content.splitlines()] == [sess_id]
+
+def test_client_move_counts_are_bounded(client, auth_headers, age_session):
+    from app.db import db
+    from app.replay import HEADER
+    sess_id = create_session_helper(client, auth_headers)
+    # Too large for the log's 32-bit move counts
+    response = client.post(f"/sessions/{sess_id}/input", headers=auth_headers, json={"direction": "UP", "tick": 2**32})
+    assert response.status_code == 422
+    response = client.post(f"/sessions/{sess_id}/end", headers=auth_headers, json={"finalScore": 0, "ticks": 2**32})
+    assert response.status_code == 422
+    # A second at 50ms per move allows 20 moves
+    age_session(sess_id, seconds=1)
+    response = client.post(f"/sessions/{sess_id}/input", headers=auth_headers, json={"direction": "UP", "tick": 25})
+    assert response.status_code == 400
+    response = client.post(f"/sessions/{sess_id}/end", headers=auth_headers, json={"finalScore": 0, "ticks": 300000})
+    assert response.status_code == 400
+    assert db.get_session(sess_id).isActive
+    assert len(db.get_replay(sess_id)) == HEADER.size
+
+def test_replay_appends_stop_at_the_end_record(client, auth_headers, age_session):
+    from app.db import db
+    from app.replay import record
+    from app.routers import sessions
+    sess_id = create_session_helper(client, auth_headers)
+    age_session(sess_id)
+    client.post(f"/sessions/{sess_id}/input", headers=auth_headers, json={"direction": "UP", "tick": 1})
+    client.post(f"/sessions/{sess_id}/end", headers=auth_headers, json={"finalScore": 0, "ticks": 3})
+    logged = db.get_replay(sess_id)
+    # An input that passed its checks before the end can't land after it
+    asyncio.run(sessions.append_replay(sess_id, record(4, "DOWN")))
+    assert db.get_replay(sess_id) == logged
+    assert sess_id not in sessions._session_locks
+
+def test_idle_simulated_session_is_ended(client, auth_headers, monkeypatch):
+    from app.routers import sessions
+    from app.simulation import simulation
+    now = [0.0]
+    monkeypatch.setattr(simulation, "_clock", lambda: now[0])
+    monkeypatch.setattr(simulation, "idle_timeout", 1.0)
+    idle_id = start_simulated_session(client, auth_headers, mode="passthrough")
+    steered_id = start_simulated_session(client, auth_headers, mode="passthrough")
+    now[0] = 0.9
+    client.post(f"/sessions/{steered_id}/input", headers=auth_headers, json={"direction": "UP"})
+    now[0] = 1.0
+    asyncio.run(sessions.step_simulation())
+
+    data = client.get(f"/sessions/{idle_id}").json()
+    assert data["isActive"] == False
+    assert data["score"] == 0
+    assert client.get(f"/sessions/{steered_id}").json()["isActive"] == True
+    client.post(f"/sessions/{steered_id}/end", headers=auth_headers, json={"finalScore": 0})
+
+def test_authoritative_sessions_can_be_disabled(client, auth_headers, monkeypatch):
+    from app import config
+    monkeypatch.setattr(config, "AUTHORITATIVE_SESSIONS", False)
+    response = client.post("/sessions/start", headers=auth_headers, json={"mode": "walls", "authoritative": True})
+    assert response.status_code == 400
+    assert client.post("/sessions/start", headers=auth_headers, json={"mode": "walls"}).status_code == 201
+
+def test_simulation_keeps_running_after_a_failed_step(monkeypatch, caplog):
+    from app.routers import sessions
+    steps = []
+
+    async def step():
+        steps.append(len(steps))
+        if len(steps) == 1:
+            raise RuntimeError("boom")
+        if len(steps) == 3:
+            raise asyncio.CancelledError
+
+    monkeypatch.setattr(sessions, "step_simulation", step)
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(sessions.run_simulation(0))
+    assert steps == [0, 1, 2]
+    assert "Stepping simulated games failed" in caplog.text
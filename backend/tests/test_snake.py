@@ -0,0 +1,42 @@
+import pytest
+from pydantic import ValidationError
+
+from app.models import GameState
+from app.snake import SnakeBody
+
+
+def test_push_and_pop_keep_order():
+    body = SnakeBody([(3, 1), (2, 1), (1, 1)])
+    body.push_head(4, 1)
+    assert body.pop_tail() == (1, 1)
+    assert list(body) == [(4, 1), (3, 1), (2, 1)]
+    assert body.head == (4, 1)
+    assert len(body) == 3
+
+def test_long_run_compacts_buffer():
+    body = SnakeBody([(0, 0)])
+    for step in range(1, 10_000):
+        body.push_head(step % 20, step // 20 % 20)
+        body.pop_tail()
+    assert len(body) == 1
+    assert body.head == (9999 % 20, 9999 // 20 % 20)
+    # Dead slots are reclaimed rather than growing with every tick
+    assert len(body._coords) < 200
+
+def test_copy_is_independent():
+    body = SnakeBody([(1, 1), (0, 1)])
+    clone = body.copy()
+    body.push_head(2, 1)
+    assert list(clone) == [(1, 1), (0, 1)]
+
+def test_game_state_round_trip():
+    segments = [{"x": 5, "y": 5}, {"x": 4, "y": 5}]
+    state = GameState.model_validate_json('{"snake": [{"x": 5, "y": 5}, {"x": 4, "y": 5}]}')
+    assert isinstance(state.snake, SnakeBody)
+    assert state.model_dump(mode="json")["snake"] == segments
+    assert GameState(snake=segments).snake == state.snake
+
+@pytest.mark.parametrize("snake", [[{"x": 1}], [{"x": 1, "y": 70000}], [{"x": "a", "y": 1}]])
+def test_game_state_rejects_bad_segments(snake):
+    with pytest.raises(ValidationError):
+        GameState(snake=snake)
@@ -0,0 +1,125 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import pytest
+
+from app.db import MockDB, async_db, db
+from app.models import LeaderboardEntry, LeaderboardPage
+from app.responses import ModelResponse
+from app.routers import leaderboard
+from app.snapshots import TopSnapshots
+from app.storage import AsyncStorage
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def add(store, score, mode="walls"):
+    return store.add_score(LeaderboardEntry(
+        id=uuid4(), userId=uuid4(), username=f"p{score}", score=score, mode=mode, timestamp=datetime.now(timezone.utc)
+    ))
+
+def live_body(store, mode, limit, offset):
+    entries = store.get_leaderboard(mode=mode, limit=limit, offset=offset)
+    return ModelResponse(LeaderboardPage(data=entries, total=store.get_total_scores(mode=mode))).body
+
+@pytest.fixture
+def store():
+    store = MockDB()
+    store.reset()
+    for score in range(0, 300, 10):
+        add(store, score, mode=("walls", "passthrough")[score % 20 == 0])
+    return store
+
+def make_snapshots(store, clock, size=10, max_staleness=1.0):
+    storage = AsyncStorage(store, workers=1)
+    snapshots = TopSnapshots(storage, size=size, debounce=0.01, max_staleness=max_staleness, clock=clock)
+    store.add_score_listener(snapshots.invalidate)
+    return snapshots
+
+def test_snapshot_pages_match_the_live_index(store):
+    snapshots = make_snapshots(store, FakeClock())
+    assert snapshots.page(None, 10, 0) is None  # nothing built yet
+    assert snapshots.page("walls", 5, 0) is None  # and the mode is now tracked
+    asyncio.run(snapshots.rebuild())
+    assert snapshots.page(None, 10, 0).body == live_body(store, None, 10, 0)
+    assert snapshots.page(None, 4, 3).body == live_body(store, None, 4, 3)
+    assert snapshots.page("walls", 5, 0).body == live_body(store, "walls", 5, 0)
+    # Beyond the top ``size`` the live index answers
+    assert snapshots.page(None, 10, 5) is None
+    assert snapshots.page(None, 11, 0) is None
+
+def test_only_known_modes_get_a_snapshot(store):
+    snapshots = make_snapshots(store, FakeClock())
+    for i in range(50):
+        assert snapshots.page(f"junk{i}", 10, 0) is None
+    assert snapshots.page("passthrough", 10, 0) is None
+    asyncio.run(snapshots.rebuild())
+    assert snapshots._scopes == [None, "passthrough"]
+    assert snapshots.page("junk0", 10, 0) is None
+
+def test_stale_snapshots_fall_back_after_the_bound(store):
+    clock = FakeClock()
+    snapshots = make_snapshots(store, clock, max_staleness=1.0)
+    asyncio.run(snapshots.rebuild())
+    before = snapshots.page(None, 10, 0)
+    add(store, 5000)
+    clock.now += 0.5
+    # Within the bound the previous snapshot is still served
+    assert snapshots.page(None, 10, 0) is before
+    clock.now += 0.6
+    assert snapshots.page(None, 10, 0) is None
+    asyncio.run(snapshots.rebuild())
+    assert snapshots.page(None, 10, 0).body == live_body(store, None, 10, 0)
+
+def test_zero_staleness_serves_only_current_snapshots(store):
+    snapshots = make_snapshots(store, FakeClock(), max_staleness=0)
+    asyncio.run(snapshots.rebuild())
+    assert snapshots.page(None, 10, 0) is not None
+    add(store, 5000)
+    assert snapshots.page(None, 10, 0) is None
+
+def test_run_debounces_bursts_into_one_rebuild(store):
+    snapshots = make_snapshots(store, time.monotonic, max_staleness=10)
+    built = []
+    rebuild = snapshots.rebuild
+
+    async def counted():
+        built.append(store.get_total_scores())
+        await rebuild()
+
+    snapshots.rebuild = counted
+
+    async def scenario():
+        task = asyncio.create_task(snapshots.run())
+        await asyncio.sleep(0.05)
+        for score in range(20):
+            add(store, 1000 + score)
+            await asyncio.sleep(0.001)
+        await asyncio.sleep(0.1)
+        task.cancel()
+
+    asyncio.run(scenario())
+    # The initial build, then one for the whole burst
+    assert built == [30, 50]
+    assert snapshots.page(None, 10, 0).body == live_body(store, None, 10, 0)
+
+def test_leaderboard_route_serves_the_snapshot(client, monkeypatch):
+    snapshots = TopSnapshots(async_db, size=50, debounce=0, max_staleness=60)
+    db.add_score_listener(snapshots.invalidate)
+    monkeypatch.setattr(leaderboard, "top_snapshots", snapshots)
+    add(db, 700)
+    asyncio.run(snapshots.rebuild())
+    response = client.get("/leaderboard?limit=10")
+    assert response.status_code == 200
+    assert response.content == snapshots.page(None, 10, 0).body
+    assert response.json()["data"][0]["score"] == 700
+    # Deeper than the snapshot: read live
+    assert client.get("/leaderboard?limit=10&offset=45").json()["total"] == 1
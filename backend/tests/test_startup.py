@@ -0,0 +1,66 @@
+import asyncio
+import subprocess
+import sys
+
+from app.db import MockDB
+from app.storage import AsyncStorage, LazyStorage
+
+
+def test_importing_the_app_defers_storage_and_heavy_modules():
+    code = (
+        "import sys\n"
+        "import app.main\n"
+        "from app.db import db\n"
+        "print(db.created, sorted({'numpy', 'jwt', 'bcrypt', 'multiprocessing'} & set(sys.modules)))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.split("\n")[0] == "False []"
+
+
+def test_lazy_storage_is_created_on_first_use():
+    created = []
+
+    def factory():
+        created.append(MockDB(seed=False))
+        return created[-1]
+
+    lazy = LazyStorage(factory)
+    assert not lazy.created and not created
+    assert lazy.get_total_scores() == 0
+    assert lazy.created and len(created) == 1
+    lazy.leaderboard = []
+    assert lazy.open() is created[0] and len(created) == 1
+
+
+def test_listeners_added_early_are_handed_to_the_backend():
+    lazy = LazyStorage(lambda: MockDB(seed=False))
+    seen = []
+    lazy.add_score_listener(seen.append)
+    lazy.open()
+    lazy.add_score_listener(lambda entry: seen.append("late"))
+    lazy.leaderboard = []
+    assert seen == [None, "late"]
+
+
+def test_async_storage_opens_the_backend_on_first_call():
+    lazy = LazyStorage(lambda: MockDB())
+    async_storage = AsyncStorage(lazy, workers=1)
+    assert not lazy.created
+    assert asyncio.run(async_storage.get_total_scores()) == 3
+    assert lazy.created
+
+
+def test_seed_data_can_be_skipped():
+    assert MockDB(seed=False).get_total_scores() == 0
+    assert MockDB().get_total_scores() == 3
+
+
+def test_app_lifespan_can_run_twice():
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    for _ in range(2):
+        with TestClient(app) as client:
+            assert client.get("/leaderboard").status_code == 200
+            assert client.get("/sessions/active").status_code == 200
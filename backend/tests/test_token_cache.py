@@ -0,0 +1,94 @@
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from app.models import User
+from app.token_cache import TokenCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_user(username):
+    return User(id=uuid4(), username=username, email=f"{username}@example.com", createdAt=datetime.now(timezone.utc))
+
+def test_entries_expire_at_token_exp():
+    clock = FakeClock()
+    cache = TokenCache(max_size=10, clock=clock)
+    user = make_user("alice")
+    cache.put("t1", user, exp=1060)
+    assert cache.get("t1") is user
+    clock.now = 1060
+    assert cache.get("t1") is None
+    assert len(cache) == 0
+
+def test_full_cache_drops_expired_before_lru():
+    clock = FakeClock()
+    cache = TokenCache(max_size=2, clock=clock)
+    cache.put("fresh", make_user("alice"), exp=2000)
+    cache.put("stale", make_user("bob"), exp=1010)
+    clock.now = 1020
+    cache.put("new", make_user("carol"), exp=2000)
+    assert cache.get("fresh") is not None
+    assert cache.get("new") is not None
+
+def test_full_cache_evicts_least_recently_used():
+    cache = TokenCache(max_size=2, clock=FakeClock())
+    cache.put("a", make_user("alice"), exp=2000)
+    cache.put("b", make_user("bob"), exp=2000)
+    cache.get("a")
+    cache.put("c", make_user("carol"), exp=2000)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+
+def test_invalidate_user():
+    cache = TokenCache(max_size=10, clock=FakeClock())
+    alice = make_user("alice")
+    cache.put("a1", alice, exp=2000)
+    cache.put("a2", alice, exp=2000)
+    cache.put("b1", make_user("bob"), exp=2000)
+    cache.invalidate_user(alice)
+    assert cache.get("a1") is None and cache.get("a2") is None
+    assert cache.get("b1") is not None
+    cache.invalidate_user(None)
+    assert len(cache) == 0
+
+def test_revoked_until_exp():
+    clock = FakeClock()
+    cache = TokenCache(max_size=10, clock=clock)
+    cache.put("t", make_user("alice"), exp=1100)
+    cache.revoke("t", exp=1100)
+    assert cache.get("t") is None
+    assert cache.is_revoked("t")
+    clock.now = 1100
+    assert not cache.is_revoked("t")
+
+def test_expired_tokens_are_purged_without_a_full_cache():
+    clock = FakeClock()
+    cache = TokenCache(max_size=0, clock=clock)
+    for i in range(100):
+        cache.revoke(f"r{i}", exp=1010)
+    assert len(cache._revoked) == 100
+    clock.now = 1010
+    cache.revoke("late", exp=2000)
+    assert list(cache._revoked) == ["late"]
+    assert len(cache._expiry) == 1
+
+    cache = TokenCache(max_size=1000, clock=clock)
+    for i in range(100):
+        cache.put(f"t{i}", make_user(f"user{i}"), exp=1020)
+    clock.now = 1020
+    cache.put("new", make_user("new"), exp=2000)
+    assert len(cache) == 1
+    assert len(cache._expiry) == 1
+
+def test_expiry_heap_stays_bounded_by_live_tokens():
+    cache = TokenCache(max_size=2, clock=FakeClock())
+    for i in range(1000):
+        cache.put(f"t{i}", make_user(f"user{i}"), exp=5000)
+    assert len(cache) == 2
+    assert len(cache._expiry) <= 2 * 2 + 64 + 1
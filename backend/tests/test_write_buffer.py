@@ -0,0 +1,122 @@
+import asyncio
+import os
+import subprocess
+import sys
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import pytest
+
+from app.db import MockDB, db
+from app.storage import AsyncStorage
+from app.models import GameSessionDetails, GameState
+from app.write_buffer import SessionWriteBuffer, session_buffer, coalesced, flushed
+
+
+@pytest.fixture
+def store():
+    store = MockDB()
+    store.reset()
+    return store
+
+def start_session(store):
+    session = GameSessionDetails(
+        id=uuid4(), userId=uuid4(), username="p", mode="walls", startedAt=datetime.now(timezone.utc),
+        gameState=GameState(snake=[{"x": 1, "y": 1}])
+    )
+    store.create_session(session)
+    return str(session.id)
+
+def test_updates_coalesce_until_flush(store):
+    buffer = SessionWriteBuffer(AsyncStorage(store, workers=1), flush_interval=1)
+    session_id = start_session(store)
+    coalesced_before, flushed_before = coalesced.value, flushed.value
+
+    async def play():
+        await buffer.update(session_id, {"currentScore": 10})
+        await buffer.update(
+            session_id, {"currentScore": 30, "gameState": GameState(direction="UP", snake=[{"x": 2, "y": 1}])}
+        )
+        await buffer.update(session_id, {"currentScore": 20})
+
+        # Reads see the merged state, storage hasn't been written yet
+        assert (await buffer.get(session_id)).currentScore == 30
+        assert (await buffer.get(session_id)).gameState.direction == "UP"
+        assert store.get_session(session_id).currentScore == 0
+
+        assert await buffer.flush() == 1
+        assert store.get_session(session_id).currentScore == 30
+        assert store.get_session(session_id).gameState.direction == "UP"
+        assert coalesced.value - coalesced_before == 2
+        assert flushed.value - flushed_before == 1
+        assert await buffer.flush() == 0
+
+    asyncio.run(play())
+
+def test_in_place_changes_stay_in_buffer(store):
+    buffer = SessionWriteBuffer(AsyncStorage(store, workers=1), flush_interval=1)
+    session_id = start_session(store)
+    pending = asyncio.run(buffer.update(session_id, {"seq": 1}))
+    pending.gameState.snake.push_head(2, 1)
+    assert len(store.get_session(session_id).gameState.snake) == 1
+
+def test_end_flushes_pending_updates(store):
+    buffer = SessionWriteBuffer(AsyncStorage(store, workers=1), flush_interval=1)
+    session_id = start_session(store)
+
+    async def play():
+        await buffer.update(session_id, {"gameState": GameState(direction="LEFT")})
+        ended = await buffer.end(session_id, {"isActive": False, "score": 50})
+        assert ended.isActive is False
+        assert store.get_session(session_id).gameState.direction == "LEFT"
+        assert (await buffer.get(session_id)).score == 50
+
+    asyncio.run(play())
+
+def test_updates_during_a_flush_are_kept(store):
+    # Storage calls go through a thread, so the flush really waits on them
+    store.blocking = True
+    storage = AsyncStorage(store, workers=1)
+    buffer = SessionWriteBuffer(storage, flush_interval=1)
+    session_id = start_session(store)
+
+    async def play():
+        await buffer.update(session_id, {"currentScore": 10})
+        flush = asyncio.ensure_future(buffer.flush())
+        # Runs while the flush awaits storage
+        await asyncio.sleep(0)
+        await buffer.update(session_id, {"seq": 4})
+        assert await flush == 1
+        assert (await buffer.get(session_id)).seq == 4
+        assert store.get_session(session_id).seq == 0
+        assert await buffer.flush() == 1
+        assert store.get_session(session_id).seq == 4
+
+    asyncio.run(play())
+    storage.shutdown()
+
+def test_write_through_when_disabled(store):
+    buffer = SessionWriteBuffer(AsyncStorage(store, workers=1), flush_interval=0)
+    session_id = start_session(store)
+    asyncio.run(buffer.update(session_id, {"currentScore": 5}))
+    assert store.get_session(session_id).currentScore == 5
+    assert asyncio.run(buffer.update("missing", {"currentScore": 5})) is None
+
+def test_shared_storage_writes_through_by_default():
+    # The buffer is per worker; workers sharing SQLite must not each hold a copy
+    env = {key: value for key, value in os.environ.items() if key != "SNAKE_SESSION_FLUSH_INTERVAL"}
+    env["SNAKE_STORAGE"] = "sqlite"
+    code = "from app import config; print(config.SESSION_FLUSH_INTERVAL)"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, env=env)
+    assert result.stdout.strip() == "0.0"
+
+def test_api_reads_through_buffer(client, auth_headers, monkeypatch):
+    monkeypatch.setattr(session_buffer, "flush_interval", 1)
+    sess_id = client.post("/sessions/start", headers=auth_headers, json={"mode": "walls"}).json()["id"]
+    client.patch(f"/sessions/{sess_id}/update", headers=auth_headers, json={"currentScore": 70})
+    assert client.get(f"/sessions/{sess_id}").json()["currentScore"] == 70
+    assert client.get("/sessions/active").json()["data"][0]["currentScore"] == 70
+
+    client.post(f"/sessions/{sess_id}/end", headers=auth_headers, json={"finalScore": 80})
+    assert db.get_session(sess_id).score == 80
+    assert db.get_session(sess_id).isActive is False